@@ -0,0 +1,112 @@
+"""Generate synthetic corpora of .txt files for the benchmarks.
+
+Usage, from the root directory of the repository:
+    python -m benchmarks.corpus DIR [--documents N] [--sentences N] [--words N] [--vocabulary N] [--seed N]
+"""
+
+import argparse
+import os
+from os.path import join
+from typing import List
+
+import numpy as np
+
+# words filtered out as noise, mixed into the sentences in about the proportion of running english text:
+FILLER_WORDS = ["the", "of", "and", "to", "a", "in", "is", "it", "you", "that"]
+CONSONANTS = list("bcdfghjklmnprstvz")
+VOWELS = list("aeiou")
+
+
+def make_vocabulary(size: int, rng: np.random.Generator) -> List[str]:
+    """Return `size` distinct pronounceable, alphabetic words of 2 to 5
+    syllables."""
+    words = set()
+    while len(words) < size:
+        n = size - len(words)
+        consonants = rng.choice(CONSONANTS, size=(n, 5))
+        vowels = rng.choice(VOWELS, size=(n, 5))
+        for syllables, c, v in zip(rng.integers(2, 6, size=n), consonants, vowels):
+            words.add("".join(c[i] + v[i] for i in range(syllables)))
+    return sorted(words)[:size]
+
+
+def generate_corpus(
+    path: str,
+    documents: int = 100,
+    sentences: int = 20,
+    words: int = 12,
+    vocabulary: int = 5000,
+    zipf: float = 1.1,
+    filler: float = 0.4,
+    seed: int = 0,
+) -> List[str]:
+    """Write a synthetic corpus to the given directory, one .txt file per
+    document, and return the file names.
+
+    The words of the sentences are drawn from a synthetic vocabulary with Zipf distributed frequencies, like the
+    words of natural text, mixed with a fraction of stopwords. The corpus only depends on the arguments.
+
+    Args:
+        path: directory to write the files to, created if it does not exist.
+        documents: number of documents.
+        sentences: average number of sentences per document.
+        words: average number of words per sentence.
+        vocabulary: number of distinct (non-stopword) words.
+        zipf: exponent of the Zipf distribution of the word frequencies.
+        filler: fraction of the words which are stopwords.
+        seed: seed of the random generator.
+
+    Returns:
+        List: the names of the written files.
+    """
+    rng = np.random.default_rng(seed)
+    words_list = make_vocabulary(vocabulary, rng)
+    # Zipf distributed ranks, with the most frequent words at random positions in the alphabet:
+    weights = 1.0 / np.arange(1, vocabulary + 1) ** zipf
+    weights = rng.permutation(weights / weights.sum())
+    cumulative = np.cumsum(weights)
+    os.makedirs(path, exist_ok=True)
+    file_names = []
+    for document in range(1, documents + 1):
+        lengths = np.maximum(rng.poisson(words, size=max(1, rng.poisson(sentences))), 1)
+        # draw the words of all sentences of the document at once:
+        ranks = np.minimum(
+            np.searchsorted(cumulative, rng.random(lengths.sum())), vocabulary - 1
+        )
+        document_words = [words_list[rank] for rank in ranks]
+        fillers = np.flatnonzero(rng.random(lengths.sum()) < filler)
+        for i, j in zip(fillers, rng.integers(0, len(FILLER_WORDS), len(fillers))):
+            document_words[i] = FILLER_WORDS[j]
+        ends = np.cumsum(lengths)
+        text = " ".join(
+            " ".join(document_words[end - length : end]).capitalize() + "."
+            for end, length in zip(ends, lengths)
+        )
+        file_name = "document{}.txt".format(document)
+        with open(join(path, file_name), "w") as file:
+            file.write(text)
+        file_names.append(file_name)
+    return file_names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="directory to write the corpus to")
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--sentences", type=int, default=20)
+    parser.add_argument("--words", type=int, default=12)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_corpus(
+        args.path,
+        documents=args.documents,
+        sentences=args.sentences,
+        words=args.words,
+        vocabulary=args.vocabulary,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Benchmark building and querying an InvertedIndex on a synthetic corpus.
+
+Measures the end-to-end build time, the throughput and time of each stage of the build, the peak resident set
+size, the latency percentiles of queries and ranked queries, the time of mapped_inverted_index and the cold import
+time of the package on top of NLTK, which should stay below IMPORT_TIME_TARGET. The results are written as JSON;
+given the results of an earlier run with the same configuration and corpus, timings which regressed by more than
+the tolerance are reported and the script exits with status 1. The script also exits with status 1 if the import
+time target is missed, and refuses to compare with a baseline of another configuration or corpus (status 2).
+
+Usage, from the root directory of the repository:
+    python -m benchmarks.indexing [--documents N] [--sentences N] [--words N] [--vocabulary N] [--workers N]
+        [--streaming] [--queries N] [--output FILE] [--baseline FILE] [--tolerance FRACTION]
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import eigen_tech_project
+from benchmarks.corpus import generate_corpus
+from eigen_tech_project.inverted_index import InvertedIndex
+from eigen_tech_project.utils.profiling import Profiler
+
+PERCENTILES = (50, 90, 99)
+# arguments which do not change what is measured, ignored when comparing with a baseline:
+OUTPUT_ARGUMENTS = ("output", "baseline", "tolerance")
+# seconds it may take to import eigen_tech_project.inverted_index in a fresh interpreter, after importing NLTK:
+IMPORT_TIME_TARGET = 0.5
+
+
+def peak_rss() -> int:
+    """Return the peak resident set size of this process and of its
+    terminated children, in bytes."""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS:
+    unit = 1 if sys.platform == "darwin" else 1024
+    return unit * max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
+def import_times() -> Dict[str, float]:
+    """Return the time in seconds of importing NLTK and, after it, of
+    importing eigen_tech_project.inverted_index in a fresh interpreter."""
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "import nltk\n"
+        "middle = time.perf_counter()\n"
+        "import eigen_tech_project.inverted_index\n"
+        "print(middle - start, time.perf_counter() - middle)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.split()
+    return {"nltk_seconds": float(output[0]), "package_seconds": float(output[1])}
+
+
+def latencies(function, arguments: List) -> Dict[str, float]:
+    """Return the percentiles of the latency in seconds of calling function
+    with each of the arguments."""
+    times = []
+    for argument in arguments:
+        start = time.perf_counter()
+        function(argument)
+        times.append(time.perf_counter() - start)
+    return {
+        "p{}".format(percentile): float(np.percentile(times, percentile))
+        for percentile in PERCENTILES
+    }
+
+
+def make_queries(index: InvertedIndex, n: int, seed: int = 0) -> List[str]:
+    """Return n queries over the vocabulary of the index: single lemmas,
+    conjunctions, disjunctions and phrases."""
+    rng = np.random.default_rng(seed)
+    vocabulary = index.vocabulary
+    templates = ["{}", "{} AND {}", "{} OR {}", '"{} {}"', "{} AND NOT {}"]
+    queries = []
+    for i in range(n):
+        lemmas = [vocabulary[j] for j in rng.integers(0, len(vocabulary), 2)]
+        queries.append(templates[i % len(templates)].format(*lemmas))
+    return queries
+
+
+def benchmark(args) -> Dict:
+    """Return the results of the benchmark for the given arguments."""
+    with tempfile.TemporaryDirectory() as path:
+        generate_corpus(
+            path,
+            documents=args.documents,
+            sentences=args.sentences,
+            words=args.words,
+            vocabulary=args.vocabulary,
+            seed=args.seed,
+        )
+        profiler = Profiler()
+        start = time.perf_counter()
+        index = InvertedIndex(
+            path, workers=args.workers, streaming=args.streaming, profiler=profiler
+        )
+        build = time.perf_counter() - start
+        stages = {
+            name: {
+                "calls": stats["calls"],
+                "seconds": stats["wall"],
+                "cpu_seconds": stats["cpu"],
+                "items": stats["items"],
+                "items_per_second": (
+                    stats["items"] / stats["wall"] if stats["wall"] else None
+                ),
+            }
+            for name, stats in profiler.report().items()
+        }
+
+        queries = make_queries(index, args.queries, seed=args.seed)
+        index.query(queries[0])
+        index.rank(queries[0])
+        query_latency = latencies(index.query, queries)
+        rank_latency = latencies(index.rank, [q.replace('"', "") for q in queries])
+
+        start = time.perf_counter()
+        index.mapped_inverted_index()
+        mapped = time.perf_counter() - start
+        n_sentences = len(index.sentences)
+        return {
+            "config": vars(args),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "eigen_tech_project": eigen_tech_project.__version__,
+            },
+            "corpus": {
+                "documents": len(index.file_names),
+                "sentences": n_sentences,
+                "vocabulary": len(index.vocabulary),
+                "postings": int(index.postings_matrix.nnz),
+            },
+            "timings": {
+                "build_seconds": build,
+                "build_sentences_per_second": n_sentences / build,
+                "mapped_inverted_index_seconds": mapped,
+                "query_latency_seconds": query_latency,
+                "rank_latency_seconds": rank_latency,
+            },
+            "stages": stages,
+            "import": import_times(),
+            "peak_rss_bytes": peak_rss(),
+        }
+
+
+def mismatches(results: Dict, baseline: Dict) -> List[str]:
+    """Return a description of each setting of the configuration and each
+    statistic of the corpus which differs between the results and the
+    baseline, whose timings are then not comparable."""
+    found = []
+    for section in ["config", "corpus"]:
+        values, reference = results[section], baseline.get(section, {})
+        for name in sorted(set(values) | set(reference)):
+            if section == "config" and name in OUTPUT_ARGUMENTS:
+                continue
+            if values.get(name) != reference.get(name):
+                found.append(
+                    "{}.{}: {!r} != {!r}".format(
+                        section, name, values.get(name), reference.get(name)
+                    )
+                )
+    return found
+
+
+def regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Return a description of each timing in the results which is more than
+    `tolerance` (a fraction) slower than in the baseline.
+
+    Raises:
+        ValueError: if the configuration or the corpus of the baseline differs from that of the results, see
+            mismatches: the timings are then not comparable.
+    """
+    different = mismatches(results, baseline)
+    if different:
+        raise ValueError("baseline differs: " + ", ".join(different))
+    found = []
+
+    def compare(name, value, reference):
+        if reference and value > reference * (1 + tolerance):
+            found.append("{}: {:.6g} > {:.6g}".format(name, value, reference))
+
+    timings, reference = results["timings"], baseline["timings"]
+    for name in ["build_seconds", "mapped_inverted_index_seconds"]:
+        compare(name, timings[name], reference.get(name))
+    for name in ["query_latency_seconds", "rank_latency_seconds"]:
+        for percentile, value in timings[name].items():
+            compare(name + "." + percentile, value, reference[name].get(percentile))
+    for name, stats in results["stages"].items():
+        if name in baseline["stages"]:
+            compare(
+                "stages." + name, stats["seconds"], baseline["stages"][name]["seconds"]
+            )
+    compare(
+        "import.package_seconds",
+        results["import"]["package_seconds"],
+        baseline.get("import", {}).get("package_seconds"),
+    )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--sentences", type=int, default=20)
+    parser.add_argument("--words", type=int, default=12)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--output", help="file to write the results to")
+    parser.add_argument("--baseline", help="results of an earlier run to compare to")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = benchmark(args)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+    failed = results["import"]["package_seconds"] > IMPORT_TIME_TARGET
+    if failed:
+        print(
+            "import time target missed: {:.3g} > {:.3g}".format(
+                results["import"]["package_seconds"], IMPORT_TIME_TARGET
+            ),
+            file=sys.stderr,
+        )
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        try:
+            found = regressions(results, baseline, args.tolerance)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            sys.exit(2)
+        for regression in found:
+            print("regression:", regression, file=sys.stderr)
+        failed = failed or bool(found)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark the compressed postings against lists of ints and the postings
+matrix: bytes per posting, decode throughput and intersection speed.
+
+Usage, from the root directory of the repository:
+    python -m benchmarks.postings [--sentences N] [--terms N] [--path DIR]
+
+Without --path, postings are generated for N synthetic sentences with Zipf distributed lemmas. With --path, the
+postings of an InvertedIndex built on the .txt-files in DIR are used.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix
+
+from eigen_tech_project.search.query import intersect
+from eigen_tech_project.storage.postings import CompressedPostings
+
+
+def synthetic_postings(
+    n_sentences: int, n_terms: int, lemmas_per_sentence: int = 12, seed: int = 0
+) -> csc_matrix:
+    """Return a (sentences x terms) count matrix in compressed sparse column
+    format, with Zipf distributed terms."""
+    rng = np.random.default_rng(seed)
+    terms = (rng.zipf(1.2, n_sentences * lemmas_per_sentence) - 1) % n_terms
+    rows = np.repeat(np.arange(n_sentences), lemmas_per_sentence)
+    matrix = csr_matrix(
+        (np.ones(len(terms), dtype=np.int64), (rows, terms)),
+        shape=(n_sentences, n_terms),
+    ).tocsc()
+    matrix.sum_duplicates()
+    matrix.sort_indices()
+    return matrix
+
+
+def timed(function, repeat: int = 3) -> float:
+    """Return the best wall time in seconds of calling function."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(matrix: csc_matrix) -> dict:
+    """Return the benchmark results for the postings of the given matrix."""
+    n_postings = matrix.nnz
+    tracemalloc.start()
+    lists = [
+        matrix.indices[matrix.indptr[i] : matrix.indptr[i + 1]].tolist()
+        for i in range(matrix.shape[1])
+    ]
+    list_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del lists
+
+    compress_time = timed(lambda: CompressedPostings.from_csc(matrix), repeat=1)
+    postings = CompressedPostings.from_csc(matrix)
+    terms = range(len(postings))
+    decode_time = timed(lambda: [postings[term] for term in terms])
+    iterate_time = timed(
+        lambda: [sum(1 for _ in postings.iter_ids(term)) for term in terms], repeat=1
+    )
+
+    # intersect the most frequent terms with terms of decreasing frequency:
+    by_length = np.argsort(-postings.term_lengths)
+    pairs = [(by_length[0], term) for term in by_length[1:200]]
+    skip_time = timed(lambda: [postings.intersect(a, b) for a, b in pairs])
+    full_time = timed(lambda: [intersect(postings[a], postings[b]) for a, b in pairs])
+    return {
+        "postings": int(n_postings),
+        "terms": int(matrix.shape[1]),
+        "bytes_per_posting": {
+            "lists": list_bytes / n_postings,
+            "matrix_indices": matrix.indices.itemsize,
+            "compressed": postings.nbytes / n_postings,
+        },
+        "compress_seconds": compress_time,
+        "decode_postings_per_second": n_postings / decode_time,
+        "iterate_postings_per_second": n_postings / iterate_time,
+        "intersect_seconds": {"block_skip": skip_time, "full_decode": full_time},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", type=int, default=200000)
+    parser.add_argument("--terms", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--path", help="directory with .txt-files to index")
+    args = parser.parse_args()
+    if args.path:
+        from eigen_tech_project.inverted_index import InvertedIndex
+
+        matrix = InvertedIndex(args.path).postings_matrix
+    else:
+        matrix = synthetic_postings(args.sentences, args.terms, seed=args.seed)
+    print(json.dumps(benchmark(matrix), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,109 @@
+import asyncio
+import copy
 import re
-from os import listdir
-from os.path import getsize, isfile, join
-from typing import List, Tuple
+from collections import Counter
+from concurrent.futures import Executor
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-import nltk
+import numpy as np
 import pandas as pd
 from cached_property import cached_property
-from scipy.sparse import csr_matrix
+from scipy.sparse import csc_matrix, csr_matrix
 from sklearn.feature_extraction.text import CountVectorizer
 
-import eigen_tech_project.nlp.models  # noqa
-from eigen_tech_project.nlp.processing import SentenceProcessor
+from eigen_tech_project.nlp.processing import (
+    SentenceProcessor,
+    build_noise,
+    default_noise,
+)
+from eigen_tech_project.nlp.segmentation import SEGMENTERS, SentenceSegmenter
+from eigen_tech_project.pipeline.counting import analyze, count_lemmas
+from eigen_tech_project.pipeline.incremental import apply_changes
+from eigen_tech_project.pipeline.ingest import (
+    DEFAULT_IO_WORKERS,
+    iter_files,
+    read_files,
+    scan_directory,
+)
+from eigen_tech_project.pipeline.parallel import build_parallel
+from eigen_tech_project.pipeline.streaming import DEFAULT_MEMORY_LIMIT, build_streaming
+from eigen_tech_project.search.dictionary import WILDCARDS, TermDictionary
+from eigen_tech_project.search.query import QueryEngine, QueryResult
+from eigen_tech_project.search.ranking import Ranker
+from eigen_tech_project.storage.cache import (
+    DEFAULT_CACHE_SIZE,
+    BuildCache,
+    pipeline_fingerprint,
+)
+from eigen_tech_project.storage.persistence import (
+    index_to_arrays,
+    load_arrays,
+    restore_index,
+    save_arrays,
+)
+from eigen_tech_project.storage.postings import CompressedPostings
+from eigen_tech_project.storage.sentences import (
+    SentenceStore,
+    compact_ids,
+    concatenate_offsets,
+    document_offsets,
+)
+from eigen_tech_project.storage.shared import attach_arrays, share_arrays
+from eigen_tech_project.storage.sources import SourceFiles
+from eigen_tech_project.storage.strings import StringStore, as_columns, utf8_offsets
 from eigen_tech_project.utils.errors import (
+    DocumentNotInIndexError,
     FileNameContainsNoNumberError,
     FileNumbersNotUniqueError,
+    InvalidSegmenterError,
     NoFilesInDirectoryError,
     NoInterestingSentencesError,
+    NotATXTFileError,
     NoTXTFilesInDirectoryError,
     NoTXTFilesWithContentInDirectoryError,
 )
-from eigen_tech_project.utils.utils import no_stdout
+from eigen_tech_project.utils.profiling import Profiler, profiled
+
+
+def document_id(file_name: str) -> int:
+    """Returns the document id embedded in the given file name: the number
+    formed by the digits in the file name.
+
+    Example return:
+        document_id("file12.txt") = 12
+
+    Args:
+        file_name: name of a file.
+    Returns:
+        int: the document id.
+    """
+    number = re.sub("[^0-9]", "", file_name)
+    if not number.isdigit():
+        raise FileNameContainsNoNumberError
+    return int(number)
+
+
+def number_files(file_names: Sequence[str]) -> List[Tuple[int, str]]:
+    """Returns the document id and name of each of the given files, ordered
+    on id.
+
+    All file names should contain a number (see document_id) and the numbers should be unique, otherwise an error is
+    raised.
+
+    Example return:
+        number_files(["file2.txt", "file1.txt"]) = [(1, "file1.txt"), (2, "file2.txt")]
+
+    Args:
+        file_names: names of files.
+    Returns:
+        List: List of tuples containing the id and name of each file.
+    """
+    numbered_files = sorted((document_id(f), f) for f in file_names)
+    # All file numbers should be unique:
+    if len({f[0] for f in numbered_files}) != len(numbered_files):
+        raise FileNumbersNotUniqueError
+    return numbered_files
 
 
 class InvertedIndex:
@@ -38,40 +122,504 @@ class InvertedIndex:
 
     Args:
         path: path to the folder is relative to the current working directory, containing .txt files.
+        workers: number of worker processes used to split, process and count the documents. Defaults to 1, in which
+            case everything runs in the current process.
+        streaming: if True, the documents are read and processed one file at a time, keeping only the vocabulary
+            and the postings in memory. Defaults to False.
+        memory_limit: in streaming mode, the maximum number of bytes of postings kept in memory before they are
+            spilled to disk.
+        spill_dir: in streaming mode, the directory in which spilled data is stored. Defaults to the system's
+            temporary directory.
+        io_workers: maximum number of threads listing and reading files concurrently. Defaults to 16.
+        segmenter: how documents are split in sentences, "punkt" (NLTK's pre-trained Punkt model) or "rules" (a
+            faster, rule-based segmenter, see SentenceSegmenter). Defaults to "punkt".
+        cache_dir: directory of a persistent cache of the split and lemmatized sentences of each file, keyed on the
+            contents of the file and the configuration of the processing, such that rebuilding the index only
+            processes new and changed files (see BuildCache). Only used when building in one process. Defaults to
+            None, in which case nothing is cached.
+        cache_size: maximum size of the cache in bytes, the least recently used entries are evicted beyond it.
+        lazy: if True, nothing is computed at initialisation and each property is computed on first access, in the
+            cheapest way available: e.g. the vocabulary and lemma frequencies are counted without building the
+            document-term matrix. Defaults to False, in which case the whole index is built at initialisation.
+        profiler: Profiler recording the wall time, CPU time, number of items and peak memory of each stage of
+            building and querying the index. Defaults to a new Profiler, see InvertedIndex.profiler.report().
+        stopwords: list of stopwords to filter out, instead of the english stopwords provided by NLTK.
+        common_words: list of common words to filter out, instead of the bundled 1000 most common words.
+        noise_words: list of additional (e.g. domain specific) words to filter out.
+        allow_words: list of words which are never filtered out, even if they are stopwords or common words.
     Returns:
         The InvertedIndex god object instance
     """
 
-    def __init__(self, path):
+    def __init__(
+        self,
+        path,
+        workers: int = 1,
+        streaming: bool = False,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT,
+        spill_dir: Optional[str] = None,
+        io_workers: int = DEFAULT_IO_WORKERS,
+        segmenter: str = "punkt",
+        cache_dir: Optional[str] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        lazy: bool = False,
+        profiler: Optional[Profiler] = None,
+        stopwords: Optional[List[str]] = None,
+        common_words: Optional[List[str]] = None,
+        noise_words: Optional[List[str]] = None,
+        allow_words: Optional[List[str]] = None,
+    ):
         self.path = path
-        self.sentence_splitter = nltk.data.load("tokenizers/punkt/english.pickle")
+        self.workers = workers
+        self.streaming = streaming
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+        self.io_workers = io_workers
+        if segmenter not in SEGMENTERS:
+            raise InvalidSegmenterError
+        self.segmenter = segmenter
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.lazy = lazy
+        self.profiler = profiler if profiler is not None else Profiler()
+        word_lists = (stopwords, common_words, noise_words, allow_words)
+        if all(word_list is None for word_list in word_lists):
+            self.noise = default_noise()
+        else:
+            self.noise = build_noise(*word_lists)
         self.sentence_processor = SentenceProcessor
-        with no_stdout():
-            self.inverted_index
+        if not lazy:
+            self.postings_matrix
 
     def __repr__(self):
         """Returns representation of the InvertedIndex object."""
         return "{}({!r})".format(self.__class__.__name__, self.path)
 
+    def save(self, directory: str):
+        """Persist the index to the given directory.
+
+        The vocabulary, the lemma frequencies, the document-term matrix (as its CSR data, indices and indptr
+        arrays) and the sentence table are written as flat binary (.npy) arrays, which InvertedIndex.load can
+        memory-map.
+
+        Args:
+            directory: path to the directory, which is created if it does not exist.
+        """
+        save_arrays(directory, *index_to_arrays(self))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "InvertedIndex":
+        """Returns the InvertedIndex persisted in the given directory by
+        InvertedIndex.save, without processing the text files again.
+
+        By default the arrays are memory-mapped read-only: loading takes milliseconds, data is only read from disk
+        when it is accessed, and processes loading the same index share the pages in the OS page cache.
+
+        Args:
+            directory: path to the directory containing the persisted index.
+            mmap: if True, the arrays are memory-mapped instead of read into memory. Defaults to True.
+        Returns:
+            InvertedIndex: The InvertedIndex object instance
+        """
+        return cls.from_arrays(*load_arrays(directory, mmap=mmap))
+
+    def share(self, path: Optional[str] = None) -> str:
+        """Publish the index to a read-only segment in shared memory, which
+        other processes can attach to with InvertedIndex.attach.
+
+        The segment holds the same arrays as InvertedIndex.save, the postings matrix and the structures built for
+        searching: the positions of the QueryEngine, the unit lengths and document level matrix of the Ranker and
+        the hash table of the TermDictionary. These are built once, here, and written in one file in the memory
+        backed /dev/shm (or the system's temporary directory). All processes attaching to it map the same pages,
+        so memory use does not grow with the number of (e.g. web server worker) processes. The segment can be
+        removed once all processes have attached to it.
+
+        Args:
+            path: path to the segment to write. Defaults to None, in which case a new file is created.
+        Returns:
+            str: path to the segment.
+        """
+        meta, arrays = index_to_arrays(self)
+        postings_matrix = self.postings_matrix
+        query_engine = self.query_engine
+        ranker = self.ranker
+        document_matrix = ranker.document_matrix
+        sentence_lengths, sentence_average = ranker.sentence_lengths
+        document_lengths, document_average = ranker.document_lengths
+        arrays.update(
+            {
+                "postings.data": postings_matrix.data,
+                "postings.indices": postings_matrix.indices,
+                "postings.indptr": postings_matrix.indptr,
+                "dictionary.table": self.term_dictionary.table,
+                "query.positions": query_engine.positions,
+                "query.position_offsets": query_engine.position_offsets,
+                "ranker.document_ids": ranker.document_ids,
+                "ranker.documents.data": document_matrix.data,
+                "ranker.documents.indices": document_matrix.indices,
+                "ranker.documents.indptr": document_matrix.indptr,
+                "ranker.sentence_lengths": sentence_lengths,
+                "ranker.document_lengths": document_lengths,
+            }
+        )
+        meta["average_lengths"] = [float(sentence_average), float(document_average)]
+        return share_arrays(meta, arrays, path=path)
+
+    @classmethod
+    def attach(cls, path: str) -> "InvertedIndex":
+        """Returns the InvertedIndex published in shared memory by
+        InvertedIndex.share, without copying its data.
+
+        The arrays of the index, including the structures built for searching, are read-only views of the shared
+        segment, which stays mapped as long as the index (or any of its arrays) exists.
+
+        Args:
+            path: path to the segment returned by InvertedIndex.share.
+        Returns:
+            InvertedIndex: The InvertedIndex object instance
+        """
+        return cls.from_arrays(*attach_arrays(path))
+
+    @classmethod
+    def from_arrays(cls, meta: Dict, arrays: Dict[str, np.ndarray]) -> "InvertedIndex":
+        """Returns the InvertedIndex represented by the given metadata and
+        arrays, as returned by index_to_arrays, or by InvertedIndex.share
+        with the structures built for searching.
+
+        Args:
+            meta: Dictionary with metadata.
+            arrays: Dictionary mapping array names to numpy arrays.
+        Returns:
+            InvertedIndex: The InvertedIndex object instance
+        """
+        index = cls.__new__(cls)
+        index.sentence_processor = SentenceProcessor
+        index.io_workers = DEFAULT_IO_WORKERS
+        index.cache_dir = None
+        index.lazy = False
+        index.profiler = Profiler()
+        restore_index(index, meta, arrays)
+        if "query.positions" in arrays:
+            # the structures built by InvertedIndex.share are used as they are:
+            term_dictionary = TermDictionary(index.vocabulary)
+            term_dictionary.__dict__["table"] = arrays["dictionary.table"]
+            query_engine = QueryEngine(index)
+            query_engine.__dict__.update(
+                {
+                    "sentence_documents": arrays["documents"],
+                    "positions": arrays["query.positions"],
+                    "position_offsets": arrays["query.position_offsets"],
+                }
+            )
+            ranker = Ranker(query_engine)
+            document_ids = arrays["ranker.document_ids"]
+            sentence_average, document_average = meta["average_lengths"]
+            ranker.__dict__.update(
+                {
+                    "document_ids": document_ids,
+                    "document_matrix": csc_matrix(
+                        (
+                            arrays["ranker.documents.data"],
+                            arrays["ranker.documents.indices"],
+                            arrays["ranker.documents.indptr"],
+                        ),
+                        shape=(len(document_ids), len(index.vocabulary)),
+                        copy=False,
+                    ),
+                    "sentence_lengths": (
+                        arrays["ranker.sentence_lengths"],
+                        sentence_average,
+                    ),
+                    "document_lengths": (
+                        arrays["ranker.document_lengths"],
+                        document_average,
+                    ),
+                }
+            )
+            index.__dict__.update(
+                {
+                    "term_dictionary": term_dictionary,
+                    "query_engine": query_engine,
+                    "ranker": ranker,
+                }
+            )
+        return index
+
+    def add_documents(self, file_names: List[str]):
+        """Add new .txt files in the directory of the index to the index.
+
+        Only the added files are processed, their sentences and lemmas are merged into the existing index. The
+        result is identical to building the index from scratch.
+
+        Args:
+            file_names: names of the files to add, the numbers in the file names should not be in use yet.
+        """
+        self.update_index(added=file_names)
+
+    def update_document(self, file_name: str):
+        """Update the index after the contents of a file in the index have
+        changed.
+
+        Only the changed file is processed again. The result is identical to building the index from scratch.
+
+        Args:
+            file_name: name of the changed file.
+        """
+        self.update_index(replaced=[file_name])
+
+    def remove_document(self, file_name: str):
+        """Remove a file from the index.
+
+        Args:
+            file_name: name of the file to remove.
+        """
+        self.update_index(removed=[file_name])
+
+    @profiled("update", items=None)
+    def update_index(
+        self,
+        added: Sequence[str] = (),
+        replaced: Sequence[str] = (),
+        removed: Sequence[str] = (),
+    ):
+        """Add, replace and remove files in one update of the index.
+
+        Only the added and replaced files are processed. The sentences of replaced and removed files are dropped,
+        the vocabulary is extended with the new lemmas and lemmas which no longer occur are dropped, so the
+        updated index is identical to building the index from scratch. The derived properties (lemma_frequencies,
+        lemma_occurrences, inverted_index) are recomputed on their next access.
+
+        The updated data replaces the existing data as a whole, objects obtained before the update are never
+        modified.
+
+        Args:
+            added: names of the files to add, the numbers in the file names should not be in use yet.
+            replaced: names of the files in the index of which the contents have changed.
+            removed: names of the files to remove from the index.
+        """
+        indexed = {document_id(f): f for f in self.file_names}
+        if any(not f.endswith(".txt") for f in added):
+            raise NotATXTFileError
+        if any(
+            indexed.get(document_id(f)) != f for f in list(replaced) + list(removed)
+        ):
+            raise DocumentNotInIndexError
+
+        documents = []
+        new_files = list(added) + list(replaced)
+        for f, text in zip(
+            new_files, read_files(self.path, new_files, io_workers=self.io_workers)
+        ):
+            documents.append((document_id(f), f, text))
+        # empty files are not part of the index:
+        documents = [document for document in documents if document[2]]
+        removed_ids = {document_id(f) for f in list(replaced) + list(removed)}
+        file_names = [f for i, f in indexed.items() if i not in removed_ids] + [
+            document[1] for document in documents
+        ]
+        if not file_names:
+            raise NoTXTFilesWithContentInDirectoryError
+        # the files are validated in the same way as when the index is built from scratch:
+        number_files(file_names)
+
+        processed_sentences, offsets, vocabulary, matrix = apply_changes(
+            self.processed_sentences,
+            self.sentence_offsets,
+            self.vocabulary,
+            self.document_term_matrix,
+            removed_ids,
+            [(document[0], document[2]) for document in documents],
+            noise=self.noise,
+            segmenter=self.segmenter,
+        )
+        if not vocabulary:
+            raise NoInterestingSentencesError
+
+        state = {
+            "file_names": file_names,
+            "sentences": processed_sentences.without_processed(),
+            "processed_sentences": processed_sentences,
+            "sentence_offsets": offsets,
+            "count_vectorizer": CountVectorizer(vocabulary=vocabulary),
+            "document_term_matrix": matrix,
+            "vocabulary": vocabulary,
+        }
+        if "raw_data" in self.__dict__:
+            state["raw_data"] = sorted(
+                [d for d in self.raw_data if d[0] not in removed_ids]
+                + [(document[0], document[2]) for document in documents],
+                key=lambda x: x[0],
+            )
+        for name in [
+            "document_files",
+            "document_spans",
+            "source_files",
+            "pipeline_build",
+            "lemma_counts",
+            "lemma_counter",
+            "lemma_frequency_array",
+            "lemma_frequencies",
+            "postings_matrix",
+            "compressed_postings",
+            "lemma_occurrences",
+            "inverted_index",
+            "term_dictionary",
+            "query_engine",
+            "ranker",
+            "snapshot",
+        ]:
+            self.__dict__.pop(name, None)
+        self.__dict__.update(state)
+
     @cached_property
+    def snapshot(self) -> "InvertedIndex":
+        """Returns a read-only snapshot of the current state of the index.
+
+        The snapshot is a shallow copy of the index: it shares all data built so far, and properties built later on
+        either object are not shared. Updates replace the data of the index as a whole and drop the snapshot, so a
+        snapshot never observes a partially applied update. The snapshot is reused until the next update, such
+        that the properties built for one query are reused by the next.
+
+        Returns:
+            InvertedIndex: the snapshot, which should only be read.
+        """
+        snapshot = copy.copy(self)
+        # objects referring back to the index are rebuilt for the snapshot:
+        for name in ["query_engine", "ranker", "snapshot", "update_lock"]:
+            snapshot.__dict__.pop(name, None)
+        return snapshot
+
+    @classmethod
+    async def abuild(
+        cls, path, executor: Optional[Executor] = None, **kwargs
+    ) -> "InvertedIndex":
+        """Build an InvertedIndex without blocking the event loop.
+
+        The index is built in the executor: files are read by io_workers threads, splitting, processing and
+        counting run in the executor as well, or in worker processes when workers > 1. As these stages are CPU
+        bound, use workers > 1 to keep the GIL, and therefore the event loop, free.
+
+        Example:
+            index = await InvertedIndex.abuild("data", workers=4)
+
+        Args:
+            path: path to the folder containing the .txt files.
+            executor: executor running the build. Defaults to the default executor of the event loop.
+            kwargs: other arguments of the InvertedIndex class.
+        Returns:
+            InvertedIndex: The InvertedIndex object instance
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, partial(cls, path, **kwargs))
+
+    async def aquery(
+        self, query: str, executor: Optional[Executor] = None
+    ) -> QueryResult:
+        """Evaluate a query without blocking the event loop, see query.
+
+        The query is evaluated in the executor on the snapshot of the index taken when the query starts, so it
+        runs safely alongside updates made with aupdate_index.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.snapshot.query, query)
+
+    async def arank(
+        self, query: str, executor: Optional[Executor] = None, **kwargs
+    ) -> List[Tuple[int, float]]:
+        """Rank sentences or documents without blocking the event loop, see
+        rank. Runs on the snapshot of the index taken when the query starts."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, partial(self.snapshot.rank, query, **kwargs)
+        )
+
+    async def aupdate_index(
+        self,
+        added: Sequence[str] = (),
+        replaced: Sequence[str] = (),
+        removed: Sequence[str] = (),
+        executor: Optional[Executor] = None,
+    ):
+        """Add, replace and remove files without blocking the event loop, see
+        update_index.
+
+        The update is applied in the executor to a copy of the index, including the postings matrix used by
+        queries. Once it is complete, the updated state is published in the event loop as a whole: queries which
+        started earlier finish on their snapshot of the old state, queries which start later see the new state.
+        Updates are applied one at a time, in order of arrival.
+        """
+        if "update_lock" not in self.__dict__:
+            self.update_lock = asyncio.Lock()
+        async with self.update_lock:
+            updated = copy.copy(self)
+            for name in ["query_engine", "ranker", "snapshot"]:
+                updated.__dict__.pop(name, None)
+
+            def update():
+                updated.update_index(added=added, replaced=replaced, removed=removed)
+                updated.postings_matrix
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(executor, update)
+            self.__dict__ = updated.__dict__
+
+    async def aadd_documents(self, file_names: List[str], **kwargs):
+        """Add files without blocking the event loop, see add_documents and
+        aupdate_index."""
+        await self.aupdate_index(added=file_names, **kwargs)
+
+    async def aupdate_document(self, file_name: str, **kwargs):
+        """Update a file without blocking the event loop, see update_document
+        and aupdate_index."""
+        await self.aupdate_index(replaced=[file_name], **kwargs)
+
+    async def aremove_document(self, file_name: str, **kwargs):
+        """Remove a file without blocking the event loop, see remove_document
+        and aupdate_index."""
+        await self.aupdate_index(removed=[file_name], **kwargs)
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Returns the wall time in seconds spent in each stage recorded by the
+        profiler, see Profiler.report for all statistics.
+
+        Example return:
+            {"discover": 0.01, "read": 0.2, "split": 0.4, "tokenize": 0.3, "pos_tag": 2.1, ...}
+        """
+        return {name: stats["wall"] for name, stats in self.profiler.report().items()}
+
+    @cached_property
+    def sentence_splitter(self) -> SentenceSegmenter:
+        """Returns the SentenceSegmenter used to split the documents in
+        sentences.
+
+        The Punkt model is loaded once per process and shared by all InvertedIndex instances.
+
+        Returns:
+            SentenceSegmenter: the sentence segmenter.
+        """
+        return SentenceSegmenter(self.segmenter)
+
+    @cached_property
+    @profiled("discover")
     def file_names(self) -> List[str]:
         """Returns the names of the files in the given directory.
 
         Example return:
             ["file_1.txt", ..., "file_n.txt"]
 
+        The directory is listed once, the sizes of the .txt files are read concurrently (see scan_directory).
+
         Returns:
             List: List containing the file names in strings.
         """
-        file_names = [f for f in listdir(self.path) if isfile(join(self.path, f))]
-        if not file_names:
+        files = scan_directory(self.path, io_workers=self.io_workers)
+        if not files:
             raise NoFilesInDirectoryError
-        txt_file_names = [f for f in file_names if f.endswith(".txt")]
-        if not txt_file_names:
+        txt_files = [f for f in files if f[0].endswith(".txt")]
+        if not txt_files:
             raise NoTXTFilesInDirectoryError
-        non_empty_txt_file_names = [
-            f for f in txt_file_names if getsize(join(self.path, f)) != 0
-        ]
+        non_empty_txt_file_names = [f[0] for f in txt_files if f[1] != 0]
         if not non_empty_txt_file_names:
             raise NoTXTFilesWithContentInDirectoryError
         else:
@@ -88,84 +636,308 @@ class InvertedIndex:
             List: List of tuples containing the id and contents of the files in the path given at initialisation of the
             InvertedIndex instance.
         """
-        # strip non-numerical characters from file names, store as tuple:
-        # Output e.g.: [("file1.txt", "1"), ("file2.txt", "2"), ..., ("fileX.txt", "X")]
-        file_name_to_nr_map = [(f, re.sub("[^0-9]", "", f)) for f in self.file_names]
+        return list(self.iter_documents())
 
-        # All file names should contain a digit after stripping, otherwise raise error:
-        if False in [f[1].isdigit() for f in file_name_to_nr_map]:
-            raise FileNameContainsNoNumberError
+    @cached_property
+    def document_files(self) -> List[Tuple[int, str]]:
+        """Returns the id and name of each file, ordered on id.
+
+        Example return:
+            [(1, "file_1.txt"), ..., (n, "file_n.txt")]
 
-        # Cast the numerical characters into an int:
-        # Output e.g.: [("file1.txt", 1), ("file2.txt", 2), ..., ("fileX.txt", X)]
-        file_name_to_nr_map = [(f[0], int(f[1])) for f in file_name_to_nr_map]
+        Returns:
+            List: List of tuples containing the id and name of the files in the path given at initialisation of the
+            InvertedIndex instance.
+        """
+        # strip non-numerical characters from file names and cast them into an int, all file names should contain
+        # a digit after stripping and the numbers should be unique, otherwise an error is raised:
+        return number_files(self.file_names)
 
-        # All file numbers in the mapping should be unique:
-        if len({f[1] for f in file_name_to_nr_map}) != len(file_name_to_nr_map):
-            raise FileNumbersNotUniqueError
+    def iter_documents(self) -> Iterator[Tuple[int, str]]:
+        """Yields the id and contents of each document, in order of id.
 
-        # read file contents for each file in the mapping:
-        file_contents = [
-            (f[1], open(join(self.path, f[0]), "r").read()) for f in file_name_to_nr_map
-        ]
-        return sorted(file_contents, key=lambda x: x[0])
+        Up to io_workers files are read concurrently, ahead of the consumer (see iter_files). The time spent waiting
+        for the contents of each file is recorded as a run of the "read" stage of the profiler.
+
+        Yields:
+            Tuple: the id and contents of the next document.
+        """
+        contents = iter_files(
+            self.path,
+            [file_name for _, file_name in self.document_files],
+            io_workers=self.io_workers,
+        )
+        for nr, _ in self.document_files:
+            with self.profiler.stage("read", items=1):
+                text = next(contents)
+            yield nr, text
 
     @cached_property
-    def sentences(self) -> List[Tuple[int, str]]:
-        """Returns a list of tuples, each containing one sentence (in string
+    def sentences(self) -> SentenceStore:
+        """Returns a sequence of tuples, each containing one sentence (in string
         format) and the corresponding file id.
 
+        The sentences are stored in columns (see SentenceStore): the tuples are built when they are accessed.
+
         Example return:
             [(1, "First sentence of the first document."),
             (1, "Second sentence of the first document."),
             ..., (n, "m-th sentence of the n-th document.")]
 
         Returns:
-            List: List of tuples containing the file id and the sentences for the files in the path
+            SentenceStore: sequence of tuples containing the file id and the sentences for the files in the path
             given at initialisation of the InvertedIndex instance.
         """
-        data = []
-        for file in self.raw_data:
-            # split each file in sentences:
-            sentences = self.sentence_splitter.tokenize(file[1])
-            # list of sentence level dictionaries:
-            data.extend([(file[0], sentence) for sentence in sentences])
-        return data
+        if self.uses_pipeline:
+            return self.processed_sentences.without_processed()
+        # the sentences are gathered from the files by their offsets:
+        document_spans = self.document_spans
+        counts = [len(spans) for spans in document_spans]
+        documents = np.repeat(
+            np.array([nr for nr, _ in self.raw_data], dtype=np.int64), counts
+        )
+        return SentenceStore(
+            compact_ids(documents),
+            StringStore.from_spans([text for _, text in self.raw_data], document_spans),
+        )
+
+    @cached_property
+    def document_spans(self) -> List[np.ndarray]:
+        """Returns the start and end character offset of each sentence in each
+        document, in order of document id.
+
+        The files are split in sentences by the sentence splitter, unless their offsets are found in the build cache.
+
+        Example return:
+            [array([[0, 37], [38, 76]]), ..., array([[0, 35], ..., [912, 950]])]
+
+        Returns:
+            List: List of arrays of shape (number of sentences, 2), one per document.
+        """
+        cached_documents = self.cached_documents
+        with self.profiler.stage("split") as span:
+            document_spans = [
+                (
+                    np.array(cached_documents[nr][0], dtype=np.int64).reshape(-1, 2)
+                    if nr in cached_documents
+                    else self.sentence_splitter.span_tokenize(text)
+                )
+                for nr, text in self.raw_data
+            ]
+            span.items = sum(len(spans) for spans in document_spans)
+        return document_spans
 
     @cached_property
-    def processed_sentences(self) -> List[Tuple]:
-        """Returns a list of tuples, each containing one sentence (in string
+    def sentence_offsets(self) -> np.ndarray:
+        """Returns the document id and the start and end offset of each
+        sentence in the file of that document.
+
+        Row i of the array locates sentence i: the offsets are byte offsets in the UTF-8 encoding of the text as it
+        was read, which equal the character offsets for ASCII text and the offsets in the file unless the file has
+        "\r\n" line endings (see SourceFiles). The sentences, and the tokens in them, can be sliced from the files
+        without the index holding a copy of the text, see snippet and highlight.
+
+        Example return:
+            array([[1, 0, 37], [1, 38, 76], ..., [n, 912, 950]])
+
+        The pipelines and updates record the offsets while splitting the documents, so the documents are never
+        read or split again to compute them.
+
+        Returns:
+            np.ndarray: int64 array of shape (number of sentences, 3).
+        """
+        if self.uses_pipeline:
+            return self.pipeline_build[1]
+        return concatenate_offsets(
+            [
+                document_offsets(nr, text, spans)
+                for (nr, text), spans in zip(self.raw_data, self.document_spans)
+            ]
+        )
+
+    @cached_property
+    def processed_sentences(self) -> SentenceStore:
+        """Returns a sequence of tuples, each containing one sentence (in string
         format), the processed version of that sentence and the corresponding
         file id.
 
+        The processed sentences are stored in columns, next to the document ids and sentences of the sentences
+        property (see SentenceStore).
+
         Example return:
             [(1, "First sentence of the first document.", "first sentence first document"),
             (1, "Second sentence of the first document.", "second sentence second document"),
             ..., (n, "Last sentence of the last document.", "last sentence last document")]
 
         Returns:
-            List: List of tuples containing the file id and the sentences for the files in the path
+            SentenceStore: sequence of tuples containing the file id and the sentences for the files in the path
             given at initialisation of the InvertedIndex instance.
         """
-        return [
-            sentence + (self.sentence_processor(sentence[1]).processed_sentence,)
-            for sentence in self.sentences
-        ]
+        if self.uses_pipeline:
+            return SentenceStore.from_rows(self.pipeline_build[0])
+        return self.sentences.with_processed(
+            [" ".join(lemmas) for lemmas in self.processed_lemmas]
+        )
 
     @cached_property
-    def count_vectorizer(self):
-        """Returns instance of the sklearn's CountVectorizer class, fitted on
-        the processed sentences.
+    def processed_lemmas(self) -> List[List[str]]:
+        """Returns a list of the interesting lemmas of each sentence.
+
+        The lemmas are the processed sentences before they are joined in one string. They are counted directly by
+        lemma_counts, and dropped once both the processed sentences and the counts are built.
+
+        With a build cache, only the sentences of the files which are not cached are processed, after which the
+        sentence offsets and lemmas of those files are added to the cache.
+
+        Example return:
+            [["first", "sentence", "first", "document"], ..., ["last", "sentence", "last", "document"]]
 
         Returns:
-            CountVectorizer(): instance of the sklearn's CountVectorizer class, fitted on the processed sentences.
+            List: List of lists of strings, the interesting lemmas in each sentence.
         """
-        data = [x[2] for x in self.processed_sentences]
-        # only fit the data to the Countvectorizer() when there is interesting data left after processing:
-        if sum([len(x) for x in data]) == 0:
-            raise NoInterestingSentencesError
+        sentences = self.sentences
+        cached_documents = self.cached_documents
+        uncached = sentences.sentences
+        if cached_documents:
+            uncached = uncached.take(
+                np.flatnonzero(~np.isin(sentences.documents, list(cached_documents)))
+            )
+        with self.profiler.stage("process", items=len(uncached)):
+            processed = self.sentence_processor.lemmatize_many(
+                uncached, noise=self.noise, profiler=self.profiler
+            )
+        if self.build_cache is None:
+            return processed
+        lemmas: List[List[str]] = []
+        position = 0
+        for (nr, text), spans in zip(self.raw_data, self.document_spans):
+            if nr in cached_documents:
+                lemmas.extend(cached_documents[nr][1])
+            else:
+                file_lemmas = processed[position : position + len(spans)]
+                position += len(spans)
+                lemmas.extend(file_lemmas)
+                self.build_cache.put(
+                    self.build_cache.key(text), spans.tolist(), file_lemmas
+                )
+        # the cached offsets and lemmas are no longer needed:
+        del self.__dict__["cached_documents"]
+        return lemmas
+
+    @cached_property
+    def build_cache(self) -> Optional[BuildCache]:
+        """Returns the BuildCache in cache_dir, or None if no cache directory
+        was given.
+
+        The entries are keyed on the contents of each file and the fingerprint of the noise words and the NLTK
+        models, so changing either never returns stale offsets or lemmas. See build_cache.info for its hit rate.
+
+        Returns:
+            BuildCache: the BuildCache object instance, or None.
+        """
+        if self.cache_dir is None:
+            return None
+        return BuildCache(
+            self.cache_dir,
+            pipeline_fingerprint(self.noise, self.segmenter),
+            max_bytes=self.cache_size,
+        )
+
+    @cached_property
+    def cached_documents(self) -> Dict[int, Tuple[List[List[int]], List[List[str]]]]:
+        """Returns the character offsets and the lemmas of each sentence of
+        the files found in the build cache, by document id.
+
+        Example return:
+            {1: ([[0, 37], ...], [["first", "sentence", "first", "document"], ...])}
+
+        Returns:
+            Dict: Dictionary mapping document ids to a tuple of offsets and lemmas, empty without a build cache.
+        """
+        if self.build_cache is None:
+            return {}
+        cached_documents = {}
+        for nr, text in self.raw_data:
+            entry = self.build_cache.get(self.build_cache.key(text))
+            if entry is not None:
+                cached_documents[nr] = entry
+        return cached_documents
+
+    @property
+    def uses_pipeline(self) -> bool:
+        """Returns True if the index is built by the streaming or the multi-
+        process pipeline, rather than property by property."""
+        return self.streaming or self.workers > 1
+
+    @cached_property
+    @profiled("pipeline", items=lambda result: len(result[0]))
+    def pipeline_build(
+        self,
+    ) -> Tuple[Sequence[Tuple], np.ndarray, List[str], csr_matrix]:
+        """Returns the processed sentences, the sentence offsets, the
+        vocabulary and the document-term matrix, computed in one go by the
+        streaming or the multi-process pipeline.
+
+        In streaming mode, the documents are read, split, processed and counted one file at a time. The sentences
+        are written to a temporary spill directory and memory-mapped, the postings are spilled to that directory
+        when they exceed `memory_limit` bytes.
+
+        Otherwise, each of the `workers` processes splits, processes and counts a shard of the documents, the
+        partial vocabularies and matrices are merged into the same alphabetically ordered vocabulary and
+        document-term matrix as a single process build.
+
+        Returns:
+            Tuple: the processed sentences, the sentence offsets, the vocabulary and the document-term matrix.
+        """
+        if self.streaming:
+            *build, self.spill_directory = build_streaming(
+                self.iter_documents(),
+                self.sentence_splitter,
+                noise=self.noise,
+                memory_limit=self.memory_limit,
+                spill_dir=self.spill_dir,
+                profiler=self.profiler,
+            )
+            return tuple(build)
+        return build_parallel(
+            self.raw_data, self.workers, noise=self.noise, segmenter=self.segmenter
+        )
+
+    @cached_property
+    def lemma_counts(self) -> Tuple[List[str], csr_matrix]:
+        """Returns the vocabulary and the document-term matrix, counted in one
+        pass over the processed lemmas.
+
+        The result is identical to fitting and transforming sklearn's CountVectorizer on the processed sentences,
+        but the sentences are not tokenized again.
+
+        Returns:
+            Tuple: the alphabetical vocabulary and the (sentences x vocabulary) document-term matrix.
+        """
+        if self.uses_pipeline:
+            vocabulary, matrix = self.pipeline_build[2:]
         else:
-            return CountVectorizer().fit(data)
+            self.processed_sentences
+            lemmas = self.processed_lemmas
+            with self.profiler.stage("count", items=len(lemmas)):
+                vocabulary, matrix = count_lemmas(lemmas)
+            # the lemmas are no longer needed once the processed sentences and the counts are built:
+            del self.__dict__["processed_lemmas"]
+        # only build the index when there is interesting data left after processing:
+        if not vocabulary:
+            raise NoInterestingSentencesError
+        return vocabulary, matrix
+
+    @cached_property
+    def count_vectorizer(self):
+        """Returns instance of the sklearn's CountVectorizer class, using the
+        vocabulary of the processed sentences.
+
+        Returns:
+            CountVectorizer(): instance of the sklearn's CountVectorizer class, mapping processed sentences onto the
+            columns of the document-term matrix.
+        """
+        return CountVectorizer(vocabulary=self.vocabulary)
 
     @cached_property
     def document_term_matrix(self) -> csr_matrix:
@@ -177,8 +949,7 @@ class InvertedIndex:
         Returns:
             csr_matrix: sparse document-term matrix.
         """
-        data = [x[2] for x in self.processed_sentences]
-        return self.count_vectorizer.transform(data)
+        return self.lemma_counts[1]
 
     @cached_property
     def vocabulary(self) -> List[str]:
@@ -193,10 +964,65 @@ class InvertedIndex:
         Returns:
             List: List containing the lemmatized vocabulary.
         """
-        return self.count_vectorizer.get_feature_names()
+        if self.counts_lazily:
+            return sorted(self.lemma_counter)
+        return self.lemma_counts[0]
+
+    @property
+    def counts_lazily(self) -> bool:
+        """Returns True if the vocabulary and the lemma frequencies are
+        derived from lemma_counter, because the index is lazy and the
+        document-term matrix has not been built (yet)."""
+        return (
+            self.lazy
+            and not self.uses_pipeline
+            and "lemma_counts" not in self.__dict__
+            and "document_term_matrix" not in self.__dict__
+        )
+
+    @cached_property
+    def lemma_counter(self) -> Counter:
+        """Returns a Counter mapping each lemma in the vocabulary to the
+        number of times it occurs in the corpus.
+
+        The lemmas are counted in one pass over the processed lemmas, without building the document-term matrix.
+        This is how a lazy index derives its vocabulary and lemma frequencies.
+
+        Example return:
+            Counter({"brave": 4, "cold": 1, ..., "zone": 2})
+
+        Returns:
+            Counter: Counter of the lemmas in the vocabulary.
+        """
+        lemmas = self.processed_lemmas
+        with self.profiler.stage("count", items=len(lemmas)):
+            counter = Counter(
+                term for sentence_lemmas in lemmas for term in analyze(sentence_lemmas)
+            )
+        if not counter:
+            raise NoInterestingSentencesError
+        return counter
+
+    @cached_property
+    def lemma_frequency_array(self) -> np.ndarray:
+        """Returns an int64 array with the frequency of each lemma in the
+        vocabulary, see lemma_frequencies.
+
+        For a loaded or attached index, this is a read-only array on the persisted data: the frequencies are not
+        copied until lemma_frequencies converts them.
+
+        Returns:
+            np.ndarray: int64 array of length (vocabulary size).
+        """
+        if self.counts_lazily:
+            counter = self.lemma_counter
+            return np.array(
+                [counter[lemma] for lemma in self.vocabulary], dtype=np.int64
+            )
+        return np.asarray(self.document_term_matrix.sum(axis=0), dtype=np.int64)[0]
 
     @cached_property
-    def lemma_frequencies(self) -> List:
+    def lemma_frequencies(self) -> List[int]:
         """Returns a list of integers, representing the frequency that each
         word occurs in the vocabulary.
 
@@ -210,7 +1036,7 @@ class InvertedIndex:
         Returns:
             List: List of integers, representing word frequency.
         """
-        return self.document_term_matrix.sum(axis=0).tolist()[0]
+        return self.lemma_frequency_array.tolist()
 
     @cached_property
     def lemma_occurrences(self) -> List[List[int]]:
@@ -228,7 +1054,88 @@ class InvertedIndex:
         Returns:
             List: List of lists, each containing sentence ids mapping the vocabulary to the sentences.
         """
-        return self.document_term_matrix.transpose().tolil().rows.tolist()
+        indices, indptr = self.postings_matrix.indices, self.postings_matrix.indptr
+        return [
+            indices[start:end].tolist() for start, end in zip(indptr[:-1], indptr[1:])
+        ]
+
+    @cached_property
+    def postings_matrix(self) -> csc_matrix:
+        """Returns the document-term matrix in compressed sparse column format
+        (scipy.sparse.csc_matrix).
+
+        For the lemma in column i of the vocabulary, postings_matrix.indices[indptr[i]:indptr[i + 1]] are the
+        (sorted) ids of the sentences the lemma occurs in and postings_matrix.data[indptr[i]:indptr[i + 1]] the number
+        of times it occurs in each of those sentences.
+
+        Returns:
+            csc_matrix: sparse document-term matrix, in column format.
+        """
+        document_term_matrix = self.document_term_matrix
+        with self.profiler.stage("postings", items=document_term_matrix.nnz):
+            postings_matrix = document_term_matrix.tocsc()
+            postings_matrix.sort_indices()
+            return postings_matrix
+
+    @cached_property
+    def compressed_postings(self) -> CompressedPostings:
+        """Returns the postings of the lemmas in the vocabulary as delta
+        encoded, variable-byte compressed blocks.
+
+        The postings of the lemma in column i of the vocabulary are compressed_postings[i], or can be decoded block
+        by block with compressed_postings.iter_ids(i). Typically takes 1 to 2 bytes per posting.
+
+        Returns:
+            CompressedPostings: the CompressedPostings object instance.
+        """
+        return CompressedPostings.from_csc(self.postings_matrix)
+
+    @cached_property
+    def term_dictionary(self) -> TermDictionary:
+        """Returns the TermDictionary of the vocabulary, mapping each lemma to
+        its column in the postings matrix.
+
+        Returns:
+            TermDictionary: the TermDictionary object instance.
+        """
+        return TermDictionary(self.vocabulary)
+
+    def postings(self, lemma: str) -> np.ndarray:
+        """Returns the sorted ids of the sentences the given lemma occurs in.
+
+        The ids are a read-only view on the postings matrix, no lists are built.
+
+        Example return:
+            postings("brave") = array([0, 5, 29])
+
+        Args:
+            lemma: a lemma in the vocabulary.
+        Returns:
+            np.ndarray: sentence ids, empty if the lemma is not in the vocabulary.
+        """
+        column = self.term_dictionary.get(lemma)
+        if column is None:
+            return self.postings_matrix.indices[:0]
+        indptr = self.postings_matrix.indptr
+        sentence_ids = self.postings_matrix.indices[indptr[column] : indptr[column + 1]]
+        sentence_ids.flags.writeable = False
+        return sentence_ids
+
+    def expand(self, prefix: str) -> List[str]:
+        """Returns the lemmas in the vocabulary starting with the given prefix
+        or matching the given wildcard pattern.
+
+        Example return:
+            expand("hum*") = ["humble", "humor"]
+
+        Args:
+            prefix: a prefix such as `hum` or `hum*`, or a pattern such as `h?m*`.
+        Returns:
+            List: the matching lemmas, in alphabetical order.
+        """
+        if not any(wildcard in prefix for wildcard in WILDCARDS):
+            prefix += "*"
+        return self.term_dictionary.expand(prefix)
 
     @cached_property
     def inverted_index(self) -> List[Tuple[str, int, List[int]]]:
@@ -249,33 +1156,206 @@ class InvertedIndex:
             zip(self.vocabulary, self.lemma_frequencies, self.lemma_occurrences)
         )
 
-    def mapped_inverted_index(self, save: bool = False) -> pd.DataFrame:
+    @cached_property
+    def source_files(self) -> SourceFiles:
+        """Returns the read-only memory maps of the files in the index, which
+        are mapped on first use.
+
+        Returns:
+            SourceFiles: the SourceFiles object instance.
+        """
+        return SourceFiles(self.path, self.document_files)
+
+    def snippet(self, sentence_id: int) -> str:
+        """Returns the given sentence, sliced from the memory-mapped file of
+        its document by its offsets.
+
+        Example return:
+            snippet(0) = "We made this journey."
+
+        Args:
+            sentence_id: id of the sentence, a row of the document-term matrix.
+        Returns:
+            str: the sentence.
+        """
+        document, start, end = self.sentence_offsets[sentence_id].tolist()
+        return self.source_files.text(document, start, end)
+
+    def token_offsets(self, sentence_id: int) -> List[Tuple[str, int, int, int]]:
+        """Returns the interesting lemmas in the given sentence, each with the
+        document id and the start and end offset of its token in the file of
+        that document.
+
+        The tokens are located on demand, by processing the snippet of the sentence again, rather than stored for
+        every posting.
+
+        Example return:
+            token_offsets(0) = [("journey", 1, 13, 20)]
+
+        Args:
+            sentence_id: id of the sentence, a row of the document-term matrix.
+        Returns:
+            List: List of tuples containing the lemma, the document id and the byte offsets of its token.
+        """
+        document, start, _ = self.sentence_offsets[sentence_id].tolist()
+        sentence = self.snippet(sentence_id)
+        lemma_spans = self.sentence_processor(sentence, noise=self.noise).lemma_spans
+        offsets = utf8_offsets(
+            sentence,
+            [(token_start, token_end) for _, token_start, token_end in lemma_spans],
+        ).reshape(-1, 2)
+        offsets = self.source_files.offsets(document, start + offsets)
+        return [
+            (lemma, document, token_start, token_end)
+            for (lemma, _, _), (token_start, token_end) in zip(
+                lemma_spans, offsets.tolist()
+            )
+        ]
+
+    def highlight(
+        self,
+        sentence_id: int,
+        lemmas: Iterable[str],
+        tags: Tuple[str, str] = ("<b>", "</b>"),
+    ) -> str:
+        """Returns the given sentence with the tokens of the given lemmas
+        enclosed in tags.
+
+        Example return:
+            highlight(0, ["journey"]) = "We made this <b>journey</b>."
+
+        Args:
+            sentence_id: id of the sentence, a row of the document-term matrix.
+            lemmas: the lemmas to highlight, e.g. the terms of a query.
+            tags: the strings inserted before and after each highlighted token. Defaults to ("<b>", "</b>").
+        Returns:
+            str: the highlighted sentence.
+        """
+        sentence = self.snippet(sentence_id)
+        lemmas = set(lemmas)
+        parts = []
+        position = 0
+        for lemma, start, end in self.sentence_processor(
+            sentence, noise=self.noise
+        ).lemma_spans:
+            if lemma in lemmas:
+                parts += [
+                    sentence[position:start],
+                    tags[0],
+                    sentence[start:end],
+                    tags[1],
+                ]
+                position = end
+        parts.append(sentence[position:])
+        return "".join(parts)
+
+    @cached_property
+    def query_engine(self) -> QueryEngine:
+        """Returns the QueryEngine evaluating queries over this index.
+
+        Returns:
+            QueryEngine: the QueryEngine object instance.
+        """
+        return QueryEngine(self)
+
+    @profiled("query", items=lambda result: len(result.sentences))
+    def query(self, query: str) -> QueryResult:
+        """Returns the ids of the sentences and documents matching the given
+        boolean, phrase or proximity query.
+
+        Example return:
+            query('(peace OR hope) AND NOT "brave today"') = QueryResult(sentences=array([3]), documents=array([2]))
+
+        Args:
+            query: the query, e.g. `peace AND NOT war` or `"brave cold"~1`. See QueryEngine for the full syntax.
+        Returns:
+            QueryResult: sorted ids of the matching sentences and documents.
+        """
+        return self.query_engine.search(query)
+
+    @cached_property
+    def ranker(self) -> Ranker:
+        """Returns the Ranker scoring free text queries over this index.
+
+        Returns:
+            Ranker: the Ranker object instance.
+        """
+        return Ranker(self.query_engine)
+
+    @profiled("rank")
+    def rank(
+        self, query: str, k: int = 10, scoring: str = "bm25", level: str = "sentence"
+    ) -> List[Tuple[int, float]]:
+        """Returns the k sentences or documents best matching the given free
+        text query, best first.
+
+        Example return:
+            rank("peace despair", k=2, level="document") = [(2, 1.94)]
+
+        Args:
+            query: free text query, normalized in the same way as the sentences.
+            k: number of results. Defaults to 10.
+            scoring: "bm25" or "tfidf". Defaults to "bm25".
+            level: "sentence" or "document". Defaults to "sentence".
+        Returns:
+            List: List of tuples containing the id (sentence id or document id) and score of each result.
+        """
+        return self.ranker.rank(query, k=k, scoring=scoring, level=level)
+
+    @profiled("mapped_inverted_index")
+    def mapped_inverted_index(
+        self, save: bool = False, offsets: bool = False
+    ) -> pd.DataFrame:
         """Returns a dataframe mapping the inverted index back to the original
         sentences.
 
+        The sentences and documents of each lemma are gathered with array indexing on the postings matrix, rather
+        than by looking up the sentences of each lemma in a dataframe.
+
+        A sentence containing many lemmas is repeated in the row of each of them. With offsets=True, the "sentences"
+        column is replaced by an "offsets" column, locating each sentence by its (document id, start, end) offsets
+        (see sentence_offsets) instead of copying it, and the sentences can be sliced from the files with snippet.
+
         Args:
             save: Boolean, if True, the output is saved in a .csv file in the current directory. Defaults to False.
+            offsets: Boolean, if True, the sentences are given by their offsets. Defaults to False.
         Returns:
             pd.DataFrame():
         """
-        df_input = pd.DataFrame(
-            self.processed_sentences,
-            columns=["document", "sentence", "lemmatized_sentence"],
-        )
+        postings = self.postings_matrix
+        # one entry per (lemma, sentence) posting, grouped per lemma by the offsets of the postings matrix:
+        groups = postings.indptr[1:-1]
+        if offsets:
+            posting_offsets = self.sentence_offsets[postings.indices]
+            documents = posting_offsets[:, 0]
+            # map sentence ids to the offsets of the original strings:
+            column = "offsets"
+            values = [
+                [tuple(row) for row in x.tolist()]
+                for x in np.split(posting_offsets, groups)
+            ]
+        else:
+            document_ids, sentences = as_columns(self.sentences)
+            documents = np.asarray(document_ids, dtype=np.int64)[postings.indices]
+            # map sentence ids to the original strings:
+            column = "sentences"
+            values = [
+                x.tolist()
+                for x in np.split(
+                    np.array(list(sentences), dtype=object)[postings.indices], groups
+                )
+            ]
+
         df_output = pd.DataFrame(
-            self.inverted_index, columns=["lemma", "frequency", "sentences"]
+            {
+                "lemma": list(self.vocabulary),
+                "frequency": self.lemma_frequency_array,
+                column: values,
+                # map sentence ids to document ids:
+                "documents": [set(x.tolist()) for x in np.split(documents, groups)],
+            }
         )
 
-        # map sentence ids to document ids:
-        df_output["documents"] = [
-            set(df_input.iloc[x].document) for x in df_output.sentences
-        ]
-
-        # map sentence ids to the original strings:
-        df_output["sentences"] = [
-            df_input.iloc[x].sentence.tolist() for x in df_output.sentences
-        ]
-
         df_output = df_output.sort_values("frequency", ascending=False)
         df_output = df_output.reset_index(drop=True)
 
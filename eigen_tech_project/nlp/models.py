@@ -1,25 +1,86 @@
+import os
+from functools import lru_cache
+from typing import Dict, Optional
+
 import nltk
 
-try:  # pragma: no cover
-    nltk.data.load("tokenizers/punkt/english.pickle")
-except LookupError:  # pragma: no cover
-    nltk.download("punkt")
-
-try:  # pragma: no cover
-    nltk.corpus.stopwords.words("english")
-except LookupError:  # pragma: no cover
-    nltk.download("stopwords")
-
-try:  # pragma: no cover
-    nltk.data.load(
-        "taggers/averaged_perceptron_tagger/averaged_perceptron_tagger.pickle"
-    )
-except LookupError:  # pragma: no cover
-    nltk.download("averaged_perceptron_tagger")
-
-try:  # pragma: no cover
-    from nltk.corpus import wordnet  # noqa
-
-    x = wordnet.NOUN
-except LookupError:  # pragma: no cover
-    nltk.download("wordnet")
+from eigen_tech_project.utils.errors import MissingResourceError
+
+# NLTK resources used throughout the project, mapped to a path by which NLTK can find them:
+RESOURCES = {
+    "punkt": "tokenizers/punkt/english.pickle",
+    "stopwords": "corpora/stopwords",
+    "averaged_perceptron_tagger": "taggers/averaged_perceptron_tagger/averaged_perceptron_tagger.pickle",
+    "wordnet": "corpora/wordnet",
+}
+
+
+@lru_cache(maxsize=None)
+def ensure_resource(name: str):
+    """Make sure the given NLTK resource is available, raising a
+    MissingResourceError if it can not be found.
+
+    Resources are resolved on first use rather than at import time, and only once per process. They are never
+    downloaded implicitly, install them with:
+        python -m nltk.downloader punkt stopwords averaged_perceptron_tagger wordnet
+
+    Args:
+        name: name of the NLTK resource, one of the keys of RESOURCES.
+    """
+    try:
+        nltk.data.find(RESOURCES[name])
+    except LookupError:
+        raise MissingResourceError
+
+
+@lru_cache(maxsize=None)
+def load_sentence_splitter():
+    """Returns NLTK's pre-trained Punkt sentence tokenizer for english.
+
+    The model is only unpickled once per process, all callers share the same (stateless) tokenizer.
+
+    Returns:
+        PunktSentenceTokenizer: the sentence tokenizer.
+    """
+    ensure_resource("punkt")
+    return nltk.data.load(RESOURCES["punkt"])
+
+
+def resource_version(name: str) -> Optional[str]:
+    """Returns an identifier of the installed version of the given NLTK
+    resource: the size and modification time of its file or directory.
+
+    Args:
+        name: name of the NLTK resource, one of the keys of RESOURCES.
+    Returns:
+        str: the identifier, or None if the resource can not be found.
+    """
+    try:
+        pointer = nltk.data.find(RESOURCES[name])
+    except LookupError:
+        return None
+    # resources are found as files or directories, or as entries in a zip file:
+    if hasattr(pointer, "zipfile"):
+        path = pointer.zipfile.filename
+    else:
+        path = getattr(pointer, "path", str(pointer))
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return "{}-{}".format(stat.st_size, int(stat.st_mtime))
+
+
+def model_versions() -> Dict[str, Optional[str]]:
+    """Returns the version of NLTK and of each of the NLTK resources used
+    throughout the project.
+
+    Example return:
+        {"nltk": "3.6.2", "punkt": "13905355-1618406912", ..., "wordnet": "4096-1618406913"}
+
+    Returns:
+        Dict: Dictionary mapping "nltk" and the name of each resource to its version.
+    """
+    versions = {"nltk": nltk.__version__}
+    versions.update({name: resource_version(name) for name in RESOURCES})
+    return versions
@@ -1,15 +1,104 @@
-from typing import List, Tuple
+import json
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from os.path import dirname, join
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 import nltk
-import requests
-from nltk.corpus import wordnet
+from nltk.corpus.reader.wordnet import ADJ, ADV, NOUN, VERB
 from nltk.stem import WordNetLemmatizer
 
-import eigen_tech_project.nlp.models  # noqa
+from eigen_tech_project.nlp.models import ensure_resource
+from eigen_tech_project.utils.profiling import Profiler
+from eigen_tech_project.utils.utils import chunks
 
-common_words_url = "https://gist.githubusercontent.com/jgeysen/05a0e601396125604eaf9b99934ba0d4/raw/0ed5f860ebaef388f82b6e1c42282cec91c661de/1-1000.txt"
-common_words = requests.get(common_words_url).text.split()
-stopwords = nltk.corpus.stopwords.words("english")
+# the 1000 most common words in the english language, bundled with the package:
+COMMON_WORDS_PATH = join(dirname(__file__), "data", "common_words.txt")
+
+
+@lru_cache(maxsize=None)
+def load_common_words(path: str = COMMON_WORDS_PATH) -> List[str]:
+    """Return the words in the given file, one word per line. By default, the
+    bundled list of the 1000 most common words in english is loaded.
+
+    The file is only read once per path, the returned list should not be mutated.
+
+    Args:
+        path: path to a text file containing one word per line.
+
+    Returns:
+        List: List of words.
+    """
+    with open(path, "r") as f:
+        return f.read().split()
+
+
+@lru_cache(maxsize=None)
+def load_stopwords() -> List[str]:
+    """Return the english stopwords provided by NLTK.
+
+    The stopwords are only loaded once, the returned list should not be mutated.
+
+    Returns:
+        List: List of stopwords.
+    """
+    ensure_resource("stopwords")
+    return nltk.corpus.stopwords.words("english")
+
+
+def build_noise(
+    stopwords: Optional[Iterable[str]] = None,
+    common_words: Optional[Iterable[str]] = None,
+    noise_words: Optional[Iterable[str]] = None,
+    allow_words: Optional[Iterable[str]] = None,
+) -> FrozenSet[str]:
+    """Return the set of 'noise' words which are filtered out of processed
+    sentences.
+
+    The noise consists of the stopwords, the common words and any additional (e.g. domain specific) noise words.
+    Words in the allow-list are never considered noise.
+
+    Example returns:
+        * build_noise(stopwords=["the"], common_words=["people"], noise_words=["lorem"], allow_words=["people"])
+          = frozenset({"the", "lorem"})
+
+    Args:
+        stopwords: list of stopwords. Defaults to the english stopwords provided by NLTK.
+        common_words: list of common words. Defaults to the bundled 1000 most common words in english.
+        noise_words: list of additional noise words. Defaults to no additional noise words.
+        allow_words: list of words which are never noise. Defaults to an empty allow-list.
+
+    Returns:
+        FrozenSet: the noise words.
+    """
+    noise = set(load_stopwords() if stopwords is None else stopwords)
+    noise.update(load_common_words() if common_words is None else common_words)
+    noise.update(noise_words or [])
+    noise.difference_update(allow_words or [])
+    return frozenset(noise)
+
+
+@lru_cache(maxsize=None)
+def default_noise() -> FrozenSet[str]:
+    """Return the default set of noise words: the english stopwords provided
+    by NLTK and the bundled 1000 most common words.
+
+    The set is only built once and is shared by all SentenceProcessor instances which use the default noise.
+
+    Returns:
+        FrozenSet: the noise words.
+    """
+    return build_noise()
+
+
+def __getattr__(name):
+    # the module level word lists are loaded lazily, on first access:
+    if name == "common_words":
+        return load_common_words()
+    if name == "stopwords":
+        return load_stopwords()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
 class SentenceProcessor:
@@ -24,21 +113,105 @@ class SentenceProcessor:
 
     Args:
         sentence: one sentence (string)
+        noise: set of words to filter out, as returned by build_noise. Defaults to the stopwords and the 1000 most
+            common words.
     Returns:
         The SentenceProcessor object instance
     """
 
-    def __init__(self, sentence):
+    def __init__(self, sentence, noise: Optional[FrozenSet[str]] = None):
         self.sentence = sentence
         self.tokenizer = nltk.RegexpTokenizer(r"\w+")
         self.lemmatizer = Lemmatizer()
-        self.stopwords = stopwords
-        self.common_words = common_words
+        self.noise = default_noise() if noise is None else noise
 
     def __repr__(self):
         """Returns representation of the DataLoader object."""
         return "{}({!r})".format(self.__class__.__name__, self.sentence)
 
+    @classmethod
+    def process_many(
+        cls,
+        sentences: Iterable[str],
+        chunk_size: int = 1000,
+        noise: Optional[FrozenSet[str]] = None,
+        profiler: Optional[Profiler] = None,
+    ) -> List[str]:
+        """Return the processed version of each sentence in the given
+        collection of sentences.
+
+        The sentences are processed in chunks of `chunk_size` sentences. One tokenizer and one lemmatizer are shared
+        across all chunks and each chunk is POS tagged in a single call, which avoids the per-sentence setup cost of
+        instantiating a SentenceProcessor for every sentence. The output is identical to calling
+        `SentenceProcessor(sentence).processed_sentence` for each sentence.
+
+        Example returns:
+            * process_many(["I am an engineer.", "Hello world."]) = ["engineer", "hello world"]
+
+        Args:
+            sentences: collection of sentences (strings).
+            chunk_size: number of sentences that are tagged and lemmatized together.
+            noise: set of words to filter out, as returned by build_noise. Defaults to the stopwords and the 1000
+                most common words.
+            profiler: Profiler recording the "tokenize", "pos_tag", "lemmatize" and "filter" stages of each chunk.
+                Defaults to None, in which case nothing is recorded.
+
+        Returns:
+            List: List of strings, each representing the interesting lemmas in the corresponding sentence.
+        """
+        return [
+            " ".join(lemmas)
+            for lemmas in cls.lemmatize_many(
+                sentences, chunk_size=chunk_size, noise=noise, profiler=profiler
+            )
+        ]
+
+    @classmethod
+    def lemmatize_many(
+        cls,
+        sentences: Iterable[str],
+        chunk_size: int = 1000,
+        noise: Optional[FrozenSet[str]] = None,
+        profiler: Optional[Profiler] = None,
+    ) -> List[List[str]]:
+        """Return the interesting lemmas of each sentence in the given
+        collection of sentences.
+
+        Works as process_many, but returns the lemmas of each sentence as a list rather than joined in one string,
+        such that they can be counted without splitting the processed sentences again.
+
+        Example returns:
+            * lemmatize_many(["I am an engineer.", "Hello world."]) = [["engineer"], ["hello", "world"]]
+
+        Args:
+            sentences: collection of sentences (strings).
+            chunk_size: number of sentences that are tagged and lemmatized together.
+            noise: set of words to filter out, as returned by build_noise. Defaults to the stopwords and the 1000
+                most common words.
+            profiler: Profiler recording the "tokenize", "pos_tag", "lemmatize" and "filter" stages of each chunk.
+                Defaults to None, in which case nothing is recorded.
+
+        Returns:
+            List: List of lists of strings, the interesting lemmas in each sentence.
+        """
+        if profiler is None:
+            profiler = Profiler()
+        processor = cls("", noise=noise)
+        processed = []
+        for chunk in chunks(sentences, chunk_size):
+            with profiler.stage("tokenize", items=len(chunk)):
+                tokenized_sentences = [
+                    processor.tokenizer.tokenize(sentence.lower()) for sentence in chunk
+                ]
+            with profiler.stage("pos_tag", items=len(chunk)):
+                tagged_sentences = nltk.pos_tag_sents(tokenized_sentences)
+            with profiler.stage("lemmatize", items=len(chunk)):
+                lemmatized = processor.lemmatizer.lemmas_tagged(tagged_sentences)
+            with profiler.stage("filter", items=len(chunk)):
+                for lemmas in lemmatized:
+                    processed.append(processor.remove_stopwords(lemmas))
+        return processed
+
     @property
     def tokenized_sentence(self) -> List[str]:
         """Return a list tokens in the sentence.
@@ -70,8 +243,9 @@ class SentenceProcessor:
         """Return a reduced list of tokens: the interesting lemmas in the
         sentence.
 
-        Stopwords and the 1000 most common words in the english language are combined to a list of 'noise'.
-        Any lemma in the input string is compared to this 'noise' list and thrown out if there's a match.
+        By default, stopwords and the 1000 most common words in the english language are combined to a set of
+        'noise', which is built once and shared by all SentenceProcessor instances. Any lemma in the input string is
+        compared to this 'noise' set and thrown out if there's a match.
 
         Example returns:
             ["engineer"]
@@ -79,8 +253,7 @@ class SentenceProcessor:
         Returns:
             List: List containing interesting lemmas.
         """
-        noise = set(self.stopwords + self.common_words)
-        return [w for w in text if w not in noise and w.isalpha()]
+        return [w for w in text if w not in self.noise and w.isalpha()]
 
     @property
     def lemmatized_sentence_no_stop(self) -> List[str]:
@@ -110,17 +283,172 @@ class SentenceProcessor:
         """
         return " ".join(self.lemmatized_sentence_no_stop)
 
+    @property
+    def lemma_spans(self) -> List[Tuple[str, int, int]]:
+        """Return the interesting lemmas in the sentence, each with the start
+        and end character offset of the token it was derived from.
+
+        The offsets are computed on demand, by tokenizing the sentence again, rather than stored for every lemma in
+        the index.
+
+        Example returns:
+            * SentenceProcessor("I am an Engineer.").lemma_spans = [("engineer", 8, 16)]
+
+        Returns:
+            List: List of tuples containing the lemma and the offsets of its token in the sentence.
+        """
+        spans = list(self.tokenizer.span_tokenize(self.sentence))
+        lemmas = self.lemmatizer.lemmas(
+            [self.sentence[start:end].lower() for start, end in spans]
+        )
+        return [
+            (lemma, start, end)
+            for lemma, (start, end) in zip(lemmas, spans)
+            if self.remove_stopwords([lemma])
+        ]
+
+
+class LemmaCache:
+    """LemmaCache Class. Bounded cache mapping (token, wordnet POS tag)
+    combinations to their lemma, evicting the least recently used entry when
+    full.
+
+    The cache keeps count of its hits, misses and evictions. It can be pre-warmed from, and persisted to, a JSON
+    file mapping each wordnet POS tag to a dictionary of tokens and their lemmas, e.g.:
+        {"n": {"dogs": "dog"}, "v": {"am": "be"}}
+
+    The cache is thread safe: it is shared by all Lemmatizer instances, which are used concurrently by indexes built,
+    updated and queried in executor threads (see InvertedIndex.abuild).
+
+    Args:
+        maxsize: maximum number of (token, POS tag) combinations kept in the cache.
+    Returns:
+        The LemmaCache object instance
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self.lemmas: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        """Returns representation of the LemmaCache object."""
+        return "{}({!r})".format(self.__class__.__name__, self.maxsize)
+
+    def __len__(self):
+        return len(self.lemmas)
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        """Return the cached lemma for the given (token, POS tag) combination,
+        or None if it is not cached.
+
+        Args:
+            key: Tuple containing the token and its wordnet POS tag.
+
+        Returns:
+            str: Lemma, or None.
+        """
+        with self.lock:
+            lemma = self.lemmas.get(key)
+            if lemma is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.lemmas.move_to_end(key)
+            return lemma
+
+    def put(self, key: Tuple[str, str], lemma: str):
+        """Store the lemma for the given (token, POS tag) combination, evicting
+        the least recently used entry if the cache is full.
+
+        Args:
+            key: Tuple containing the token and its wordnet POS tag.
+            lemma: the lemma of the token.
+        """
+        with self.lock:
+            self.lemmas[key] = lemma
+            self.lemmas.move_to_end(key)
+            while len(self.lemmas) > self.maxsize:
+                self.lemmas.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all entries from the cache and reset the counters."""
+        with self.lock:
+            self.lemmas.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    @property
+    def info(self) -> Dict[str, int]:
+        """Return the counters of the cache.
+
+        Example returns:
+            {"hits": 120, "misses": 30, "evictions": 0, "size": 30, "maxsize": 100000}
+
+        Returns:
+            Dict: Dictionary containing the hits, misses, evictions, current size and maximum size of the cache.
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.lemmas),
+                "maxsize": self.maxsize,
+            }
+
+    def load(self, path: str):
+        """Pre-warm the cache with the lemmas persisted in the given JSON
+        file.
+
+        Args:
+            path: path to a JSON file, mapping wordnet POS tags to dictionaries of tokens and their lemmas.
+        """
+        with open(path, "r") as f:
+            persisted = json.load(f)
+        for pos, lemmas in persisted.items():
+            for word, lemma in lemmas.items():
+                self.put((word, pos), lemma)
+
+    def dump(self, path: str):
+        """Persist the cached lemmas to the given JSON file.
+
+        Args:
+            path: path to the JSON file to write.
+        """
+        persisted: Dict[str, Dict[str, str]] = {}
+        with self.lock:
+            items = list(self.lemmas.items())
+        for (word, pos), lemma in items:
+            persisted.setdefault(pos, {})[word] = lemma
+        with open(path, "w") as f:
+            json.dump(persisted, f)
+
 
 class Lemmatizer:
     """Lemmatizer Class. Combine NLTK's WordNetLemmatizer with NLTK's Part Of
     Speech tagging functionality.
 
+    Lemmas are memoized in a LemmaCache. By default, one cache is shared by all Lemmatizer instances (and therefore
+    by all SentenceProcessor instances).
+
+    Args:
+        cache: LemmaCache to use instead of the shared cache.
     Returns:
         The Lemmatizer object instance
     """
 
-    def __init__(self):
+    cache = LemmaCache()
+
+    def __init__(self, cache: Optional[LemmaCache] = None):
+        ensure_resource("wordnet")
+        ensure_resource("averaged_perceptron_tagger")
         self.lemmatizer = WordNetLemmatizer()
+        if cache is not None:
+            self.cache = cache
 
     def __repr__(self):
         """Returns representation of the Lemmatizer object."""
@@ -138,16 +466,16 @@ class Lemmatizer:
             wordnet_tag: string representing the equivalent wordnet tag.
         """
         if treebank_tag.startswith("J"):
-            return wordnet.ADJ
+            return ADJ
         elif treebank_tag.startswith("V"):
-            return wordnet.VERB
+            return VERB
         elif treebank_tag.startswith("N"):
-            return wordnet.NOUN
+            return NOUN
         elif treebank_tag.startswith("R"):
-            return wordnet.ADV
+            return ADV
         else:
             # As default part of speech tag:
-            return wordnet.NOUN
+            return NOUN
 
     def get_lemma(self, word_postag_combo: Tuple[str, str]) -> str:
         """Return a lemma based on the original token and its POS tag.
@@ -166,9 +494,12 @@ class Lemmatizer:
         Returns:
             str: Lemma
         """
-        return self.lemmatizer.lemmatize(
-            word_postag_combo[0], self.get_wordnet_pos(word_postag_combo[1])
-        )
+        key = (word_postag_combo[0], self.get_wordnet_pos(word_postag_combo[1]))
+        lemma = self.cache.get(key)
+        if lemma is None:
+            lemma = self.lemmatizer.lemmatize(*key)
+            self.cache.put(key, lemma)
+        return lemma
 
     def lemmas(self, tokenized_sentence: List[str]) -> List[str]:
         """Return a list lemmas in the given tokenized sentence.
@@ -187,3 +518,39 @@ class Lemmatizer:
         # lemmatization using pos tags
         lemmas = [self.get_lemma(word_tag_combo) for word_tag_combo in pos_tokens]
         return lemmas
+
+    def lemmas_many(self, tokenized_sentences: List[List[str]]) -> List[List[str]]:
+        """Return a list of lemmas for each of the given tokenized sentences.
+
+        All sentences are POS tagged in one call to the tagger, which is considerably faster than tagging them one
+        by one.
+
+        Example returns:
+            * lemmas_many([["I", "am", "an", "engineer"], ["hello"]]) = [["i", "be", "an", "engineer"], ["hello"]]
+
+        Args:
+            tokenized_sentences: List of lists of strings, each representing the tokens of one sentence.
+
+        Returns:
+            List: List of lists of strings, representing the lemmas of each given tokenized sentence.
+        """
+        return self.lemmas_tagged(nltk.pos_tag_sents(tokenized_sentences))
+
+    def lemmas_tagged(
+        self, tagged_sentences: List[List[Tuple[str, str]]]
+    ) -> List[List[str]]:
+        """Return a list of lemmas for each of the given POS tagged sentences.
+
+        Example returns:
+            * lemmas_tagged([[("I", "PRP"), ("am", "VBP")], [("hello", "NN")]]) = [["i", "be"], ["hello"]]
+
+        Args:
+            tagged_sentences: List of lists of (token, POS tag) tuples, as returned by nltk.pos_tag_sents.
+
+        Returns:
+            List: List of lists of strings, representing the lemmas of each given sentence.
+        """
+        return [
+            [self.get_lemma(word_tag_combo) for word_tag_combo in pos_tokens]
+            for pos_tokens in tagged_sentences
+        ]
@@ -0,0 +1,106 @@
+import re
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from cached_property import cached_property
+
+from eigen_tech_project.nlp.models import load_sentence_splitter
+from eigen_tech_project.storage.strings import StringStore
+from eigen_tech_project.utils.errors import InvalidSegmenterError
+
+SEGMENTERS = ("punkt", "rules")
+
+# a sentence consists of words and punctuation separated by whitespace, up to terminal punctuation (and closing
+# quotes or brackets) followed by whitespace, up to an empty line, or up to the end of the text. Runs of word
+# characters are matched at once, which keeps the expression fast:
+WORD = r"[^\s.!?]+"
+INNER_PUNCTUATION = r"[.!?]+(?![\"')\]]*(?:\s|\Z))"
+SPACE = r"(?:[ \t\r\f\v]+|\n(?![ \t\r\f\v]*\n))+"
+END = r"[.!?]+[\"')\]]*"
+SENTENCE_PATTERN = re.compile(
+    r"(?:{word}|{inner})(?:(?:{space})?(?:{word}|{inner}))*(?:{end})?|{end}".format(
+        word=WORD, inner=INNER_PUNCTUATION, space=SPACE, end=END
+    )
+)
+
+
+class SentenceSegmenter:
+    """SentenceSegmenter Class. Splits texts in sentences, returning the
+    character offsets of each sentence rather than copies of the sentences.
+
+    Two modes are available:
+    * "punkt": NLTK's pre-trained Punkt model for english, which is loaded once per process and shared.
+    * "rules": a regular expression splitting on terminal punctuation followed by whitespace and on empty lines.
+      It is several times faster than Punkt, but splits after abbreviations such as "Mr." or "e.g.".
+
+    Args:
+        mode: one of SEGMENTERS. Defaults to "punkt".
+    Returns:
+        The SentenceSegmenter object instance
+    """
+
+    def __init__(self, mode: str = "punkt"):
+        if mode not in SEGMENTERS:
+            raise InvalidSegmenterError
+        self.mode = mode
+
+    def __repr__(self):
+        """Returns representation of the SentenceSegmenter object."""
+        return "{}({!r})".format(self.__class__.__name__, self.mode)
+
+    @cached_property
+    def punkt(self):
+        """Returns the shared Punkt sentence tokenizer, loaded on first use."""
+        return load_sentence_splitter()
+
+    def span_tokenize(self, text: str) -> np.ndarray:
+        """Return the start and end character offset of each sentence in the
+        given text.
+
+        Example returns:
+            * span_tokenize("Hello world. Bye.") = array([[0, 12], [13, 17]])
+
+        Args:
+            text: the text to split.
+
+        Returns:
+            np.ndarray: array of shape (number of sentences, 2) with the offsets of each sentence.
+        """
+        if self.mode == "punkt":
+            spans = list(self.punkt.span_tokenize(text))
+        else:
+            spans = [match.span() for match in SENTENCE_PATTERN.finditer(text)]
+        return np.array(spans, dtype=np.int64).reshape(-1, 2)
+
+    def tokenize(self, text: str) -> List[str]:
+        """Return the sentences in the given text.
+
+        Example returns:
+            * tokenize("Hello world. Bye.") = ["Hello world.", "Bye."]
+
+        Args:
+            text: the text to split.
+
+        Returns:
+            List: List containing the sentences.
+        """
+        return [text[start:end] for start, end in self.span_tokenize(text).tolist()]
+
+    def split_many(self, texts: Sequence[str]) -> Tuple[np.ndarray, StringStore]:
+        """Return the number of sentences in each of the given texts and all
+        of their sentences, in order.
+
+        The sentences are gathered from the texts by their offsets straight into a StringStore.
+
+        Example returns:
+            * split_many(["Hello world. Bye.", "Hi."]) = (array([2, 1]), StringStore(3))
+
+        Args:
+            texts: collection of texts to split.
+
+        Returns:
+            Tuple: array with the number of sentences of each text and a StringStore with the sentences.
+        """
+        spans = [self.span_tokenize(text) for text in texts]
+        counts = np.array([len(text_spans) for text_spans in spans], dtype=np.int64)
+        return counts, StringStore.from_spans(texts, spans)
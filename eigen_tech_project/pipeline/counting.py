@@ -0,0 +1,63 @@
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+def analyze(lemmas: Iterable[str]) -> List[str]:
+    """Return the lemmas which are counted as terms of the document-term
+    matrix.
+
+    The processed lemmas consist of letters only, so the terms are the lemmas CountVectorizer's default analyzer
+    would find in the processed sentence: the lowercased lemmas of at least two characters.
+
+    Example returns:
+        * analyze(["engineer", "x", "World"]) = ["engineer", "world"]
+
+    Args:
+        lemmas: the interesting lemmas of one sentence.
+
+    Returns:
+        List: List containing the terms of the sentence.
+    """
+    return [lemma.lower() for lemma in lemmas if len(lemma) > 1]
+
+
+def count_lemmas(lemmas: Sequence[List[str]]) -> Tuple[List[str], csr_matrix]:
+    """Return the alphabetical vocabulary and the (sentences x vocabulary)
+    count matrix of the given lemmatized sentences, built in one pass.
+
+    The vocabulary and the matrix are identical to fitting and transforming a CountVectorizer on the processed
+    sentences, without tokenizing the sentences twice and without joining and splitting the lemmas.
+
+    Example returns:
+        * count_lemmas([["world", "hello"], ["world", "world"]]) = (["hello", "world"], csr_matrix([[1, 1], [0, 2]]))
+
+    Args:
+        lemmas: List of lists of strings, the interesting lemmas in each sentence.
+
+    Returns:
+        Tuple: the alphabetical vocabulary and the (sentences x vocabulary) count matrix.
+    """
+    columns: dict = {}
+    indices = []
+    lengths = np.zeros(len(lemmas), dtype=np.int64)
+    for row, sentence in enumerate(lemmas):
+        terms = analyze(sentence)
+        # columns are numbered in order of appearance, and mapped onto the alphabetical vocabulary at the end:
+        indices.extend([columns.setdefault(term, len(columns)) for term in terms])
+        lengths[row] = len(terms)
+    vocabulary = sorted(columns)
+    rank = np.empty(len(vocabulary), dtype=np.int32)
+    rank[[columns[term] for term in vocabulary]] = np.arange(len(vocabulary))
+    rows = np.repeat(np.arange(len(lemmas)), lengths)
+    # duplicate (row, column) pairs are summed when converting to CSR:
+    matrix = csr_matrix(
+        (
+            np.ones(len(indices), dtype=np.int64),
+            (rows, rank[np.array(indices, dtype=np.int64)]),
+        ),
+        shape=(len(lemmas), len(vocabulary)),
+    )
+    matrix.sum_duplicates()
+    return vocabulary, matrix
@@ -0,0 +1,143 @@
+from typing import FrozenSet, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from eigen_tech_project.pipeline.parallel import process_shard
+from eigen_tech_project.storage.sentences import SentenceStore, concatenate_offsets
+
+
+def apply_changes(
+    processed_sentences: Sequence[Tuple[int, str, str]],
+    offsets: np.ndarray,
+    vocabulary: Sequence[str],
+    matrix: csr_matrix,
+    removed: Set[int],
+    added: List[Tuple[int, str]],
+    noise: Optional[FrozenSet[str]] = None,
+    segmenter: str = "punkt",
+) -> Tuple[SentenceStore, np.ndarray, List[str], csr_matrix]:
+    """Return the processed sentences, sentence offsets, vocabulary and
+    document-term matrix after removing and adding documents, only processing the added documents.
+
+    The rows are ordered on document id, so the rows of the removed documents are contiguous ranges and each added
+    document has a single position among the kept rows. The result is spliced together from runs of kept rows and
+    the rows of the added documents: the runs are copied with slices, in their current order, no rows are sorted
+    and the current rows are not gathered one by one. Lemmas which no longer occur are dropped from the
+    vocabulary, so the result is identical to building the index from scratch.
+
+    Args:
+        processed_sentences: the current processed sentences (document id, sentence, processed sentence).
+        offsets: the current offsets of the sentences, an array of shape (number of sentences, 3) with the
+            document id and the start and end offset of each sentence (see document_offsets).
+        vocabulary: the current alphabetical vocabulary.
+        matrix: the current (sentences x vocabulary) document-term matrix.
+        removed: ids of the documents to remove (including documents which are replaced).
+        added: List of tuples containing the id and contents of each document to add.
+        noise: set of words to filter out, as returned by build_noise.
+        segmenter: mode of the SentenceSegmenter splitting the documents in sentences. Defaults to "punkt".
+
+    Returns:
+        Tuple: the updated processed sentences, sentence offsets, vocabulary and document-term matrix.
+    """
+    processed_sentences = SentenceStore.from_rows(processed_sentences)
+    offsets = np.asarray(offsets)
+    added_rows, added_offsets, added_vocabulary, added_matrix = process_shard(
+        sorted(added, key=lambda document: document[0]),
+        noise=noise,
+        segmenter=segmenter,
+    )
+    added_sentences = SentenceStore.from_rows(added_rows)
+
+    # the runs of current rows are cut where a removed document starts or ends and where an added document goes:
+    documents = processed_sentences.documents
+    removed_ids = np.array(sorted(removed), dtype=np.int64)
+    positions = np.searchsorted(documents, added_sentences.documents)
+    cuts = np.unique(
+        np.concatenate(
+            [
+                [0, len(documents)],
+                np.searchsorted(documents, removed_ids, side="left"),
+                np.searchsorted(documents, removed_ids, side="right"),
+                positions,
+            ]
+        )
+    ).tolist()
+    # the added rows with the same position go in front of the run of current rows starting at that position:
+    firsts = np.searchsorted(positions, cuts, side="left").tolist()
+    lasts = np.searchsorted(positions, cuts, side="right").tolist()
+    # pieces of (source, start, stop), with source 0 the current rows and source 1 the added rows:
+    pieces = []
+    for cut, next_cut, first, last in zip(cuts, cuts[1:] + [None], firsts, lasts):
+        if last > first:
+            pieces.append((1, first, last))
+        if next_cut is not None and int(documents[cut]) not in removed:
+            pieces.append((0, cut, next_cut))
+
+    stores = (processed_sentences, added_sentences)
+    rows = SentenceStore.concatenate(
+        [stores[source].view(start, stop) for source, start, stop in pieces]
+    )
+    offsets = concatenate_offsets(
+        [(offsets, added_offsets)[source][start:stop] for source, start, stop in pieces]
+    )
+    vocabulary, matrix = splice_count_matrices(
+        [(list(vocabulary), matrix), (added_vocabulary, added_matrix)], pieces
+    )
+    return rows, offsets, vocabulary, matrix
+
+
+def splice_count_matrices(
+    parts: List[Tuple[List[str], csr_matrix]], pieces: List[Tuple[int, int, int]]
+) -> Tuple[List[str], csr_matrix]:
+    """Return the alphabetical vocabulary and the count matrix stacking the
+    given row ranges of the given count matrices.
+
+    The vocabulary only contains the lemmas which occur in the stacked rows. The columns of each range are remapped
+    onto it and the data, indices and row lengths of the ranges are copied with slices.
+
+    Args:
+        parts: List of tuples, each containing an alphabetical vocabulary and the count matrix using it as columns.
+        pieces: List of tuples containing the index of a part and the start and stop row of a range in its matrix.
+
+    Returns:
+        Tuple: the vocabulary and the count matrix.
+    """
+    used = [np.zeros(len(part_vocabulary), dtype=bool) for part_vocabulary, _ in parts]
+    for part, start, stop in pieces:
+        indptr = parts[part][1].indptr
+        used[part][parts[part][1].indices[indptr[start] : indptr[stop]]] = True
+    lemmas: Set[str] = set()
+    for (part_vocabulary, _), part_used in zip(parts, used):
+        lemmas.update(part_vocabulary[column] for column in np.flatnonzero(part_used))
+    vocabulary = sorted(lemmas)
+    columns = {lemma: column for column, lemma in enumerate(vocabulary)}
+    # both vocabularies are sorted, so the remapped column indices remain sorted:
+    mappings = [
+        np.array(
+            [columns.get(lemma, -1) for lemma in part_vocabulary],
+            dtype=matrix.indices.dtype,
+        )
+        for part_vocabulary, matrix in parts
+    ]
+
+    data, indices, lengths = [], [], []
+    for part, start, stop in pieces:
+        matrix = parts[part][1]
+        first, last = matrix.indptr[start], matrix.indptr[stop]
+        data.append(matrix.data[first:last])
+        indices.append(mappings[part][matrix.indices[first:last]])
+        lengths.append(np.diff(matrix.indptr[start : stop + 1]))
+    row_lengths = np.concatenate([np.zeros(0, dtype=np.int64)] + lengths)
+    indptr = np.zeros(len(row_lengths) + 1, dtype=parts[0][1].indptr.dtype)
+    np.cumsum(row_lengths, out=indptr[1:])
+    matrix = csr_matrix(
+        (
+            np.concatenate([parts[0][1].data[:0]] + data),
+            np.concatenate([parts[0][1].indices[:0]] + indices),
+            indptr,
+        ),
+        shape=(len(row_lengths), len(vocabulary)),
+    )
+    matrix.sort_indices()
+    return vocabulary, matrix
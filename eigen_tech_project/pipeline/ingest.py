@@ -0,0 +1,87 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from os.path import join
+from typing import Deque, Iterable, Iterator, List, Tuple
+
+# number of threads reading files concurrently; reading is dominated by I/O latency rather than CPU:
+DEFAULT_IO_WORKERS = 16
+
+
+def scan_directory(path, io_workers: int = DEFAULT_IO_WORKERS) -> List[Tuple[str, int]]:
+    """Return the name and size of the regular files in the given directory,
+    in directory order.
+
+    The directory is listed once with os.scandir, which tells files from directories without a system call per
+    entry on most platforms. Only .txt files are stat-ed for their size, concurrently, and DirEntry caches the
+    result.
+
+    Example returns:
+        scan_directory("data") = [("file1.txt", 1204), ("notes.md", -1), ("file2.txt", 0)]
+
+    Args:
+        path: path to the directory.
+        io_workers: maximum number of concurrent stat calls.
+
+    Returns:
+        List: List of tuples containing the name and size of each file, the size is -1 for files which are not
+        .txt files.
+    """
+    with os.scandir(path) as entries:
+        files = [entry for entry in entries if entry.is_file()]
+
+    def size(entry: os.DirEntry) -> int:
+        return entry.stat().st_size if entry.name.endswith(".txt") else -1
+
+    with ThreadPoolExecutor(max_workers=max(io_workers, 1)) as executor:
+        return list(zip((entry.name for entry in files), executor.map(size, files)))
+
+
+def read_file(path: str) -> str:
+    """Return the contents of the file at the given path, closing the file
+    before returning.
+
+    The file is decoded as UTF-8 and line endings are translated to "\n" (see SourceFiles for mapping offsets in the
+    contents back onto the file).
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def iter_files(
+    path, file_names: Iterable[str], io_workers: int = DEFAULT_IO_WORKERS
+) -> Iterator[str]:
+    """Yield the contents of the given files, in order, reading up to
+    io_workers files concurrently.
+
+    At most 2 * io_workers files are read ahead of the consumer, so memory use stays bounded when the contents
+    are processed one file at a time.
+
+    Args:
+        path: path to the directory containing the files.
+        file_names: names of the files to read.
+        io_workers: maximum number of files read concurrently. With 1, files are read in the current thread.
+
+    Yields:
+        str: contents of the next file.
+    """
+    if io_workers <= 1:
+        for file_name in file_names:
+            yield read_file(join(path, file_name))
+        return
+    with ThreadPoolExecutor(max_workers=io_workers) as executor:
+        pending: Deque[Future] = deque()
+        for file_name in file_names:
+            pending.append(executor.submit(read_file, join(path, file_name)))
+            if len(pending) >= 2 * io_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def read_files(
+    path, file_names: Iterable[str], io_workers: int = DEFAULT_IO_WORKERS
+) -> List[str]:
+    """Return the contents of the given files, in order, reading up to
+    io_workers files concurrently. See iter_files."""
+    return list(iter_files(path, file_names, io_workers=io_workers))
@@ -0,0 +1,145 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import FrozenSet, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+
+from eigen_tech_project.nlp.processing import SentenceProcessor
+from eigen_tech_project.nlp.segmentation import SentenceSegmenter
+from eigen_tech_project.pipeline.counting import count_lemmas
+from eigen_tech_project.storage.sentences import concatenate_offsets, document_offsets
+
+Shard = List[Tuple[int, str]]
+ShardResult = Tuple[List[Tuple[int, str, str]], np.ndarray, List[str], csr_matrix]
+
+
+def shard_documents(documents: Shard, n_shards: int) -> List[Shard]:
+    """Split the documents in at most `n_shards` contiguous shards of roughly
+    equal text size.
+
+    The order of the documents is preserved: concatenating the shards returns the original list of documents.
+
+    Example return:
+        shard_documents([(1, "a"), (2, "b"), (3, "c")], 2) = [[(1, "a"), (2, "b")], [(3, "c")]]
+
+    Args:
+        documents: List of tuples containing the id and contents of each document.
+        n_shards: maximum number of shards.
+
+    Returns:
+        List: List of shards, each shard being a list of documents.
+    """
+    total_size = sum(len(document[1]) for document in documents) or 1
+    shard_size = total_size / max(n_shards, 1)
+    shards: List[Shard] = [[]]
+    size = 0
+    for document in documents:
+        if shards[-1] and size >= shard_size * len(shards):
+            shards.append([])
+        shards[-1].append(document)
+        size += len(document[1])
+    return shards
+
+
+def process_shard(
+    shard: Shard, noise: Optional[FrozenSet[str]] = None, segmenter: str = "punkt"
+) -> ShardResult:
+    """Split, process and count the sentences of one shard of documents.
+
+    Args:
+        shard: List of tuples containing the id and contents of each document in the shard.
+        noise: set of words to filter out, as returned by build_noise. Defaults to the stopwords and the 1000 most
+            common words.
+        segmenter: mode of the SentenceSegmenter splitting the documents in sentences. Defaults to "punkt".
+
+    Returns:
+        Tuple: the processed sentences of the shard (document id, sentence, processed sentence), the offsets of the
+        sentences (see document_offsets), the alphabetical vocabulary of the shard and the (sentences x
+        vocabulary) count matrix of the shard.
+    """
+    sentence_splitter = SentenceSegmenter(segmenter)
+    sentences = []
+    offsets = []
+    for document_id, text in shard:
+        spans = sentence_splitter.span_tokenize(text)
+        sentences += [(document_id, text[start:end]) for start, end in spans.tolist()]
+        offsets.append(document_offsets(document_id, text, spans))
+    lemmas = SentenceProcessor.lemmatize_many(
+        (sentence[1] for sentence in sentences), noise=noise
+    )
+    processed_sentences = [
+        sentence + (" ".join(sentence_lemmas),)
+        for sentence, sentence_lemmas in zip(sentences, lemmas)
+    ]
+    vocabulary, matrix = count_lemmas(lemmas)
+    return processed_sentences, concatenate_offsets(offsets), vocabulary, matrix
+
+
+def merge_count_matrices(
+    parts: List[Tuple[List[str], csr_matrix]],
+) -> Tuple[List[str], csr_matrix]:
+    """Merge partial vocabularies and count matrices into one alphabetical
+    vocabulary and one count matrix.
+
+    The rows of the partial matrices are stacked in the given order, the columns are remapped onto the merged,
+    alphabetically ordered vocabulary.
+
+    Args:
+        parts: List of tuples, each containing an alphabetical vocabulary and the count matrix using it as columns.
+
+    Returns:
+        Tuple: the merged vocabulary and the merged count matrix.
+    """
+    vocabulary = sorted(set().union(*(part[0] for part in parts)))
+    columns = {lemma: column for column, lemma in enumerate(vocabulary)}
+    blocks = []
+    for part_vocabulary, matrix in parts:
+        # both vocabularies are sorted, so the remapped column indices remain sorted:
+        mapping = np.array(
+            [columns[lemma] for lemma in part_vocabulary], dtype=matrix.indices.dtype
+        )
+        blocks.append(
+            csr_matrix(
+                (matrix.data, mapping[matrix.indices], matrix.indptr),
+                shape=(matrix.shape[0], len(vocabulary)),
+            )
+        )
+    return vocabulary, vstack(blocks, format="csr")
+
+
+def build_parallel(
+    documents: Shard,
+    workers: int,
+    noise: Optional[FrozenSet[str]] = None,
+    segmenter: str = "punkt",
+) -> ShardResult:
+    """Split, process and count the given documents across a pool of worker
+    processes.
+
+    The documents are divided in contiguous shards which are processed independently. The partial results are
+    merged in document order, so the output is identical to processing all documents in one process.
+
+    Args:
+        documents: List of tuples containing the id and contents of each document, sorted on document id.
+        workers: number of worker processes.
+        noise: set of words to filter out, as returned by build_noise. Defaults to the stopwords and the 1000 most
+            common words.
+        segmenter: mode of the SentenceSegmenter splitting the documents in sentences. Defaults to "punkt".
+
+    Returns:
+        Tuple: the processed sentences, the offsets of the sentences, the alphabetical vocabulary and the (sentences
+        x vocabulary) count matrix.
+    """
+    # a few shards per worker keeps the workers busy when documents differ in size:
+    shards = shard_documents(documents, workers * 4)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(
+                partial(process_shard, noise=noise, segmenter=segmenter), shards
+            )
+        )
+    processed_sentences = [sentence for result in results for sentence in result[0]]
+    offsets = concatenate_offsets([result[1] for result in results])
+    vocabulary, matrix = merge_count_matrices([result[2:] for result in results])
+    return processed_sentences, offsets, vocabulary, matrix
@@ -0,0 +1,238 @@
+import os
+from array import array
+from collections import Counter
+from os.path import join
+from tempfile import TemporaryDirectory
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from eigen_tech_project.nlp.processing import SentenceProcessor
+from eigen_tech_project.pipeline.counting import analyze
+from eigen_tech_project.storage.sentences import (
+    SentenceStore,
+    compact_ids,
+    document_offsets,
+)
+from eigen_tech_project.storage.strings import StringStore
+from eigen_tech_project.utils.profiling import Profiler
+
+# default ceiling for the postings kept in memory during a streaming build:
+DEFAULT_MEMORY_LIMIT = 256 * 2**20
+
+
+class StringSpiller:
+    """StringSpiller Class. Appends strings to a UTF-8 encoded file on disk,
+    keeping only their offsets in memory.
+
+    Args:
+        path: path to the file to write.
+    Returns:
+        The StringSpiller object instance
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "wb")
+        self.offsets = array("q", [0])
+
+    def __repr__(self):
+        """Returns representation of the StringSpiller object."""
+        return "{}({!r})".format(self.__class__.__name__, self.path)
+
+    def append(self, string: str):
+        """Append one string to the file.
+
+        Args:
+            string: the string to append.
+        """
+        encoded = string.encode("utf-8")
+        self.file.write(encoded)
+        self.offsets.append(self.offsets[-1] + len(encoded))
+
+    def finish(self) -> StringStore:
+        """Close the file and return the written strings as a StringStore,
+        memory-mapping the file.
+
+        Returns:
+            StringStore: the written strings.
+        """
+        self.file.close()
+        buffer: np.ndarray
+        if self.offsets[-1]:
+            buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+        else:
+            buffer = np.zeros(0, dtype=np.uint8)
+        return StringStore(buffer, np.array(self.offsets, dtype=np.int64))
+
+
+class CountMatrixBuilder:
+    """CountMatrixBuilder Class. Builds a (sentences x vocabulary) count
+    matrix one sentence at a time.
+
+    Only the vocabulary dictionary and the postings (column indices and counts) are kept in memory. Once the
+    postings in memory exceed `memory_limit` bytes, they are spilled to a file in `spill_dir`. When postings were
+    spilled, the matrix is merged into arrays memory-mapped from files in `spill_dir`, so the postings are never
+    held in memory as a whole.
+
+    Args:
+        spill_dir: path to the directory to spill postings to.
+        memory_limit: maximum number of bytes of postings kept in memory.
+    Returns:
+        The CountMatrixBuilder object instance
+    """
+
+    def __init__(self, spill_dir: str, memory_limit: int = DEFAULT_MEMORY_LIMIT):
+        self.spill_dir = spill_dir
+        self.memory_limit = memory_limit
+        self.columns: dict = {}
+        self.indptr = array("q", [0])
+        self.indices = array("q")
+        self.data = array("q")
+        self.spills: List[str] = []
+
+    def __repr__(self):
+        """Returns representation of the CountMatrixBuilder object."""
+        return "{}({!r})".format(self.__class__.__name__, self.spill_dir)
+
+    def add(self, lemmas: Iterable[str]):
+        """Add one row to the matrix, counting the given lemmas.
+
+        Args:
+            lemmas: the lemmas of one sentence.
+        """
+        counts = Counter(lemmas)
+        for lemma, count in counts.items():
+            self.indices.append(self.columns.setdefault(lemma, len(self.columns)))
+            self.data.append(count)
+        self.indptr.append(self.indptr[-1] + len(counts))
+        if (len(self.indices) + len(self.data)) * 8 > self.memory_limit:
+            self.spill()
+
+    def spill(self):
+        """Write the postings in memory to a file in the spill directory."""
+        path = join(self.spill_dir, "postings_{}.npy".format(len(self.spills)))
+        np.save(path, np.array([self.indices, self.data], dtype=np.int64))
+        self.spills.append(path)
+        self.indices = array("q")
+        self.data = array("q")
+
+    def allocate(self, name: str, size: int, dtype) -> np.ndarray:
+        """Return an uninitialised array of the given size, memory-mapped from
+        a file in the spill directory if postings were spilled."""
+        if not self.spills or not size:
+            return np.empty(size, dtype=dtype)
+        return np.memmap(
+            join(self.spill_dir, "{}.bin".format(name)),
+            dtype=dtype,
+            mode="w+",
+            shape=(size,),
+        )
+
+    def finish(self) -> Tuple[List[str], csr_matrix]:
+        """Return the alphabetical vocabulary and the count matrix.
+
+        The spilled postings are merged one spill at a time into the arrays of the matrix, which are allocated up
+        front (see allocate), so memory use stays bounded by the memory limit.
+
+        Returns:
+            Tuple: the alphabetical vocabulary and the (sentences x vocabulary) count matrix.
+        """
+        runs = [np.load(path, mmap_mode="r") for path in self.spills]
+        runs.append(
+            (
+                np.frombuffer(self.indices, dtype=np.int64),
+                np.frombuffer(self.data, dtype=np.int64),
+            )
+        )
+        size = sum(len(run[0]) for run in runs)
+        # map the columns, numbered in order of appearance, onto the alphabetical vocabulary:
+        vocabulary = sorted(self.columns)
+        index_dtype = np.int32 if max(size, len(vocabulary)) < 2**31 else np.int64
+        rank = np.empty(len(vocabulary), dtype=index_dtype)
+        rank[[self.columns[lemma] for lemma in vocabulary]] = np.arange(len(vocabulary))
+        indices = self.allocate("indices", size, index_dtype)
+        data = self.allocate("data", size, np.int64)
+        position = 0
+        for run_indices, run_data in runs:
+            end = position + len(run_indices)
+            np.take(rank, run_indices, out=indices[position:end])
+            data[position:end] = run_data
+            position = end
+        matrix = csr_matrix(
+            (data, indices, np.array(self.indptr, dtype=index_dtype)),
+            shape=(len(self.indptr) - 1, len(vocabulary)),
+            copy=False,
+        )
+        matrix.sort_indices()
+        return vocabulary, matrix
+
+
+def build_streaming(
+    documents: Iterable[Tuple[int, str]],
+    sentence_splitter,
+    noise: Optional[FrozenSet[str]] = None,
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    spill_dir: Optional[str] = None,
+    profiler: Optional[Profiler] = None,
+) -> Tuple[SentenceStore, np.ndarray, List[str], csr_matrix, TemporaryDirectory]:
+    """Split, process and count a stream of documents, one document at a
+    time.
+
+    The original and processed sentences are written to disk as they are produced and memory-mapped when the
+    stream is exhausted, the postings are spilled to disk when they exceed `memory_limit` bytes. Memory use is
+    therefore bounded by the largest document, the vocabulary and the memory limit.
+
+    Args:
+        documents: iterable of tuples containing the id and contents of each document, in order of document id.
+        sentence_splitter: sentence tokenizer, used to split the documents in sentences.
+        noise: set of words to filter out, as returned by build_noise.
+        memory_limit: maximum number of bytes of postings kept in memory.
+        spill_dir: path to the directory in which a temporary directory for spilled data is created. Defaults to
+            the system's temporary directory.
+        profiler: Profiler recording the "split" and "count" stages and the stages of processing the sentences.
+            Defaults to None, in which case nothing is recorded.
+
+    Returns:
+        Tuple: the processed sentences, the offsets of the sentences (see document_offsets), the alphabetical
+        vocabulary, the (sentences x vocabulary) count matrix and the temporary directory holding the spilled data, which is removed once it is garbage collected.
+    """
+    if profiler is None:
+        profiler = Profiler()
+    directory = TemporaryDirectory(dir=spill_dir)
+    document_ids = array("q")
+    offsets = array("q")
+    sentences = StringSpiller(join(directory.name, "sentences.bin"))
+    processed = StringSpiller(join(directory.name, "processed.bin"))
+    builder = CountMatrixBuilder(directory.name, memory_limit=memory_limit)
+    for document_id, text in documents:
+        with profiler.stage("split") as span:
+            spans = sentence_splitter.span_tokenize(text)
+            document_sentences = [text[start:end] for start, end in spans.tolist()]
+            offsets.extend(document_offsets(document_id, text, spans).ravel().tolist())
+            span.items = len(document_sentences)
+        lemmas = SentenceProcessor.lemmatize_many(
+            document_sentences, noise=noise, profiler=profiler
+        )
+        with profiler.stage("count", items=len(document_sentences)):
+            for sentence, sentence_lemmas in zip(document_sentences, lemmas):
+                document_ids.append(document_id)
+                sentences.append(sentence)
+                processed.append(" ".join(sentence_lemmas))
+                builder.add(analyze(sentence_lemmas))
+    vocabulary, matrix = builder.finish()
+    for path in builder.spills:
+        os.remove(path)
+    rows = SentenceStore(
+        compact_ids(document_ids),
+        sentences.finish(),
+        processed.finish(),
+    )
+    return (
+        rows,
+        np.array(offsets, dtype=np.int64).reshape(-1, 3),
+        vocabulary,
+        matrix,
+        directory,
+    )
@@ -0,0 +1,139 @@
+from bisect import bisect_left
+from fnmatch import fnmatchcase
+from typing import Iterator, List, Mapping, Sequence
+from zlib import crc32
+
+import numpy as np
+from cached_property import cached_property
+
+# characters with a special meaning in wildcard patterns:
+WILDCARDS = "*?["
+
+
+def term_hash(term: str) -> int:
+    """Return the CRC-32 of the UTF-8 encoding of the given term.
+
+    Unlike hash(), which is salted per process, the result is the same in every process, so a hash table built in
+    one process can be used in another (see InvertedIndex.share).
+    """
+    return crc32(term.encode("utf-8"))
+
+
+class TermDictionary(Mapping):
+    """TermDictionary Class. Map the terms of a sorted vocabulary to their
+    column, and expand prefixes and wildcard patterns to terms.
+
+    Exact lookups go through an open addressing hash table: a numpy array holding, for each slot, the column of the
+    term hashed to that slot (or -1), with linear probing on collisions. The table has at least two slots per term,
+    so it costs 8 to 16 bytes per term on top of the terms themselves, instead of the ~100 bytes per entry of a
+    dictionary. Terms are hashed with term_hash, so the table is valid in any process. Prefix and wildcard lookups use a binary search on the sorted terms, which also works on a
+    (memory-mapped) StringStore.
+
+    Args:
+        terms: sorted sequence of unique terms, e.g. the vocabulary of an InvertedIndex.
+    Returns:
+        The TermDictionary object instance
+    """
+
+    def __init__(self, terms: Sequence[str]):
+        self.terms = terms
+
+    def __repr__(self):
+        """Returns representation of the TermDictionary object."""
+        return "{}({!r})".format(self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    @cached_property
+    def table(self) -> np.ndarray:
+        """Returns the hash table, built on first use.
+
+        All terms are inserted at once: in each round, the first pending term hashed to each free slot takes that
+        slot, and the remaining terms move on to the next slot.
+
+        Returns:
+            np.ndarray: column of the term in each slot, or -1 for empty slots.
+        """
+        size = 1 << max(3, (2 * len(self.terms) - 1).bit_length())
+        mask = size - 1
+        dtype = np.int32 if len(self.terms) < 2**31 else np.int64
+        table = np.full(size, -1, dtype=dtype)
+        slots = (
+            np.array([term_hash(term) for term in self.terms], dtype=np.int64) & mask
+        )
+        pending = np.arange(len(self.terms), dtype=dtype)
+        while len(pending):
+            _, first = np.unique(slots[pending], return_index=True)
+            first = first[table[slots[pending[first]]] == -1]
+            table[slots[pending[first]]] = pending[first]
+            placed = np.zeros(len(pending), dtype=bool)
+            placed[first] = True
+            pending = pending[~placed]
+            slots[pending] = (slots[pending] + 1) & mask
+        return table
+
+    def __getitem__(self, term: str) -> int:
+        """Returns the column of the given term, raises a KeyError if the term
+        is not in the dictionary."""
+        if not isinstance(term, str):
+            raise KeyError(term)
+        table = self.table
+        mask = len(table) - 1
+        slot = term_hash(term) & mask
+        while table[slot] != -1:
+            column = int(table[slot])
+            if self.terms[column] == term:
+                return column
+            slot = (slot + 1) & mask
+        raise KeyError(term)
+
+    def prefix(self, prefix: str) -> range:
+        """Return the columns of the terms starting with the given prefix.
+
+        Example returns:
+            prefix("hum") = range(12, 14)
+
+        Args:
+            prefix: the prefix, may be empty.
+
+        Returns:
+            range: range of columns.
+        """
+        start = bisect_left(self.terms, prefix)
+        if not prefix:
+            return range(start, len(self.terms))
+        # the smallest string greater than all strings starting with the prefix:
+        successor = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return range(start, bisect_left(self.terms, successor, lo=start))
+
+    def expand(self, pattern: str) -> List[str]:
+        """Return the terms matching the given prefix or wildcard pattern.
+
+        Patterns use the syntax of the fnmatch module: `*` matches any number of characters, `?` a single character
+        and `[abc]` one of the given characters. Only the terms starting with the literal prefix of the pattern are
+        matched against the pattern.
+
+        Example returns:
+            expand("engin*") = ["engine", "engineer", "engineering"]
+
+        Args:
+            pattern: a term, or a pattern containing wildcards.
+
+        Returns:
+            List: the matching terms, sorted.
+        """
+        literal = len(pattern)
+        for wildcard in WILDCARDS:
+            if wildcard in pattern:
+                literal = min(literal, pattern.index(wildcard))
+        if literal == len(pattern):
+            return [pattern] if pattern in self else []
+        columns = self.prefix(pattern[:literal])
+        terms = self.terms[columns.start : columns.stop]
+        if pattern == pattern[:literal] + "*":
+            return list(terms)
+        return [term for term in terms if fnmatchcase(term, pattern)]
@@ -0,0 +1,380 @@
+import re
+from array import array
+from collections import Counter
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from cached_property import cached_property
+from sklearn.feature_extraction.text import CountVectorizer
+
+from eigen_tech_project.pipeline.counting import analyze
+from eigen_tech_project.search.dictionary import WILDCARDS, TermDictionary
+from eigen_tech_project.storage.strings import as_columns
+from eigen_tech_project.utils.errors import InvalidQueryError
+
+# parentheses, (proximity) phrases such as "brave today"~2 and words:
+QUERY_TOKEN = re.compile(r'\(|\)|"[^"]*"(?:~\d+)?|[^\s()"]+')
+OPERATORS = {"AND", "OR", "NOT"}
+
+
+class QueryResult(NamedTuple):
+    """Sorted ids of the sentences and of the documents matching a query."""
+
+    sentences: np.ndarray
+    documents: np.ndarray
+
+
+def intersect(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Return the intersection of two sorted arrays of unique ids.
+
+    When one array is much shorter than the other, each id of the shorter array is looked up in the longer array
+    with a binary search, skipping over the ids in between instead of scanning them.
+
+    Example returns:
+        intersect(np.array([1, 5, 9]), np.array([2, 5, 7, 9])) = array([5, 9])
+
+    Args:
+        a: sorted array of unique ids.
+        b: sorted array of unique ids.
+
+    Returns:
+        np.ndarray: sorted array of the ids in both arrays.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    if len(b) > 8 * len(a):
+        positions = np.minimum(np.searchsorted(b, a), len(b) - 1)
+        return a[b[positions] == a]
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+def within_window(
+    positions: List[np.ndarray],
+    window: int,
+    ordered: bool,
+    counts: Optional[Sequence[int]] = None,
+) -> bool:
+    """Return True if one position of each term can be picked such that all
+    picked positions lie within `window` consecutive positions.
+
+    The picked positions are distinct: a term which occurs more than once in a query should occur as many times
+    within the window.
+
+    Args:
+        positions: for each term, the sorted positions of that term in one sentence.
+        window: size of the window.
+        ordered: if True, the picked positions should also be in the same order as the terms.
+        counts: if not ordered, the number of positions to pick for each term. Defaults to one position per term.
+
+    Returns:
+        bool: whether the terms occur within the window.
+    """
+    if ordered:
+        # greedily pick the first position of each term after the position of the previous term:
+        for start in positions[0]:
+            previous = start
+            for term_positions in positions[1:]:
+                i = np.searchsorted(term_positions, previous, side="right")
+                if i == len(term_positions):
+                    return False
+                previous = term_positions[i]
+            if previous - start < window:
+                return True
+        return False
+    if counts is None:
+        counts = [1] * len(positions)
+    for start in np.unique(np.concatenate(positions)):
+        if all(
+            np.count_nonzero((p >= start) & (p < start + window)) >= count
+            for p, count in zip(positions, counts)
+        ):
+            return True
+    return False
+
+
+class QueryEngine:
+    """QueryEngine Class. Evaluate boolean, phrase and proximity queries over
+    an InvertedIndex.
+
+    Query syntax:
+    * words: `peace` matches the sentences containing the lemma of the word.
+    * AND, OR and NOT (upper case) and parentheses: `(peace OR hope) AND NOT war`. Adjacent operands are combined
+      with AND, NOT binds strongest and OR weakest.
+    * phrases: `"brave cold today"` matches sentences in which the lemmas occur in this order, next to each other.
+    * proximity: `"brave today"~2` matches sentences in which the lemmas occur within 2 + 2 consecutive positions,
+      in any order.
+    * wildcards: `engin*` matches the sentences containing any lemma starting with `engin`. Patterns are matched
+      against the lemmas as they are (lower cased, but not lemmatized), see TermDictionary.expand.
+
+    Words and phrases are normalized with the same SentenceProcessor used to build the index. Positions are counted
+    over the interesting lemmas of a sentence, so stopwords and common words do not break up a phrase. Words and
+    phrases which consist of noise only are ignored.
+
+    Args:
+        index: the InvertedIndex to query.
+    Returns:
+        The QueryEngine object instance
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.analyzer = CountVectorizer().build_analyzer()
+
+    def __repr__(self):
+        """Returns representation of the QueryEngine object."""
+        return "{}({!r})".format(self.__class__.__name__, self.index)
+
+    @property
+    def columns(self) -> TermDictionary:
+        """Returns the term dictionary of the index, mapping each lemma in the
+        vocabulary to its column in the postings matrix."""
+        return self.index.term_dictionary
+
+    @cached_property
+    def sentence_documents(self) -> np.ndarray:
+        """Returns an array with the document id of each sentence."""
+        return np.asarray(as_columns(self.index.sentences)[0], dtype=np.int64)
+
+    @cached_property
+    def positions(self) -> np.ndarray:
+        """Returns the positions of the lemmas in the processed sentences,
+        ordered on lemma, sentence and position.
+
+        The positions of the lemma in column c in sentence postings_matrix.indices[p], with p in
+        range(indptr[c], indptr[c + 1]), are positions[position_offsets[p]:position_offsets[p + 1]].
+
+        The processed sentences are read once, mapping each lemma onto its column: the positions are gathered as
+        integer arrays and grouped per column with one stable sort, which keeps them ordered on sentence and
+        position within each column.
+
+        Returns:
+            np.ndarray: positions of the lemmas.
+        """
+        columns = {lemma: column for column, lemma in enumerate(self.index.vocabulary)}
+        processed = as_columns(self.index.processed_sentences)[2]
+        lemma_columns = array("q")
+        lengths = np.zeros(len(processed), dtype=np.int64)
+        for sentence, processed_sentence in enumerate(processed):
+            terms = analyze(processed_sentence.split())
+            lemma_columns.extend([columns[term] for term in terms])
+            lengths[sentence] = len(terms)
+        # the position of each lemma in its sentence:
+        starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = (np.arange(len(lemma_columns)) - starts).astype(np.int32)
+        return positions[
+            np.argsort(np.frombuffer(lemma_columns, dtype=np.int64), kind="stable")
+        ]
+
+    @cached_property
+    def position_offsets(self) -> np.ndarray:
+        """Returns the offsets of the positions of each posting in positions,
+        aligned with the postings matrix."""
+        offsets = np.zeros(self.index.postings_matrix.nnz + 1, dtype=np.int64)
+        np.cumsum(self.index.postings_matrix.data, out=offsets[1:])
+        return offsets
+
+    def normalize(self, text: str) -> List[str]:
+        """Return the interesting lemmas of the given text, processed in the
+        same way as the indexed sentences.
+
+        Example returns:
+            normalize("Saying thanks") = ["thanks"]
+
+        Args:
+            text: a word or phrase.
+
+        Returns:
+            List: List of lemmas.
+        """
+        processed = self.index.sentence_processor.process_many(
+            [text], noise=self.index.noise
+        )
+        return self.analyzer(processed[0])
+
+    def term(self, lemma: str) -> np.ndarray:
+        """Return the sorted ids of the sentences containing the given lemma.
+
+        Args:
+            lemma: a lemma.
+
+        Returns:
+            np.ndarray: sorted sentence ids.
+        """
+        column = self.columns.get(lemma)
+        if column is None:
+            return np.zeros(0, dtype=np.int64)
+        postings = self.index.postings_matrix
+        return postings.indices[postings.indptr[column] : postings.indptr[column + 1]]
+
+    def wildcard(self, pattern: str) -> np.ndarray:
+        """Return the sorted ids of the sentences containing any lemma matching
+        the given prefix or wildcard pattern.
+
+        Args:
+            pattern: a pattern such as `engin*`.
+
+        Returns:
+            np.ndarray: sorted sentence ids.
+        """
+        postings = [self.term(lemma) for lemma in self.columns.expand(pattern)]
+        if not postings:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(postings))
+
+    def term_positions(self, lemma: str, sentences: np.ndarray) -> List[np.ndarray]:
+        """Return the positions of the given lemma in each of the given
+        sentences, which should all contain the lemma.
+
+        Args:
+            lemma: a lemma in the vocabulary.
+            sentences: sorted ids of sentences containing the lemma.
+
+        Returns:
+            List: for each sentence, the sorted positions of the lemma.
+        """
+        column = self.columns[lemma]
+        start = self.index.postings_matrix.indptr[column]
+        postings = start + np.searchsorted(self.term(lemma), sentences)
+        offsets = self.position_offsets
+        return [self.positions[offsets[p] : offsets[p + 1]] for p in postings]
+
+    def phrase(self, lemmas: Sequence[str], slop: Optional[int] = None) -> np.ndarray:
+        """Return the sorted ids of the sentences containing the given lemmas as
+        a phrase or, if slop is given, within len(lemmas) + slop consecutive
+        positions.
+
+        Args:
+            lemmas: the lemmas of the phrase.
+            slop: number of additional positions allowed between the lemmas, in any order. Defaults to None: the
+                lemmas should occur next to each other, in order.
+
+        Returns:
+            np.ndarray: sorted sentence ids.
+        """
+        candidates = self.term(lemmas[0])
+        for lemma in lemmas[1:]:
+            candidates = intersect(candidates, self.term(lemma))
+        if len(lemmas) == 1 or not len(candidates):
+            return candidates
+        window = len(lemmas) + (slop or 0)
+        terms: Sequence[str] = lemmas
+        counts: Optional[Sequence[int]] = None
+        if slop is not None:
+            # a lemma which is repeated in the query should occur as many times within the window:
+            lemma_counts = Counter(lemmas)
+            terms, counts = list(lemma_counts), list(lemma_counts.values())
+        positions = [self.term_positions(lemma, candidates) for lemma in terms]
+        matches = [
+            within_window(
+                [p[i] for p in positions], window, ordered=slop is None, counts=counts
+            )
+            for i in range(len(candidates))
+        ]
+        return candidates[np.array(matches, dtype=bool)]
+
+    def search(self, query: str) -> QueryResult:
+        """Return the sentences and documents matching the given query.
+
+        Example returns:
+            search('peace OR "brave today"') = QueryResult(sentences=array([0, 3]), documents=array([1, 2]))
+
+        Args:
+            query: the query, see the QueryEngine class for the syntax.
+
+        Returns:
+            QueryResult: sorted ids of the matching sentences and documents.
+        """
+        tokens = QUERY_TOKEN.findall(query)
+        result = None
+        if tokens:
+            result, position = self.parse_or(tokens, 0)
+            if position != len(tokens):
+                raise InvalidQueryError
+        if result is None:
+            result = np.zeros(0, dtype=np.int64)
+        return QueryResult(
+            sentences=result,
+            documents=np.unique(self.sentence_documents[result]),
+        )
+
+    def parse_or(self, tokens: List[str], position: int):
+        """Parse and evaluate operands separated by OR, starting at the given
+        position in the query tokens.
+
+        Returns:
+            Tuple: the matching sentence ids (None if all operands were ignored) and the position after the operands.
+        """
+        result, position = self.parse_and(tokens, position)
+        while position < len(tokens) and tokens[position] == "OR":
+            operand, position = self.parse_and(tokens, position + 1)
+            if result is None:
+                result = operand
+            elif operand is not None:
+                result = np.union1d(result, operand)
+        return result, position
+
+    def parse_and(self, tokens: List[str], position: int):
+        """Parse and evaluate operands combined with (implicit) AND, starting at
+        the given position in the query tokens.
+
+        Negated operands are subtracted from the intersection of the other operands, rather than evaluated as the
+        complement of their matches.
+
+        Returns:
+            Tuple: the matching sentence ids (None if all operands were ignored) and the position after the operands.
+        """
+        included: List[np.ndarray] = []
+        excluded: List[np.ndarray] = []
+        if position == len(tokens) or tokens[position] in {"OR", ")"}:
+            raise InvalidQueryError
+        while position < len(tokens) and tokens[position] not in {"OR", ")"}:
+            if tokens[position] == "AND":
+                position += 1
+            negated = False
+            while position < len(tokens) and tokens[position] == "NOT":
+                negated = not negated
+                position += 1
+            operand, position = self.parse_atom(tokens, position)
+            if operand is not None:
+                (excluded if negated else included).append(operand)
+        if not included and not excluded:
+            return None, position
+        if included:
+            # intersect the shortest postings first:
+            included.sort(key=len)
+            result = included[0]
+            for operand in included[1:]:
+                result = intersect(result, operand)
+        else:
+            result = np.arange(len(self.sentence_documents))
+        for operand in excluded:
+            result = np.setdiff1d(result, operand, assume_unique=True)
+        return result, position
+
+    def parse_atom(self, tokens: List[str], position: int):
+        """Parse and evaluate one parenthesised expression, phrase or word at
+        the given position in the query tokens.
+
+        Returns:
+            Tuple: the matching sentence ids (None if the operand was ignored) and the position after the operand.
+        """
+        if position == len(tokens) or tokens[position] in OPERATORS | {")"}:
+            raise InvalidQueryError
+        token = tokens[position]
+        if token == "(":
+            result, position = self.parse_or(tokens, position + 1)
+            if position == len(tokens) or tokens[position] != ")":
+                raise InvalidQueryError
+            return result, position + 1
+        if not token.startswith('"') and any(c in token for c in WILDCARDS):
+            return self.wildcard(token.lower()), position + 1
+        slop = None
+        if token.startswith('"'):
+            phrase, _, proximity = token[1:].partition('"')
+            token, slop = phrase, int(proximity[1:]) if proximity else None
+        lemmas = self.normalize(token)
+        if not lemmas:
+            return None, position + 1
+        return self.phrase(lemmas, slop), position + 1
@@ -0,0 +1,168 @@
+import heapq
+from collections import Counter
+from typing import List, Tuple
+
+import numpy as np
+from cached_property import cached_property
+from scipy.sparse import csc_matrix, csr_matrix
+
+from eigen_tech_project.utils.errors import InvalidRankingOptionError
+
+SCORINGS = ("bm25", "tfidf")
+LEVELS = ("sentence", "document")
+
+
+class Ranker:
+    """Ranker Class. Rank the sentences or documents of an InvertedIndex
+    against a free text query, using BM25 or TF-IDF scoring.
+
+    Only the postings of the lemmas in the query are read: the columns of these lemmas are sliced from the postings
+    matrix, weighted, and the weighted postings are summed per row. The k best rows are then selected with a bounded
+    heap. No array with one entry per row of the matrix is allocated, so the cost of a query depends on the length of
+    the postings of its lemmas, rather than on the size of the corpus.
+
+    The unit lengths used by BM25, and the document level matrix, are computed once per level, on first use.
+
+    Args:
+        query_engine: the QueryEngine of the index, used to normalize queries.
+        k1: BM25 term frequency saturation parameter. Defaults to 1.2.
+        b: BM25 length normalisation parameter. Defaults to 0.75.
+    Returns:
+        The Ranker object instance
+    """
+
+    def __init__(self, query_engine, k1: float = 1.2, b: float = 0.75):
+        self.query_engine = query_engine
+        self.index = query_engine.index
+        self.k1 = k1
+        self.b = b
+
+    def __repr__(self):
+        """Returns representation of the Ranker object."""
+        return "{}({!r})".format(self.__class__.__name__, self.index)
+
+    @cached_property
+    def document_ids(self) -> np.ndarray:
+        """Returns the sorted, unique document ids, mapping the rows of the
+        document level matrix to document ids."""
+        return np.unique(self.query_engine.sentence_documents)
+
+    @cached_property
+    def document_matrix(self) -> csc_matrix:
+        """Returns the (documents x vocabulary) count matrix, in compressed
+        sparse column format, summing the rows of the sentences of each
+        document."""
+        rows = np.searchsorted(self.document_ids, self.query_engine.sentence_documents)
+        indicator = csr_matrix(
+            (np.ones(len(rows), dtype=np.int64), (rows, np.arange(len(rows)))),
+            shape=(len(self.document_ids), len(rows)),
+        )
+        matrix = (indicator @ self.index.document_term_matrix).tocsc()
+        matrix.sort_indices()
+        return matrix
+
+    def matrix(self, level: str) -> csc_matrix:
+        """Returns the (units x vocabulary) count matrix of the given level, in
+        compressed sparse column format."""
+        if level == "sentence":
+            return self.index.postings_matrix
+        return self.document_matrix
+
+    @cached_property
+    def sentence_lengths(self) -> Tuple[np.ndarray, float]:
+        """Returns the number of lemmas in each sentence and the average
+        number of lemmas per sentence."""
+        unit_lengths = np.asarray(self.index.document_term_matrix.sum(axis=1)).ravel()
+        return unit_lengths, max(unit_lengths.mean(), 1.0)
+
+    @cached_property
+    def document_lengths(self) -> Tuple[np.ndarray, float]:
+        """Returns the number of lemmas in each document, ordered as the rows
+        of the document level matrix, and the average number of lemmas per
+        document."""
+        unit_lengths = np.asarray(self.document_matrix.sum(axis=1)).ravel()
+        return unit_lengths, max(unit_lengths.mean(), 1.0)
+
+    def lengths(self, level: str) -> Tuple[np.ndarray, float]:
+        """Returns the number of lemmas in each unit of the given level and
+        the average number of lemmas per unit."""
+        if level == "sentence":
+            return self.sentence_lengths
+        return self.document_lengths
+
+    def scores(
+        self, query: str, scoring: str = "bm25", level: str = "sentence"
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the scores of the units (sentences or documents) which
+        contain at least one lemma of the query.
+
+        Args:
+            query: free text query.
+            scoring: "bm25" or "tfidf". Defaults to "bm25".
+            level: "sentence" or "document". Defaults to "sentence".
+
+        Returns:
+            Tuple: the ids of the matching units (sentence ids or document ids) and their scores.
+        """
+        if scoring not in SCORINGS or level not in LEVELS:
+            raise InvalidRankingOptionError
+        query_counts = Counter(
+            lemma
+            for lemma in self.query_engine.normalize(query)
+            if lemma in self.query_engine.columns
+        )
+        if not query_counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        matrix = self.matrix(level)
+        columns = [self.query_engine.columns[lemma] for lemma in query_counts]
+        # only the postings of the query lemmas are sliced from the matrix:
+        postings = matrix[:, columns]
+        n_units = matrix.shape[0]
+        document_frequencies = np.diff(postings.indptr)
+        term_frequencies = postings.data.astype(np.float64)
+        if scoring == "bm25":
+            idf = np.log1p(
+                (n_units - document_frequencies + 0.5) / (document_frequencies + 0.5)
+            )
+            unit_lengths, average_length = self.lengths(level)
+            norm = self.k1 * (
+                1 - self.b + self.b * unit_lengths[postings.indices] / average_length
+            )
+            weights = term_frequencies * (self.k1 + 1) / (term_frequencies + norm)
+        else:
+            idf = np.log((1 + n_units) / (1 + document_frequencies)) + 1
+            weights = 1 + np.log(term_frequencies)
+        query_weights = idf * np.array(list(query_counts.values()))
+        # sum the weighted postings per unit, over the touched units only:
+        units, rows = np.unique(postings.indices, return_inverse=True)
+        scores = np.bincount(
+            rows.ravel(),
+            weights=weights * np.repeat(query_weights, document_frequencies),
+            minlength=len(units),
+        )
+        if level == "document":
+            units = self.document_ids[units]
+        return units, scores
+
+    def rank(
+        self, query: str, k: int = 10, scoring: str = "bm25", level: str = "sentence"
+    ) -> List[Tuple[int, float]]:
+        """Return the k best scoring units (sentences or documents) for the
+        given query, best first. Ties are broken on the lowest id.
+
+        Example returns:
+            rank("peace despair", k=2) = [(4, 1.57), (3, 1.21)]
+
+        Args:
+            query: free text query.
+            k: number of results. Defaults to 10.
+            scoring: "bm25" or "tfidf". Defaults to "bm25".
+            level: "sentence" or "document". Defaults to "sentence".
+
+        Returns:
+            List: List of tuples containing the id (sentence id or document id) and score of each result.
+        """
+        units, scores = self.scores(query, scoring=scoring, level=level)
+        # a bounded heap of size k; negated ids make the lowest id win ties:
+        best = heapq.nlargest(k, zip(scores.tolist(), (-units).tolist()))
+        return [(-unit, score) for score, unit in best]
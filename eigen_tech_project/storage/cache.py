@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from os.path import join
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from eigen_tech_project.nlp.models import model_versions
+
+# version of the format of the cache entries, part of the fingerprint of the pipeline configuration:
+CACHE_VERSION = 2
+# default maximum size of the cache on disk:
+DEFAULT_CACHE_SIZE = 256 * 2**20
+
+Entry = Tuple[List[List[int]], List[List[str]]]
+
+
+def pipeline_fingerprint(noise: FrozenSet[str], segmenter: str = "punkt") -> str:
+    """Return a fingerprint of the configuration which determines how a file
+    is split and processed: the noise words, the sentence segmenter and the
+    versions of NLTK and its models.
+
+    Args:
+        noise: set of words filtered out of the processed sentences, as returned by build_noise.
+        segmenter: mode of the SentenceSegmenter splitting the files in sentences. Defaults to "punkt".
+
+    Returns:
+        str: hexadecimal SHA-256 digest of the configuration.
+    """
+    configuration = {
+        "version": CACHE_VERSION,
+        "noise": sorted(noise),
+        "segmenter": segmenter,
+        "models": model_versions(),
+    }
+    return hashlib.sha256(
+        json.dumps(configuration, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+class BuildCache:
+    """BuildCache Class. Persistent cache of the sentence boundaries and the
+    lemmatized sentences of files, keyed on the contents of the file and the fingerprint
+    of the pipeline configuration.
+
+    Each entry is a JSON file in the cache directory. The total size of the entries is bounded by `max_bytes`: once
+    it is exceeded, the least recently used entries are evicted. Entries written with another configuration are
+    never found, and are evicted as they become the least recently used. The cache keeps count of its hits, misses
+    and evictions.
+
+    Args:
+        directory: path to the cache directory, which is created if it does not exist.
+        fingerprint: fingerprint of the pipeline configuration, as returned by pipeline_fingerprint.
+        max_bytes: maximum total size of the entries in bytes. Defaults to 256 MiB.
+    Returns:
+        The BuildCache object instance
+    """
+
+    def __init__(
+        self, directory: str, fingerprint: str, max_bytes: int = DEFAULT_CACHE_SIZE
+    ):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        # sizes of the entries on disk, from the least to the most recently used:
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".json") and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        self.entries: OrderedDict = OrderedDict(
+            (key, size) for _, key, size in sorted(entries)
+        )
+        self.nbytes = sum(self.entries.values())
+
+    def __repr__(self):
+        """Returns representation of the BuildCache object."""
+        return "{}({!r})".format(self.__class__.__name__, self.directory)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, text: str) -> str:
+        """Return the key of the entry for a file with the given contents.
+
+        Args:
+            text: the contents of a file.
+
+        Returns:
+            str: hexadecimal SHA-256 digest of the contents and the fingerprint.
+        """
+        digest = hashlib.sha256(self.fingerprint.encode("utf-8"))
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        """Return the path to the file of the entry with the given key."""
+        return join(self.directory, key + ".json")
+
+    def get(self, key: str) -> Optional[Entry]:
+        """Return the character offsets and the lemmas of each sentence stored
+        under the given key, or None if they are not cached.
+
+        Args:
+            key: key of the entry, as returned by BuildCache.key.
+
+        Returns:
+            Tuple: List of [start, end] offsets of the sentences in the file and list of the interesting lemmas in each
+            sentence, or None.
+        """
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        try:
+            with open(self.path(key), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            # the entry was removed or damaged by another process:
+            self.entries.pop(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        os.utime(self.path(key))
+        return entry["spans"], entry["lemmas"]
+
+    def put(self, key: str, spans: List[List[int]], lemmas: List[List[str]]):
+        """Store the character offsets and the lemmas of each sentence under
+        the given key, evicting the least recently used entries if the cache is
+        full.
+
+        Args:
+            key: key of the entry, as returned by BuildCache.key.
+            spans: the [start, end] character offsets of the sentences in the file.
+            lemmas: the interesting lemmas in each sentence.
+        """
+        encoded = json.dumps({"spans": spans, "lemmas": lemmas}).encode("utf-8")
+        # write to a temporary file first, such that other processes never read a partial entry:
+        temporary = self.path(key) + ".{}.tmp".format(os.getpid())
+        with open(temporary, "wb") as f:
+            f.write(encoded)
+        os.replace(temporary, self.path(key))
+        self.nbytes += len(encoded) - self.entries.pop(key, 0)
+        self.entries[key] = len(encoded)
+        while self.nbytes > self.max_bytes:
+            evicted, size = self.entries.popitem(last=False)
+            try:
+                os.remove(self.path(evicted))
+            except FileNotFoundError:
+                pass
+            self.nbytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Remove all entries from the cache and reset the counters."""
+        for key in self.entries:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+        self.entries.clear()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def info(self) -> Dict[str, float]:
+        """Return the counters of the cache.
+
+        Example returns:
+            {"hits": 990, "misses": 10, "evictions": 0, "hit_rate": 0.99, "size": 1000, "bytes": 52428800,
+            "max_bytes": 268435456}
+
+        Returns:
+            Dict: Dictionary containing the hits, misses, evictions, hit rate, number of entries, total size and
+            maximum size of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,157 @@
+import json
+import os
+from os.path import join
+from typing import Dict, Tuple
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix
+
+from eigen_tech_project.storage.sentences import SentenceStore
+from eigen_tech_project.storage.strings import StringStore
+from eigen_tech_project.utils.errors import UnsupportedIndexFormatError
+
+# version of the format of persisted and shared indexes, incremented whenever an array or metadata field is added,
+# removed or changed; indexes written in another version raise an UnsupportedIndexFormatError when loaded:
+# 1: vocabulary, noise, frequencies, document-term matrix and sentence table
+# 2: file names, 32 bit document ids, sentence segmenter and sentence offsets
+FORMAT_VERSION = 2
+META_FILE = "meta.json"
+
+Arrays = Dict[str, np.ndarray]
+
+
+def index_to_arrays(index) -> Tuple[Dict, Arrays]:
+    """Return the metadata and the flat arrays representing the given
+    InvertedIndex.
+
+    The arrays contain the vocabulary, noise words and file names (as UTF-8 buffers and offsets), the lemma
+    frequencies, the CSR components of the document-term matrix and the sentence table: the document id, the
+    original sentence, the processed sentence and the offsets in the source file of each sentence.
+
+    Args:
+        index: an InvertedIndex instance.
+
+    Returns:
+        Tuple: Dictionary with metadata and dictionary mapping array names to numpy arrays.
+    """
+    matrix = index.document_term_matrix
+    documents, sentences, processed = SentenceStore.from_rows(
+        index.processed_sentences
+    ).columns
+    arrays = {
+        "frequencies": index.lemma_frequency_array,
+        "data": matrix.data,
+        "indices": matrix.indices,
+        "indptr": matrix.indptr,
+        "documents": documents,
+        "offsets": index.sentence_offsets,
+    }
+    for name, strings in [
+        ("vocabulary", index.vocabulary),
+        ("noise", sorted(index.noise)),
+        ("files", index.file_names),
+        ("sentences", sentences),
+        ("processed", processed),
+    ]:
+        if not isinstance(strings, StringStore):
+            strings = StringStore.from_strings(strings)
+        arrays[name + ".buffer"] = strings.buffer
+        arrays[name + ".offsets"] = strings.offsets
+    meta = {
+        "version": FORMAT_VERSION,
+        "path": str(index.path),
+        "segmenter": index.segmenter,
+        "shape": list(matrix.shape),
+    }
+    return meta, arrays
+
+
+def restore_index(index, meta: Dict, arrays: Arrays):
+    """Populate the given, uninitialised InvertedIndex with the metadata and
+    arrays returned by index_to_arrays.
+
+    The arrays are used as they are: no copies are made, so memory-mapped arrays remain memory-mapped. If the
+    arrays include the CSC components of the postings matrix ("postings.data", "postings.indices" and
+    "postings.indptr"), these are used as the postings matrix instead of converting the document-term matrix.
+
+    Args:
+        index: an InvertedIndex instance, created without calling its __init__.
+        meta: Dictionary with metadata.
+        arrays: Dictionary mapping array names to numpy arrays.
+    """
+    if meta.get("version") != FORMAT_VERSION:
+        raise UnsupportedIndexFormatError
+
+    def strings(name):
+        return StringStore(arrays[name + ".buffer"], arrays[name + ".offsets"])
+
+    index.path = meta["path"]
+    index.workers = 1
+    index.streaming = False
+    index.segmenter = meta["segmenter"]
+    index.noise = frozenset(strings("noise"))
+    sentences = strings("sentences")
+    index.__dict__.update(
+        {
+            "file_names": list(strings("files")),
+            "vocabulary": strings("vocabulary"),
+            "lemma_frequency_array": arrays["frequencies"],
+            "document_term_matrix": csr_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]),
+                shape=tuple(meta["shape"]),
+                copy=False,
+            ),
+            "sentences": SentenceStore(arrays["documents"], sentences),
+            "processed_sentences": SentenceStore(
+                arrays["documents"], sentences, strings("processed")
+            ),
+        }
+    )
+    index.__dict__["sentence_offsets"] = arrays["offsets"]
+    if "postings.indptr" in arrays:
+        index.__dict__["postings_matrix"] = csc_matrix(
+            (
+                arrays["postings.data"],
+                arrays["postings.indices"],
+                arrays["postings.indptr"],
+            ),
+            shape=tuple(meta["shape"]),
+            copy=False,
+        )
+
+
+def save_arrays(directory: str, meta: Dict, arrays: Arrays):
+    """Write the metadata and arrays to the given directory, one .npy file per
+    array.
+
+    Args:
+        directory: path to the directory, which is created if it does not exist.
+        meta: Dictionary with metadata.
+        arrays: Dictionary mapping array names to numpy arrays.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(join(directory, name + ".npy"), np.ascontiguousarray(array))
+    with open(join(directory, META_FILE), "w") as f:
+        json.dump(dict(meta, arrays=sorted(arrays)), f)
+
+
+def load_arrays(directory: str, mmap: bool = True) -> Tuple[Dict, Arrays]:
+    """Read the metadata and arrays written by save_arrays.
+
+    Args:
+        directory: path to the directory.
+        mmap: if True, the arrays are memory-mapped read-only instead of read into memory. Defaults to True.
+
+    Returns:
+        Tuple: Dictionary with metadata and dictionary mapping array names to numpy arrays.
+    """
+    with open(join(directory, META_FILE), "r") as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise UnsupportedIndexFormatError
+    arrays = {
+        name: np.load(join(directory, name + ".npy"), mmap_mode="r" if mmap else None)
+        for name in meta["arrays"]
+    }
+    return meta, arrays
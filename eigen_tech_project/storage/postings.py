@@ -0,0 +1,278 @@
+from typing import Iterator
+
+import numpy as np
+from scipy.sparse import csc_matrix
+
+# number of postings per block of a compressed postings list:
+BLOCK_SIZE = 128
+
+
+def encode_varints(values: np.ndarray) -> np.ndarray:
+    """Return the variable-byte encoding of the given non-negative integers.
+
+    Each integer is stored in 7 bits per byte, least significant group first, with the high bit set on all bytes
+    but the last. Small integers, such as the gaps between sorted ids, take a single byte.
+
+    Example returns:
+        encode_varints(np.array([5, 300])) = array([5, 172, 2], dtype=uint8)
+
+    Args:
+        values: array of non-negative integers.
+
+    Returns:
+        np.ndarray: uint8 array with the encoded integers.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    n_bytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        n_bytes += values >= np.uint64(1) << np.uint64(7 * k)
+    starts = np.zeros(len(values), dtype=np.int64)
+    np.cumsum(n_bytes[:-1], out=starts[1:])
+    encoded = np.zeros(int(n_bytes.sum()), dtype=np.uint8)
+    for k in range(int(n_bytes.max(initial=0))):
+        selected = n_bytes > k
+        group = (values[selected] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (n_bytes[selected] > k + 1).astype(np.uint64) << np.uint64(7)
+        encoded[starts[selected] + k] = group | more
+    return encoded
+
+
+def decode_varints(encoded: np.ndarray) -> np.ndarray:
+    """Return the integers of the given variable-byte encoding, the inverse
+    of encode_varints.
+
+    Args:
+        encoded: uint8 array with encoded integers.
+
+    Returns:
+        np.ndarray: int64 array with the decoded integers.
+    """
+    if not len(encoded) or encoded.max() < 0x80:
+        # all integers take a single byte:
+        return encoded.astype(np.int64)
+    ends = np.flatnonzero(encoded < 0x80)
+    starts = np.zeros(len(ends), dtype=np.int64)
+    starts[1:] = ends[:-1] + 1
+    # position of each byte within its integer:
+    shifts = np.arange(len(encoded)) - np.repeat(starts, ends - starts + 1)
+    groups = (encoded & 0x7F).astype(np.int64) << (7 * shifts)
+    return np.add.reduceat(groups, starts)
+
+
+class CompressedPostings:
+    """CompressedPostings Class. Postings lists stored as delta encoded,
+    variable-byte compressed blocks in one numpy buffer.
+
+    The sorted ids of each term are cut into blocks of BLOCK_SIZE ids. Within a block, each id is stored as the gap
+    to the previous id of the term, so most ids take one byte instead of the 28+ bytes of a Python int. A skip
+    table holds the last id and the byte offset of each block: blocks can be decoded independently, and a lookup
+    only decodes the blocks whose range can contain the ids it looks for.
+
+    Args:
+        buffer: uint8 array with the encoded blocks of all terms.
+        block_offsets: int64 array of length (number of blocks + 1) with the start of each block in the buffer.
+        block_last: int64 array with the last id of each block.
+        term_blocks: int64 array of length (number of terms + 1); the blocks of term i are
+            range(term_blocks[i], term_blocks[i + 1]).
+        term_lengths: int64 array with the number of ids of each term.
+    Returns:
+        The CompressedPostings object instance
+    """
+
+    def __init__(
+        self,
+        buffer: np.ndarray,
+        block_offsets: np.ndarray,
+        block_last: np.ndarray,
+        term_blocks: np.ndarray,
+        term_lengths: np.ndarray,
+    ):
+        self.buffer = buffer
+        self.block_offsets = block_offsets
+        self.block_last = block_last
+        self.term_blocks = term_blocks
+        self.term_lengths = term_lengths
+
+    @classmethod
+    def from_csc(cls, matrix: csc_matrix) -> "CompressedPostings":
+        """Return the compressed postings of the columns of the given matrix,
+        such as InvertedIndex.postings_matrix, which should have sorted
+        indices.
+
+        Args:
+            matrix: sparse matrix in compressed sparse column format.
+
+        Returns:
+            CompressedPostings: the CompressedPostings object instance.
+        """
+        indptr = matrix.indptr.astype(np.int64)
+        ids = matrix.indices.astype(np.int64)
+        term_lengths = np.diff(indptr)
+        term_blocks = np.zeros(len(term_lengths) + 1, dtype=np.int64)
+        np.cumsum(-(-term_lengths // BLOCK_SIZE), out=term_blocks[1:])
+        # start of each block in ids, by term:
+        block_starts = np.repeat(indptr[:-1], np.diff(term_blocks)) + BLOCK_SIZE * (
+            np.arange(term_blocks[-1])
+            - np.repeat(term_blocks[:-1], np.diff(term_blocks))
+        )
+        block_ends = np.append(block_starts[1:], len(ids))
+        # the gap of the first id of a term is the id itself:
+        gaps = np.diff(ids, prepend=0)
+        gaps[indptr[:-1][term_lengths > 0]] = ids[indptr[:-1][term_lengths > 0]]
+        encoded_lengths = np.ones(len(gaps), dtype=np.int64)
+        for k in range(1, 10):
+            encoded_lengths += gaps >= 1 << (7 * k)
+        block_offsets = np.zeros(len(block_starts) + 1, dtype=np.int64)
+        if len(ids):
+            np.cumsum(
+                np.add.reduceat(encoded_lengths, block_starts), out=block_offsets[1:]
+            )
+        return cls(
+            buffer=encode_varints(gaps),
+            block_offsets=block_offsets,
+            block_last=ids[block_ends - 1] if len(ids) else ids,
+            term_blocks=term_blocks,
+            term_lengths=term_lengths,
+        )
+
+    def __repr__(self):
+        """Returns representation of the CompressedPostings object."""
+        return "{}({!r})".format(self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return len(self.term_lengths)
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the number of bytes used by the buffer and the tables."""
+        return sum(
+            array.nbytes
+            for array in [
+                self.buffer,
+                self.block_offsets,
+                self.block_last,
+                self.term_blocks,
+                self.term_lengths,
+            ]
+        )
+
+    def decode_blocks(self, term: int, blocks: np.ndarray) -> np.ndarray:
+        """Return the ids in the given blocks of the given term.
+
+        The bytes of all blocks are gathered and decoded at once. The first gap of each block is corrected for the
+        blocks which are skipped, such that one cumulative sum yields the ids.
+
+        Args:
+            term: index of the term.
+            blocks: sorted, unique indices of blocks, in range(term_blocks[term], term_blocks[term + 1]).
+
+        Returns:
+            np.ndarray: sorted int64 array of the ids in the blocks.
+        """
+        blocks = np.asarray(blocks, dtype=np.int64)
+        starts = self.block_offsets[blocks]
+        sizes = self.block_offsets[blocks + 1] - starts
+        first_bytes = np.zeros(len(blocks), dtype=np.int64)
+        np.cumsum(sizes[:-1], out=first_bytes[1:])
+        gaps = decode_varints(
+            self.buffer[np.repeat(starts - first_bytes, sizes) + np.arange(sizes.sum())]
+        )
+        counts = np.minimum(
+            BLOCK_SIZE,
+            self.term_lengths[term] - BLOCK_SIZE * (blocks - self.term_blocks[term]),
+        )
+        firsts = np.zeros(len(blocks), dtype=np.int64)
+        np.cumsum(counts[:-1], out=firsts[1:])
+        # the last id before each block, in the postings and among the decoded ids:
+        previous = np.where(
+            blocks > self.term_blocks[term], self.block_last[blocks - 1], 0
+        )
+        decoded_previous = np.zeros(len(blocks), dtype=np.int64)
+        decoded_previous[1:] = self.block_last[blocks[:-1]]
+        gaps[firsts] += previous - decoded_previous
+        return np.cumsum(gaps)
+
+    def decode_block(self, block: int, term: int) -> np.ndarray:
+        """Return the ids in the given block of the given term.
+
+        Args:
+            block: index of the block, in range(term_blocks[term], term_blocks[term + 1]).
+            term: index of the term.
+
+        Returns:
+            np.ndarray: sorted int64 array of ids.
+        """
+        return self.decode_blocks(term, np.array([block]))
+
+    def iter_blocks(self, term: int) -> Iterator[np.ndarray]:
+        """Yield the ids of the given term, one decoded block at a time."""
+        for block in range(self.term_blocks[term], self.term_blocks[term + 1]):
+            yield self.decode_block(block, term)
+
+    def iter_ids(self, term: int) -> Iterator[int]:
+        """Yield the ids of the given term, decoding the blocks as they are
+        reached."""
+        for ids in self.iter_blocks(term):
+            yield from ids.tolist()
+
+    def __getitem__(self, term: int) -> np.ndarray:
+        """Returns all ids of the given term, as a sorted int64 array."""
+        if term < 0:
+            term += len(self)
+        if not 0 <= term < len(self):
+            raise IndexError("CompressedPostings index out of range")
+        start, end = self.term_blocks[term], self.term_blocks[term + 1]
+        if start == end:
+            return np.zeros(0, dtype=np.int64)
+        gaps = decode_varints(
+            self.buffer[self.block_offsets[start] : self.block_offsets[end]]
+        )
+        return np.cumsum(gaps)
+
+    def contains(self, term: int, ids: np.ndarray) -> np.ndarray:
+        """Return the ids among the given ids which occur in the postings of
+        the given term.
+
+        The skip table of the term is searched for the block which could hold each id; only those blocks are decoded,
+        all other blocks are skipped.
+
+        Args:
+            term: index of the term.
+            ids: sorted array of unique ids.
+
+        Returns:
+            np.ndarray: sorted array of the given ids in the postings of the term.
+        """
+        start, end = self.term_blocks[term], self.term_blocks[term + 1]
+        ids = np.asarray(ids, dtype=np.int64)
+        blocks = start + np.searchsorted(self.block_last[start:end], ids)
+        ids, blocks = ids[blocks < end], blocks[blocks < end]
+        if not len(ids):
+            return ids
+        decoded = self.decode_blocks(term, np.unique(blocks))
+        positions = np.minimum(np.searchsorted(decoded, ids), len(decoded) - 1)
+        found = decoded[positions] == ids
+        return ids[found]
+
+    def intersect(self, *terms: int) -> np.ndarray:
+        """Return the ids occurring in the postings of all given terms.
+
+        The shortest postings list is decoded and filtered through the other terms, shortest first, with block
+        skipping.
+
+        Example returns:
+            intersect(3, 17) = array([5, 29])
+
+        Args:
+            terms: indices of the terms.
+
+        Returns:
+            np.ndarray: sorted int64 array of ids.
+        """
+        order = sorted(terms, key=lambda term: self.term_lengths[term])
+        ids = self[order[0]]
+        for term in order[1:]:
+            if not len(ids):
+                break
+            ids = self.contains(term, ids)
+        return ids
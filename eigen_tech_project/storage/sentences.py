@@ -0,0 +1,179 @@
+from typing import Iterable, List, Optional, Sequence, Tuple, cast
+
+import numpy as np
+import numpy.typing as npt
+
+from eigen_tech_project.storage.strings import (
+    StringStore,
+    TupleView,
+    as_columns,
+    utf8_offsets,
+)
+
+
+def compact_ids(ids: npt.ArrayLike) -> np.ndarray:
+    """Return the given ids as an int32 array, or as an int64 array if they
+    do not fit in 32 bits."""
+    array = np.asarray(ids, dtype=np.int64)
+    if not len(array) or (array.min() >= -(2**31) and array.max() < 2**31):
+        return array.astype(np.int32)
+    return array
+
+
+def document_offsets(document_id: int, text: str, spans: np.ndarray) -> np.ndarray:
+    """Return the document id and the start and end offset, in the UTF-8
+    encoding of the text, of each sentence of a document.
+
+    Example return:
+        document_offsets(1, "Hello wörld. Bye.", array([[0, 12], [13, 17]])) = array([[1, 0, 13], [1, 14, 18]])
+
+    Args:
+        document_id: the id of the document.
+        text: the contents of the document.
+        spans: array of shape (number of sentences, 2) with the character offsets of each sentence in the text.
+
+    Returns:
+        np.ndarray: int64 array of shape (number of sentences, 3).
+    """
+    offsets = np.empty((len(spans), 3), dtype=np.int64)
+    offsets[:, 0] = document_id
+    offsets[:, 1:] = utf8_offsets(text, spans).reshape(-1, 2)
+    return offsets
+
+
+def concatenate_offsets(offsets: List[np.ndarray]) -> np.ndarray:
+    """Return the given arrays of sentence offsets as one array of shape
+    (number of sentences, 3)."""
+    return np.concatenate(offsets or [np.zeros((0, 3), dtype=np.int64)]).reshape(-1, 3)
+
+
+class SentenceStore(TupleView):
+    """SentenceStore Class. Columnar store of the sentences of an
+    InvertedIndex.
+
+    The document ids are held in one int32 array and the sentences, and optionally the processed sentences, in
+    StringStores: one UTF-8 buffer and an offsets array per column. This replaces three Python objects and a tuple
+    per sentence by a few bytes of array space. For backwards compatibility, the store is a read-only sequence of
+    (document id, sentence) or (document id, sentence, processed sentence) tuples, which are built when they are
+    accessed.
+
+    Example:
+        SentenceStore.from_rows([(1, "First sentence.", "first sentence")])[0] = (1, "First sentence.", "first sentence")
+
+    Args:
+        documents: array with the document id of each sentence.
+        sentences: StringStore with the sentences.
+        processed: StringStore with the processed sentences. Defaults to None.
+    Returns:
+        The SentenceStore object instance
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        documents: np.ndarray,
+        sentences: StringStore,
+        processed: Optional[StringStore] = None,
+    ):
+        if processed is None:
+            super().__init__(documents, sentences)
+        else:
+            super().__init__(documents, sentences, processed)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple]) -> "SentenceStore":
+        """Return a SentenceStore containing the given rows.
+
+        Args:
+            rows: sequence of (document id, sentence) or (document id, sentence, processed sentence) tuples.
+
+        Returns:
+            SentenceStore: the SentenceStore object instance.
+        """
+        if isinstance(rows, SentenceStore):
+            return rows
+        columns = as_columns(rows) or ((), ())
+        return cls(
+            compact_ids(columns[0]),
+            *(
+                (
+                    column
+                    if isinstance(column, StringStore)
+                    else StringStore.from_strings(column)
+                )
+                for column in columns[1:]
+            ),
+        )
+
+    @classmethod
+    def concatenate(cls, stores: Sequence["SentenceStore"]) -> "SentenceStore":
+        """Return a SentenceStore containing the rows of the given stores, in
+        order. All non-empty stores should have the same columns."""
+        stores = [store for store in stores if len(store)] or stores[:1]
+        return cls(
+            compact_ids(np.concatenate([store.documents for store in stores])),
+            *(
+                StringStore.concatenate([store.string_columns[i] for store in stores])
+                for i in range(len(stores[0].string_columns))
+            ),
+        )
+
+    @property
+    def documents(self) -> np.ndarray:
+        """Returns the array with the document id of each sentence."""
+        return cast(np.ndarray, self.columns[0])
+
+    @property
+    def string_columns(self) -> Tuple[StringStore, ...]:
+        """Returns the StringStores with the sentences and, if any, the
+        processed sentences."""
+        return cast(Tuple[StringStore, ...], self.columns[1:])
+
+    @property
+    def sentences(self) -> StringStore:
+        """Returns the StringStore with the sentences."""
+        return self.string_columns[0]
+
+    @property
+    def processed(self) -> Optional[StringStore]:
+        """Returns the StringStore with the processed sentences, if any."""
+        string_columns = self.string_columns
+        return string_columns[1] if len(string_columns) > 1 else None
+
+    def with_processed(self, processed: Iterable[str]) -> "SentenceStore":
+        """Return a SentenceStore sharing the document ids and sentences of
+        this store, with the given processed sentences."""
+        return self.__class__(
+            self.documents, self.sentences, StringStore.from_strings(processed)
+        )
+
+    def without_processed(self) -> "SentenceStore":
+        """Return a SentenceStore sharing the document ids and sentences of
+        this store, without the processed sentences."""
+        return self.__class__(self.documents, self.sentences)
+
+    def view(self, start: int, stop: int) -> "SentenceStore":
+        """Return a SentenceStore containing the rows from start up to stop,
+        sharing the arrays of this store."""
+        return self.__class__(
+            self.documents[start:stop],
+            *(column.view(start, stop) for column in self.string_columns),
+        )
+
+    def take(self, indices: npt.ArrayLike) -> "SentenceStore":
+        """Return a SentenceStore containing the rows at the given indices, in
+        the given order."""
+        rows = np.asarray(indices, dtype=np.int64)
+        return self.__class__(
+            self.documents[rows],
+            *(column.take(rows) for column in self.string_columns),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the number of bytes used by the arrays of the store."""
+        return self.documents.nbytes + sum(
+            column.buffer.nbytes + column.offsets.nbytes
+            for column in self.string_columns
+        )
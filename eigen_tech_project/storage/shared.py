@@ -0,0 +1,95 @@
+import json
+import os
+from os.path import isdir
+from tempfile import mkstemp
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from eigen_tech_project.storage.persistence import FORMAT_VERSION, Arrays
+from eigen_tech_project.utils.errors import UnsupportedIndexFormatError
+
+# memory backed file system, segments are written to the system's temporary directory where it does not exist:
+SHARED_MEMORY_DIR = "/dev/shm"
+# arrays in a segment start at a multiple of this number of bytes:
+ALIGNMENT = 64
+# number of bytes holding the length of the metadata at the start of a segment:
+HEADER_SIZE = 8
+
+
+def aligned(size: int) -> int:
+    """Return the given number of bytes, rounded up to a multiple of
+    ALIGNMENT."""
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def share_arrays(meta: Dict, arrays: Arrays, path: Optional[str] = None) -> str:
+    """Write the metadata and arrays to one segment file, which other
+    processes can memory-map with attach_arrays.
+
+    The segment starts with the length of the metadata and the metadata as JSON, including the dtype, shape and
+    offset of each array, followed by the arrays. By default it is written to the memory backed SHARED_MEMORY_DIR,
+    so the processes attaching to it share the same pages of memory.
+
+    The segment can be removed as soon as all processes have attached to it: the memory is released once the last
+    process using it has dropped its arrays.
+
+    Args:
+        meta: Dictionary with metadata.
+        arrays: Dictionary mapping array names to numpy arrays.
+        path: path to the file to write. Defaults to None, in which case a new file is created in
+            SHARED_MEMORY_DIR, or in the system's temporary directory.
+
+    Returns:
+        str: path to the segment.
+    """
+    if path is None:
+        directory = SHARED_MEMORY_DIR if isdir(SHARED_MEMORY_DIR) else None
+        descriptor, path = mkstemp(prefix="inverted_index_", dir=directory)
+        os.close(descriptor)
+    layout = {}
+    offsets = {}
+    size = 0
+    for key, array in arrays.items():
+        layout[key] = [array.dtype.str, list(array.shape), size]
+        offsets[key] = size
+        size += aligned(array.nbytes)
+    header = json.dumps(dict(meta, arrays=layout)).encode("utf-8")
+    start = aligned(HEADER_SIZE + len(header))
+    with open(path, "wb") as f:
+        f.write(len(header).to_bytes(HEADER_SIZE, "little"))
+        f.write(header)
+        for key, array in arrays.items():
+            f.seek(start + offsets[key])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(start + size)
+    return path
+
+
+def attach_arrays(path: str) -> Tuple[Dict, Arrays]:
+    """Return the metadata and read-only views of the arrays in the segment
+    written by share_arrays.
+
+    No data is copied: the arrays point into one read-only memory map of the segment, which stays mapped until
+    all of the arrays are garbage collected.
+
+    Args:
+        path: path to the segment.
+
+    Returns:
+        Tuple: Dictionary with metadata and dictionary mapping array names to numpy arrays.
+    """
+    segment = np.memmap(path, dtype=np.uint8, mode="r")
+    length = int.from_bytes(segment[:HEADER_SIZE].tobytes(), "little")
+    meta = json.loads(segment[HEADER_SIZE : HEADER_SIZE + length].tobytes())
+    if meta.get("version") != FORMAT_VERSION:
+        raise UnsupportedIndexFormatError
+    start = aligned(HEADER_SIZE + length)
+    arrays = {}
+    for key, (dtype, shape, offset) in meta.pop("arrays").items():
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * dtype.itemsize
+        arrays[key] = (
+            segment[start + offset : start + offset + size].view(dtype).reshape(shape)
+        )
+    return meta, arrays
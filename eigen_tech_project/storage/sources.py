@@ -0,0 +1,144 @@
+import mmap
+from os.path import join
+from typing import Dict, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from eigen_tech_project.utils.errors import DocumentNotInIndexError
+
+
+class SourceFiles:
+    """SourceFiles Class. Read-only memory maps of the source files of an
+    index, from which sentences are sliced by their byte offsets.
+
+    Each file is mapped on first use and stays mapped until the SourceFiles object is garbage collected. Slicing a
+    file only reads the pages holding the slice, the rest of the file is never read, and the pages are shared with
+    the OS page cache rather than copied into the process.
+
+    The offsets of the index are offsets in the UTF-8 encoding of the text as it was read, in which line endings are
+    translated to "\n". They equal the offsets in the file unless the file has "\r\n" line endings, in which case
+    they are shifted by the number of preceding "\r\n" line endings (see offsets). The offsets refer to the files
+    as they were indexed: a file which changed since should be updated in the index (see
+    InvertedIndex.update_document) before slicing it.
+
+    Args:
+        path: path to the directory containing the files.
+        document_files: list of tuples containing the id and name of each file.
+    Returns:
+        The SourceFiles object instance
+    """
+
+    def __init__(self, path, document_files: List[Tuple[int, str]]):
+        self.path = path
+        self.file_names = dict(document_files)
+        self.maps: Dict[int, mmap.mmap] = {}
+        self.line_ends: Dict[int, np.ndarray] = {}
+
+    def __repr__(self):
+        """Returns representation of the SourceFiles object."""
+        return "{}({!r})".format(self.__class__.__name__, self.path)
+
+    def __len__(self):
+        return len(self.maps)
+
+    def map(self, document: int) -> mmap.mmap:
+        """Return the read-only memory map of the file of the given document,
+        mapping the file if it is not mapped yet.
+
+        Args:
+            document: a document id.
+
+        Returns:
+            mmap.mmap: the memory map of the file.
+        """
+        source = self.maps.get(document)
+        if source is None:
+            file_name = self.file_names.get(document)
+            if file_name is None:
+                raise DocumentNotInIndexError
+            with open(join(self.path, file_name), "rb") as f:
+                source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[document] = source
+        return source
+
+    def crlf_positions(self, document: int) -> np.ndarray:
+        """Return the position of each "\r\n" line ending in the text of the
+        given document as it was read, where it is translated to "\n".
+
+        The file is scanned once, on the first call, and only if it contains a carriage return.
+
+        Args:
+            document: a document id.
+
+        Returns:
+            np.ndarray: sorted int64 array of offsets in the UTF-8 encoding of the text.
+        """
+        positions = self.line_ends.get(document)
+        if positions is None:
+            source = self.map(document)
+            if source.find(b"\r") == -1:
+                positions = np.zeros(0, dtype=np.int64)
+            else:
+                data = np.frombuffer(source, dtype=np.uint8)
+                positions = np.flatnonzero((data[:-1] == 13) & (data[1:] == 10))
+                # each preceding "\r\n" is one byte shorter in the text:
+                positions = positions - np.arange(len(positions))
+            self.line_ends[document] = positions
+        return positions
+
+    def offsets(self, document: int, offsets: npt.ArrayLike) -> np.ndarray:
+        """Return the offsets in the file of the given document of the given
+        offsets in the text of that document as it was read.
+
+        Example returns:
+            * offsets(1, [26, 52]) = array([27, 53]) for a file starting with "We all made this journey.\r\n"
+
+        Args:
+            document: a document id.
+            offsets: array of offsets in the UTF-8 encoding of the text, in which line endings are "\n".
+
+        Returns:
+            np.ndarray: int64 array of byte offsets in the file, of the same shape as the given offsets.
+        """
+        text_offsets = np.asarray(offsets, dtype=np.int64)
+        positions = self.crlf_positions(document)
+        if not len(positions):
+            return text_offsets
+        return text_offsets + np.searchsorted(positions, text_offsets, side="left")
+
+    def read(self, document: int, start: int, end: int) -> memoryview:
+        """Return the bytes between the given offsets in the file of the given
+        document, as a view on the memory map: no data is copied.
+
+        Args:
+            document: a document id.
+            start: byte offset of the start of the slice.
+            end: byte offset of the end of the slice.
+
+        Returns:
+            memoryview: read-only view of the bytes.
+        """
+        return memoryview(self.map(document))[start:end]
+
+    def text(self, document: int, start: int, end: int) -> str:
+        """Return the text between the given offsets in the text of the given
+        document, sliced from its file and decoded from UTF-8 with line
+        endings translated to "\n", as the text was read.
+
+        Example returns:
+            * text(1, 0, 21) = "We made this journey."
+
+        Args:
+            document: a document id.
+            start: offset of the start of the text, in the UTF-8 encoding of the text as it was read.
+            end: offset of the end of the text, in the UTF-8 encoding of the text as it was read.
+
+        Returns:
+            str: the text.
+        """
+        start, end = self.offsets(document, [start, end]).tolist()
+        text = str(self.read(document, start, end), "utf-8")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
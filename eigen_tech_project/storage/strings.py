@@ -0,0 +1,283 @@
+from array import array
+from typing import Iterable, Sequence, Tuple, Union
+
+import numpy as np
+import numpy.typing as npt
+
+# a column of a TupleView: a numpy array or any other sequence, such as a StringStore:
+Column = Union[np.ndarray, Sequence]
+
+
+def utf8_offsets(text: str, offsets: npt.ArrayLike) -> np.ndarray:
+    """Return the given character offsets in the text as offsets in the
+    UTF-8 encoding of the text.
+
+    Example returns:
+        * utf8_offsets("Héllo wörld", [[0, 5], [6, 11]]) = array([[0, 6], [7, 13]])
+
+    Args:
+        text: a string.
+        offsets: array of character offsets in the text, of any shape.
+
+    Returns:
+        np.ndarray: int64 array of byte offsets, of the same shape.
+    """
+    character_offsets = np.asarray(offsets, dtype=np.int64)
+    if text.isascii():
+        return character_offsets
+    # count the number of bytes of each code point:
+    code_points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    widths = (
+        1
+        + (code_points >= 0x80).astype(np.int64)
+        + (code_points >= 0x800)
+        + (code_points >= 0x10000)
+    )
+    byte_offsets = np.zeros(len(text) + 1, dtype=np.int64)
+    np.cumsum(widths, out=byte_offsets[1:])
+    return byte_offsets[character_offsets]
+
+
+def merge_ranges(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge the byte ranges [starts[i], ends[i]) which directly follow each
+    other into runs.
+
+    A run ends where the next range does not start at the end of the previous one. Copying the runs with slices
+    copies the bytes of all the ranges, in order, without building an index with one entry per byte.
+
+    Example returns:
+        * merge_ranges(np.array([0, 5, 20]), np.array([5, 9, 24])) = (array([0, 20]), array([9, 24]))
+
+    Args:
+        starts: array with the start offset of each range.
+        ends: array with the end offset of each range.
+
+    Returns:
+        tuple: the array with the start offset and the array with the end offset of each run.
+    """
+    breaks = np.flatnonzero(starts[1:] != ends[:-1]) + 1
+    firsts = np.concatenate([np.zeros(min(len(starts), 1), dtype=np.int64), breaks])
+    lasts = np.append(breaks, len(starts))[: len(firsts)] - 1
+    return starts[firsts], ends[lasts]
+
+
+class StringStore(Sequence):
+    """StringStore Class. Read-only sequence of strings, stored as one
+    concatenated UTF-8 buffer and an array of offsets into that buffer.
+
+    The i-th string is decoded from buffer[offsets[i]:offsets[i + 1]] when it is accessed. Both arrays can be
+    memory-mapped, in which case the strings are only read from disk when they are accessed.
+
+    Args:
+        buffer: uint8 array containing the concatenated UTF-8 encoded strings.
+        offsets: int64 array of length (number of strings + 1), containing the start offset of each string in the
+            buffer, followed by the length of the buffer.
+    Returns:
+        The StringStore object instance
+    """
+
+    __slots__ = ("buffer", "offsets")
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringStore":
+        """Return a StringStore containing the given strings.
+
+        Args:
+            strings: collection of strings.
+
+        Returns:
+            StringStore: the StringStore object instance.
+        """
+        buffer = bytearray()
+        offsets = array("q", [0])
+        for string in strings:
+            buffer += string.encode("utf-8")
+            offsets.append(len(buffer))
+        return cls(np.frombuffer(buffer, dtype=np.uint8), np.array(offsets))
+
+    @classmethod
+    def from_spans(
+        cls, texts: Sequence[str], spans: Sequence[np.ndarray]
+    ) -> "StringStore":
+        """Return a StringStore containing the substrings of the given texts
+        at the given character offsets.
+
+        The texts are encoded one at a time and the bytes of the substrings are copied from the encoded text, run by
+        run (see merge_ranges), no substrings are built.
+
+        Example returns:
+            * list(from_spans(["Hello world. Bye."], [[(0, 12), (13, 17)]])) = ["Hello world.", "Bye."]
+
+        Args:
+            texts: collection of strings.
+            spans: for each text, an array of shape (number of substrings, 2) with the start and end character
+                offset of each substring.
+
+        Returns:
+            StringStore: the StringStore object instance.
+        """
+        buffer = bytearray()
+        lengths = [np.zeros(0, dtype=np.int64)]
+        for text, text_spans in zip(texts, spans):
+            byte_spans = utf8_offsets(text, text_spans).reshape(-1, 2)
+            encoded = text.encode("utf-8")
+            run_starts, run_ends = merge_ranges(byte_spans[:, 0], byte_spans[:, 1])
+            for start, end in zip(run_starts.tolist(), run_ends.tolist()):
+                buffer += encoded[start:end]
+            lengths.append(byte_spans[:, 1] - byte_spans[:, 0])
+        substring_lengths = np.concatenate(lengths)
+        offsets = np.zeros(len(substring_lengths) + 1, dtype=np.int64)
+        np.cumsum(substring_lengths, out=offsets[1:])
+        return cls(np.frombuffer(buffer, dtype=np.uint8), offsets)
+
+    @classmethod
+    def concatenate(cls, stores: Sequence["StringStore"]) -> "StringStore":
+        """Return a StringStore containing the strings of the given stores, in
+        order.
+
+        Args:
+            stores: collection of StringStores.
+
+        Returns:
+            StringStore: the StringStore object instance.
+        """
+        offsets = [np.zeros(1, dtype=np.int64)]
+        start = 0
+        for store in stores:
+            offsets.append(store.offsets[1:] - store.offsets[0] + start)
+            start += int(store.offsets[-1] - store.offsets[0])
+        buffer = np.concatenate(
+            [np.zeros(0, dtype=np.uint8)]
+            + [store.buffer[store.offsets[0] : store.offsets[-1]] for store in stores]
+        )
+        return cls(buffer, np.concatenate(offsets))
+
+    def view(self, start: int, stop: int) -> "StringStore":
+        """Return a StringStore containing the strings from start up to stop,
+        sharing the buffer of this store: no bytes are copied."""
+        return self.__class__(self.buffer, self.offsets[start : stop + 1])
+
+    def take(self, indices: npt.ArrayLike) -> "StringStore":
+        """Return a StringStore containing the strings at the given indices, in
+        the given order.
+
+        The bytes of the strings are copied into a preallocated buffer, run by run: strings which are adjacent in the
+        buffer are copied with one slice (see merge_ranges). No strings are decoded.
+
+        Args:
+            indices: array of indices.
+
+        Returns:
+            StringStore: the StringStore object instance.
+        """
+        rows = np.asarray(indices, dtype=np.int64)
+        starts = self.offsets[rows]
+        ends = self.offsets[rows + 1]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(ends - starts, out=offsets[1:])
+        buffer = np.empty(offsets[-1], dtype=np.uint8)
+        position = 0
+        run_starts, run_ends = merge_ranges(starts, ends)
+        for start, end in zip(run_starts.tolist(), run_ends.tolist()):
+            buffer[position : position + end - start] = self.buffer[start:end]
+            position += end - start
+        return self.__class__(buffer, offsets)
+
+    def __repr__(self):
+        """Returns representation of the StringStore object."""
+        return "{}({!r})".format(self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: Union[int, slice]):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("StringStore index out of range")
+        return (
+            self.buffer[self.offsets[i] : self.offsets[i + 1]].tobytes().decode("utf-8")
+        )
+
+    def __iter__(self):
+        # read the buffer in windows of strings, rather than once per string:
+        for i in range(0, len(self), 4096):
+            offsets = self.offsets[i : i + 4097].tolist()
+            buffer = self.buffer[offsets[0] : offsets[-1]].tobytes()
+            for start, end in zip(offsets, offsets[1:]):
+                yield buffer[start - offsets[0] : end - offsets[0]].decode("utf-8")
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or len(self) != len(other):
+            return False
+        return all(a == b for a, b in zip(self, other))
+
+
+class TupleView(Sequence):
+    """TupleView Class. Read-only sequence of tuples, combining the i-th
+    element of each of the given columns.
+
+    Example:
+        TupleView(np.array([1, 1]), ["a", "b"])[1] = (1, "b")
+
+    Args:
+        columns: sequences of equal length. Numpy integer columns are returned as python integers.
+    Returns:
+        The TupleView object instance
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self, *columns: Column):
+        self.columns: Tuple[Column, ...] = columns
+
+    def __repr__(self):
+        """Returns representation of the TupleView object."""
+        return "{}({!r})".format(self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def __getitem__(self, i: Union[int, slice]):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return tuple(
+            column[i].item() if isinstance(column, np.ndarray) else column[i]
+            for column in self.columns
+        )
+
+    def __iter__(self):
+        return zip(
+            *(
+                column.tolist() if isinstance(column, np.ndarray) else column
+                for column in self.columns
+            )
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or len(self) != len(other):
+            return False
+        return all(a == b for a, b in zip(self, other))
+
+
+def as_columns(rows: Sequence[Tuple]) -> Tuple[Column, ...]:
+    """Return the columns of the given sequence of equally sized tuples.
+
+    Example returns:
+        as_columns([(1, "a"), (2, "b")]) = ((1, 2), ("a", "b"))
+
+    Args:
+        rows: sequence of tuples.
+
+    Returns:
+        Tuple: one sequence per position in the tuples.
+    """
+    if isinstance(rows, TupleView):
+        return rows.columns
+    return tuple(zip(*rows))
@@ -22,6 +22,14 @@ class NoTXTFilesWithContentInDirectoryError(Exception):
         return "<{}: {}>".format(self.__class__.__name__, self.errmsg)
 
 
+class NotATXTFileError(Exception):
+    def __init__(self):
+        self.errmsg = "One or more of the provided files are not .txt-files."
+
+    def __str__(self):
+        return "<{}: {}>".format(self.__class__.__name__, self.errmsg)
+
+
 class FileNameContainsNoNumberError(Exception):
     def __init__(self):
         self.errmsg = "One or more file names contain no numbers."
@@ -46,3 +54,54 @@ class NoInterestingSentencesError(Exception):
 
     def __str__(self):
         return "<{}: {}>".format(self.__class__.__name__, self.errmsg)
+
+
+class UnsupportedIndexFormatError(Exception):
+    def __init__(self):
+        self.errmsg = "The stored index was written in an unsupported format version."
+
+    def __str__(self):
+        return "<{}: {}>".format(self.__class__.__name__, self.errmsg)
+
+
+class DocumentNotInIndexError(Exception):
+    def __init__(self):
+        self.errmsg = "One or more files are not part of the index."
+
+    def __str__(self):
+        return "<{}: {}>".format(self.__class__.__name__, self.errmsg)
+
+
+class InvalidQueryError(Exception):
+    def __init__(self):
+        self.errmsg = "The query could not be parsed."
+
+    def __str__(self):
+        return "<{}: {}>".format(self.__class__.__name__, self.errmsg)
+
+
+class InvalidRankingOptionError(Exception):
+    def __init__(self):
+        self.errmsg = "The scoring should be 'bm25' or 'tfidf' and the level 'sentence' or 'document'."
+
+    def __str__(self):
+        return "<{}: {}>".format(self.__class__.__name__, self.errmsg)
+
+
+class InvalidSegmenterError(Exception):
+    def __init__(self):
+        self.errmsg = "The segmenter should be 'punkt' or 'rules'."
+
+    def __str__(self):
+        return "<{}: {}>".format(self.__class__.__name__, self.errmsg)
+
+
+class MissingResourceError(Exception):
+    def __init__(self):
+        self.errmsg = (
+            "One or more NLTK resources are not installed, install them with: "
+            "python -m nltk.downloader punkt stopwords averaged_perceptron_tagger wordnet"
+        )
+
+    def __str__(self):
+        return "<{}: {}>".format(self.__class__.__name__, self.errmsg)
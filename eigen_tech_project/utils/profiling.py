@@ -0,0 +1,204 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# statistics recorded for each stage:
+STATS = ("calls", "wall", "cpu", "items", "peak_memory")
+
+
+class Span:
+    """Span Class. One run of a stage, as passed to the callbacks of a
+    Profiler.
+
+    Args:
+        name: name of the stage.
+        parent: name of the stage this run is nested in, None for top level stages.
+        items: number of items (e.g. files or sentences) processed in this run, may be updated while it runs.
+    Returns:
+        The Span object instance
+    """
+
+    __slots__ = (
+        "name",
+        "parent",
+        "items",
+        "start",
+        "wall",
+        "cpu",
+        "peak_memory",
+        "start_memory",
+    )
+
+    def __init__(self, name: str, parent: Optional[str] = None, items: int = 0):
+        self.name = name
+        self.parent = parent
+        self.items = items
+        # wall clock time at the start of the run, in seconds since the epoch:
+        self.start = time.time()
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_memory = 0
+        self.start_memory = 0
+
+    def __repr__(self):
+        """Returns representation of the Span object."""
+        return "{}({!r}, wall={:.6f})".format(
+            self.__class__.__name__, self.name, self.wall
+        )
+
+
+class Profiler:
+    """Profiler Class. Records the wall time, CPU time, number of items and
+    peak memory of the stages of a computation.
+
+    Stages are recorded with the `stage` context manager and can be nested, the time of a stage includes the time
+    of the stages nested in it. The statistics of all runs of a stage are summed in the report, the peak memory is
+    the maximum over the runs. Each run is also passed, as a
+    Span, to the callbacks, which can export it to a metrics or tracing system.
+
+    CPU time is the CPU time of the whole process, including other threads, and excludes worker processes. Peak
+    memory is the peak of the memory allocated by Python during the run, measured with tracemalloc, which slows
+    down allocations considerably; it is only recorded if trace_memory is True.
+
+    Example:
+        profiler = Profiler(callbacks=[lambda span: print(span.name, span.wall)])
+        with profiler.stage("read") as span:
+            span.items = len(read_files(path, file_names))
+        profiler.report() = {"read": {"calls": 1, "wall": 0.02, "cpu": 0.01, "items": 12, "peak_memory": 0}}
+
+    Args:
+        callbacks: functions called with the Span of each completed run of a stage.
+        trace_memory: if True, tracemalloc is started, if needed, to record the peak memory of each stage.
+    Returns:
+        The Profiler object instance
+    """
+
+    def __init__(
+        self,
+        callbacks: Optional[List[Callable[[Span], None]]] = None,
+        trace_memory: bool = False,
+    ):
+        self.callbacks = list(callbacks or [])
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.lock = threading.Lock()
+        # stack of the spans which are running, per thread:
+        self.local = threading.local()
+
+    def __repr__(self):
+        """Returns representation of the Profiler object."""
+        return "{}({!r})".format(self.__class__.__name__, list(self.stages))
+
+    def add_callback(self, callback: Callable[[Span], None]):
+        """Call the given function with the Span of each completed run of a
+        stage."""
+        self.callbacks.append(callback)
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0) -> Iterator[Span]:
+        """Record a run of the stage with the given name.
+
+        Args:
+            name: name of the stage.
+            items: number of items processed, can also be set on the yielded Span.
+
+        Yields:
+            Span: the run of the stage.
+        """
+        spans = self.local.__dict__.setdefault("spans", [])
+        span = Span(name, parent=spans[-1].name if spans else None, items=items)
+        trace_memory = self.trace_memory
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            for running in spans:
+                running.peak_memory = max(running.peak_memory, peak)
+            tracemalloc.reset_peak()
+            span.start_memory = span.peak_memory = current
+        spans.append(span)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield span
+        finally:
+            span.wall = time.perf_counter() - wall
+            span.cpu = time.process_time() - cpu
+            spans.pop()
+            if trace_memory and tracemalloc.is_tracing():
+                peak = tracemalloc.get_traced_memory()[1]
+                for running in spans:
+                    running.peak_memory = max(running.peak_memory, peak)
+                span.peak_memory = max(span.peak_memory, peak) - span.start_memory
+            else:
+                span.peak_memory = 0
+            self.record(span)
+
+    def record(self, span: Span):
+        """Add a completed run of a stage to the statistics of the stage and
+        pass it to the callbacks."""
+        with self.lock:
+            stats = self.stages.setdefault(span.name, {})
+            if not stats:
+                stats.update({stat: 0 for stat in STATS})
+            stats["calls"] += 1
+            stats["wall"] += span.wall
+            stats["cpu"] += span.cpu
+            stats["items"] += span.items
+            stats["peak_memory"] = max(stats["peak_memory"], span.peak_memory)
+        for callback in self.callbacks:
+            callback(span)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Returns the statistics of each stage, in order of the first
+        completed run of each stage.
+
+        Example return:
+            {"split": {"calls": 1, "wall": 0.5, "cpu": 0.5, "items": 1200, "peak_memory": 0}, ...}
+
+        Returns:
+            Dict: Dictionary mapping the name of each stage to its number of runs, wall and CPU time in seconds,
+            number of items and peak memory in bytes.
+        """
+        with self.lock:
+            return {name: dict(stats) for name, stats in self.stages.items()}
+
+    def reset(self):
+        """Forget the statistics recorded so far."""
+        with self.lock:
+            self.stages.clear()
+
+
+def profiled(stage: str, items: Optional[Callable[[Any], int]] = len):
+    """Decorator recording each call of a method as a run of the given stage,
+    in the Profiler stored in the `profiler` attribute of the object.
+
+    Example:
+        @cached_property
+        @profiled("split")
+        def sentences(self): ...
+
+    Args:
+        stage: name of the stage.
+        items: function returning the number of items in the result of the method. Defaults to len. If None, no
+            items are counted.
+
+    Returns:
+        Callable: the decorator.
+    """
+
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.profiler.stage(stage) as span:
+                result = method(self, *args, **kwargs)
+                if items is not None:
+                    span.items = items(result)
+                return result
+
+        return wrapper
+
+    return decorator
@@ -1,6 +1,10 @@
 import contextlib
 import io
 import sys
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
 
 
 @contextlib.contextmanager
@@ -12,6 +16,29 @@ def no_stdout():
         context: methods called within this context will not return anything.
     """
     save_stdout = sys.stdout
-    sys.stdout = io.BytesIO()
-    yield
-    sys.stdout = save_stdout
+    sys.stdout = io.StringIO()
+    try:
+        yield
+    finally:
+        sys.stdout = save_stdout
+
+
+def chunks(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yields consecutive lists of at most `size` items from the given
+    iterable.
+
+    Example yields:
+        chunks([1, 2, 3, 4, 5], 2) -> [1, 2], [3, 4], [5]
+
+    Args:
+        iterable: any iterable.
+        size: maximum number of items per chunk.
+
+    Yields:
+        List: the next chunk of items.
+    """
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
@@ -15,9 +15,17 @@ setup(
     dependency_links=[],
     description="NLP project which leverages a.o. NLTK and Sklearn to create an (in memory) inverted "
     "index for a collection of .txt-files containing textual data.",
-    install_requires=["nltk", "pandas", "scikit-learn", "cached-property", "requests"],
+    install_requires=[
+        "nltk",
+        "numpy",
+        "pandas",
+        "scipy",
+        "scikit-learn",
+        "cached-property",
+    ],
     name="eigen_tech_project",
-    packages=find_packages(include=["eigen_tech_project"]),
+    packages=find_packages(include=["eigen_tech_project", "eigen_tech_project.*"]),
+    package_data={"eigen_tech_project.nlp": ["data/*.txt"]},
     url="https://github.com/jgeysen/eigen_tech_project",
     version="0.1.0",
 )
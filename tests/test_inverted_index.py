@@ -1,15 +1,24 @@
+import asyncio
+import json
+import subprocess
+import sys
+
 import pandas as pd
 import pytest
 from pandas._testing import assert_frame_equal
 
 from eigen_tech_project.inverted_index import InvertedIndex
 from eigen_tech_project.utils.errors import (
+    DocumentNotInIndexError,
     FileNameContainsNoNumberError,
     FileNumbersNotUniqueError,
+    InvalidSegmenterError,
     NoFilesInDirectoryError,
     NoInterestingSentencesError,
+    NotATXTFileError,
     NoTXTFilesInDirectoryError,
     NoTXTFilesWithContentInDirectoryError,
+    UnsupportedIndexFormatError,
 )
 
 
@@ -135,6 +144,12 @@ def test_InvertedIndex_class(tmp_path):
     lemma_occurrence_exp = [[0], [4], [2], [1], [3], [0], [0]]
     assert ii.lemma_occurrences == lemma_occurrence_exp
 
+    # then ..
+    # ... the postings method should return the sentence ids for a single lemma, taken from the postings matrix:
+    assert ii.postings("despair").tolist() == [4]
+    assert ii.postings("unknown").tolist() == []
+    assert ii.postings_matrix.shape == (8, 7)
+
     # then ..
     # ... the inverted_index property should contain a list of tuples, mapping the vocabulary, frequencies and
     # lemma_occurence:
@@ -297,3 +312,569 @@ def test_InvertedIndex_no_interesting_content_in_files(tmp_path):
     # when ... we create an InvertedIndex object for this mocked path, a NoInterestingSentencesError should be thrown:
     with pytest.raises(NoInterestingSentencesError):
         InvertedIndex(path=d)
+
+
+def test_InvertedIndex_workers(tmp_path):
+    """Test the InvertedIndex class with multiple worker processes."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with three mocked .txt-files:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+    (d / "test_file2.txt").write_text(
+        "In the face of war, you believe there can be peace. In the face of despair, "
+        "you believe there can be hope."
+    )
+    (d / "test_file3.txt").write_text(
+        "The of to and a in is it you. That he was for on are with as I his they."
+    )
+
+    # when ... we create an InvertedIndex object with and without worker processes for this mocked path:
+    ii = InvertedIndex(path=d)
+    ii_parallel = InvertedIndex(path=d, workers=2)
+
+    # then ..
+    # ... both objects should contain the same sentences, vocabulary, document-term matrix and inverted index:
+    assert ii_parallel.processed_sentences == ii.processed_sentences
+    assert ii_parallel.vocabulary == ii.vocabulary
+    assert (ii_parallel.document_term_matrix != ii.document_term_matrix).nnz == 0
+    assert ii_parallel.inverted_index == ii.inverted_index
+    # ... the sentence offsets should be recorded by the workers, saving should not split the documents again:
+    assert ii_parallel.sentence_offsets.tolist() == ii.sentence_offsets.tolist()
+    ii_parallel.save(str(tmp_path / "index"))
+    assert "document_spans" not in ii_parallel.__dict__
+    assert "split" not in ii_parallel.profiler.report()
+
+    # ... reading the files in a single thread should not change the index:
+    ii_single_thread = InvertedIndex(path=d, io_workers=1)
+    assert ii_single_thread.processed_sentences == ii.processed_sentences
+    # ... the time spent in each stage of the build should be recorded:
+    assert {"discover", "read", "split", "pos_tag", "count", "postings"} <= set(
+        ii.timings
+    )
+    report = ii.profiler.report()
+    assert report["split"]["items"] == len(ii.sentences)
+    assert report["lemmatize"]["items"] == len(ii.sentences)
+    assert report["read"]["calls"] == 3
+
+
+def test_InvertedIndex_import_time():
+    """Test the cold import of the inverted_index module."""
+    # given ...
+    # ... a fresh interpreter, in which the functions NLTK uses to find, load and download resources are mocked:
+    code = (
+        "import sys, time\n"
+        "from unittest import mock\n"
+        "start = time.perf_counter()\n"
+        "import nltk\n"
+        "nltk_time = time.perf_counter() - start\n"
+        "with mock.patch('nltk.data.find') as find, mock.patch('nltk.data.load') as load, "
+        "mock.patch('nltk.download') as download:\n"
+        "    start = time.perf_counter()\n"
+        "    import eigen_tech_project.inverted_index\n"
+        "    import_time = time.perf_counter() - start\n"
+        "print(find.call_count, load.call_count, download.call_count)\n"
+        "print('requests' in sys.modules)\n"
+        "print(nltk_time, import_time)\n"
+    )
+    # when ... we import NLTK and then the inverted_index module:
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.split()
+
+    # then ..
+    # ... no NLTK resources should be looked up, loaded or downloaded:
+    assert output[:3] == ["0", "0", "0"]
+    # ... no network requests should be made:
+    assert output[3] == "False"
+    # ... importing the module on top of NLTK should take a fraction of the time it takes to import NLTK (about a
+    # tenth, see the import time target in the README), which does not depend on the speed of the machine:
+    nltk_time, import_time = float(output[4]), float(output[5])
+    assert import_time < 0.5 * nltk_time
+
+
+def test_InvertedIndex_noise(tmp_path):
+    """Test the InvertedIndex class with custom noise words and allowed words."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with two mocked .txt-files:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+    (d / "test_file2.txt").write_text(
+        "In the face of war, you believe there can be peace. In the face of despair, "
+        "you believe there can be hope."
+    )
+
+    # when ... we create an InvertedIndex object with an additional noise word and an allowed common word:
+    ii = InvertedIndex(path=d, noise_words=["journey"], allow_words=["hope"])
+
+    # then ..
+    # ... the noise word should be filtered out and the allowed word should be part of the vocabulary:
+    assert ii.vocabulary == ["brave", "despair", "hope", "peace", "thanks", "today"]
+
+
+def test_InvertedIndex_save_load(tmp_path):
+    """Test persisting and loading the InvertedIndex class."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with two mocked .txt-files:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+    (d / "test_file2.txt").write_text(
+        "In the face of war, you believe there can be peace. In the face of despair, "
+        "you believe there can be hope."
+    )
+    # ... an InvertedIndex object for this mocked path:
+    ii = InvertedIndex(path=d)
+
+    # when ... we save the index and load it again, with and without memory-mapping:
+    ii.save(tmp_path / "index")
+    for ii_loaded in [
+        InvertedIndex.load(tmp_path / "index"),
+        InvertedIndex.load(tmp_path / "index", mmap=False),
+    ]:
+        # then ..
+        # ... the loaded index should contain the same data as the original index:
+        assert ii_loaded.path == str(d)
+        assert ii_loaded.noise == ii.noise
+        assert ii_loaded.sentences == ii.sentences
+        assert ii_loaded.processed_sentences == ii.processed_sentences
+        assert ii_loaded.vocabulary == ii.vocabulary
+        assert ii_loaded.lemma_frequencies == ii.lemma_frequencies
+        assert (ii_loaded.document_term_matrix != ii.document_term_matrix).nnz == 0
+        assert ii_loaded.inverted_index == ii.inverted_index
+        assert_frame_equal(
+            ii_loaded.mapped_inverted_index(), ii.mapped_inverted_index()
+        )
+
+    # when ... the index was saved in an older version of the format:
+    meta = json.loads((tmp_path / "index" / "meta.json").read_text())
+    (tmp_path / "index" / "meta.json").write_text(json.dumps(dict(meta, version=1)))
+    # then ... loading it should raise an UnsupportedIndexFormatError:
+    with pytest.raises(UnsupportedIndexFormatError):
+        InvertedIndex.load(tmp_path / "index")
+
+
+def test_InvertedIndex_types(tmp_path):
+    """Test the types of the lemma frequencies and the inverted index of
+    built, loaded and attached InvertedIndex objects."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with one mocked .txt-file:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+    # ... an InvertedIndex object for this mocked path, which is saved:
+    ii = InvertedIndex(path=d)
+    ii.save(tmp_path / "index")
+
+    # when ... we build the index lazily, load it and attach to it in shared memory:
+    indexes = [
+        ii,
+        InvertedIndex(path=d, lazy=True),
+        InvertedIndex.load(tmp_path / "index"),
+        InvertedIndex.attach(ii.share(str(tmp_path / "segment"))),
+    ]
+
+    # then ...
+    for index in indexes:
+        # ... the lemma frequencies should be a list of python integers:
+        assert type(index.lemma_frequencies) is list
+        assert {type(frequency) for frequency in index.lemma_frequencies} == {int}
+        # ... the inverted index should contain the same types:
+        assert {
+            tuple(type(value) for value in entry) for entry in index.inverted_index
+        } == {(str, int, list)}
+        assert index.inverted_index == ii.inverted_index
+
+
+def test_InvertedIndex_segmenter(tmp_path):
+    """Test the sentence segmenters of the InvertedIndex class."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with two mocked .txt-files:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+    (d / "test_file2.txt").write_text(
+        "In the face of war, you believe there can be peace. In the face of despair, "
+        "you believe there can be hope."
+    )
+
+    # when ... we create InvertedIndex objects with the rule-based segmenter, in one and in multiple processes:
+    ii_rules = InvertedIndex(path=d, segmenter="rules")
+    ii_rules_workers = InvertedIndex(path=d, segmenter="rules", workers=2)
+
+    # then ..
+    # ... the documents should be split in the same sentences:
+    assert ii_rules.sentences == [
+        (
+            1,
+            "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+            "to brave the cold today.",
+        ),
+        (1, "We all made this journey for a reason."),
+        (2, "In the face of war, you believe there can be peace."),
+        (2, "In the face of despair, you believe there can be hope."),
+    ]
+    assert ii_rules_workers.sentences == ii_rules.sentences
+    assert ii_rules.sentence_splitter.mode == "rules"
+    # ... other segmenters are not supported:
+    with pytest.raises(InvalidSegmenterError):
+        InvertedIndex(path=d, segmenter="spacy")
+
+
+def test_InvertedIndex_snippets(tmp_path):
+    """Test the sentence offsets and snippets of the InvertedIndex class."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with two mocked .txt-files, one with windows line
+    # endings and non-ascii characters:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_bytes(
+        "We all made this\r\njourney.\r\nThe café was brave today.".encode("utf-8")
+    )
+    (d / "test_file2.txt").write_text("In the face of despair, you believe in hope.")
+
+    # when ... we create an InvertedIndex object:
+    ii = InvertedIndex(path=d, segmenter="rules")
+
+    # then ..
+    # ... the line endings in the sentences should be translated, as when reading the file as text:
+    assert ii.sentences[0] == (1, "We all made this\njourney.")
+    assert ii.sentences[1] == (1, "The café was brave today.")
+    # ... each sentence should be located by its document id and its byte offsets in the text:
+    assert ii.sentence_offsets.tolist() == [[1, 0, 25], [1, 26, 52], [2, 0, 44]]
+    # ... which should be mapped onto the byte offsets in the file:
+    assert ii.source_files.offsets(1, [0, 25, 26, 52]).tolist() == [0, 26, 28, 54]
+    assert ii.source_files.offsets(2, [0, 44]).tolist() == [0, 44]
+    # ... the sentences should be sliced from the files:
+    assert [ii.snippet(i) for i in range(3)] == [s for _, s in ii.sentences]
+    assert len(ii.source_files) == 2
+    # ... the tokens of a sentence should be located in the file on demand:
+    assert ("journey", 1, 18, 25) in ii.token_offsets(0)
+    assert ("brave", 1, 42, 47) in ii.token_offsets(1)
+    assert ii.highlight(0, ["journey"]) == "We all made this\n<b>journey</b>."
+    # ... the mapped inverted index should refer to the sentences by their offsets:
+    mapped = ii.mapped_inverted_index(offsets=True)
+    assert "sentences" not in mapped
+    assert mapped.set_index("lemma")["offsets"]["journey"] == [(1, 0, 25)]
+    # ... the offsets should be persisted:
+    ii.save(str(tmp_path / "index"))
+    ii_loaded = InvertedIndex.load(str(tmp_path / "index"))
+    assert ii_loaded.sentence_offsets.tolist() == ii.sentence_offsets.tolist()
+    assert ii_loaded.snippet(2) == "In the face of despair, you believe in hope."
+    # ... and recomputed when documents change:
+    (d / "test_file3.txt").write_text("Hope is brave.")
+    ii.add_documents(["test_file3.txt"])
+    assert ii.sentence_offsets.tolist()[-1] == [3, 0, 14]
+    assert "document_spans" not in ii.__dict__
+    assert ii.snippet(3) == "Hope is brave."
+
+
+def test_InvertedIndex_lazy(tmp_path):
+    """Test the lazy mode of the InvertedIndex class."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with two mocked .txt-files:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+    (d / "test_file2.txt").write_text(
+        "In the face of war, you believe there can be peace. In the face of despair, "
+        "you believe there can be hope."
+    )
+    # ... an eagerly built InvertedIndex object for this mocked path:
+    ii = InvertedIndex(path=d)
+
+    # when ... we create a lazy InvertedIndex object for the same path:
+    ii_lazy = InvertedIndex(path=d, lazy=True)
+
+    # then ..
+    # ... nothing should be computed at initialisation:
+    assert "file_names" not in ii_lazy.__dict__
+    # ... the vocabulary and lemma frequencies should be counted without building the document-term matrix:
+    assert ii_lazy.vocabulary == ii.vocabulary
+    assert ii_lazy.lemma_frequencies == ii.lemma_frequencies
+    assert "document_term_matrix" not in ii_lazy.__dict__
+    # ... the other properties should be computed on access, reusing the processed lemmas:
+    assert ii_lazy.inverted_index == ii.inverted_index
+    assert ii_lazy.profiler.report()["process"]["calls"] == 1
+
+
+def test_InvertedIndex_build_cache(tmp_path):
+    """Test rebuilding the InvertedIndex class with a build cache."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with two mocked .txt-files:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+    (d / "test_file2.txt").write_text(
+        "In the face of war, you believe there can be peace. In the face of despair, "
+        "you believe there can be hope."
+    )
+    cache_dir = str(tmp_path / "cache")
+    # ... an InvertedIndex object for this mocked path, filling the build cache:
+    ii = InvertedIndex(path=d, cache_dir=cache_dir)
+    assert ii.build_cache.info["misses"] == 2 and len(ii.build_cache) == 2
+
+    # when ... we rebuild the index with the same cache:
+    ii_cached = InvertedIndex(path=d, cache_dir=cache_dir)
+
+    # then ..
+    # ... no sentences should be processed and the index should be the same:
+    assert ii_cached.build_cache.info["hit_rate"] == 1.0
+    assert ii_cached.profiler.report()["process"]["items"] == 0
+    assert ii_cached.processed_sentences == ii.processed_sentences
+    assert ii_cached.inverted_index == ii.inverted_index
+    # ... after changing one file, only the sentences of that file should be processed:
+    (d / "test_file2.txt").write_text(
+        "In the face of despair, you believe there can be hope."
+    )
+    ii_changed = InvertedIndex(path=d, cache_dir=cache_dir)
+    assert ii_changed.profiler.report()["process"]["items"] == 1
+    assert ii_changed.inverted_index == InvertedIndex(path=d).inverted_index
+    # ... other noise words should not use the cached sentences:
+    ii_noise = InvertedIndex(path=d, cache_dir=cache_dir, noise_words=["despair"])
+    assert ii_noise.build_cache.info["hits"] == 0
+
+
+def test_InvertedIndex_share_attach(tmp_path):
+    """Test sharing the InvertedIndex class between processes."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with two mocked .txt-files:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+    (d / "test_file2.txt").write_text(
+        "In the face of war, you believe there can be peace. In the face of despair, "
+        "you believe there can be hope."
+    )
+    # ... an InvertedIndex object for this mocked path:
+    ii = InvertedIndex(path=d)
+
+    # when ... we publish the index in shared memory and attach to it:
+    path = ii.share(str(tmp_path / "segment"))
+    ii_attached = InvertedIndex.attach(path)
+
+    # then ..
+    # ... the attached index should contain the same data as the original index:
+    assert ii_attached.sentences == ii.sentences
+    assert ii_attached.processed_sentences == ii.processed_sentences
+    assert ii_attached.vocabulary == ii.vocabulary
+    assert (ii_attached.postings_matrix != ii.postings_matrix).nnz == 0
+    assert ii_attached.inverted_index == ii.inverted_index
+    assert ii_attached.lemma_frequencies == ii.lemma_frequencies
+    # ... its arrays should be read-only views of the segment:
+    assert not ii_attached.document_term_matrix.data.flags.writeable
+    assert not ii_attached.postings_matrix.indices.flags.writeable
+    assert not ii_attached.lemma_frequency_array.flags.writeable
+    # ... including the structures built for searching, which should give the same results:
+    assert not ii_attached.term_dictionary.table.flags.writeable
+    assert not ii_attached.query_engine.positions.flags.writeable
+    assert not ii_attached.ranker.document_matrix.data.flags.writeable
+    assert not ii_attached.ranker.sentence_lengths[0].flags.writeable
+    assert ii_attached.query("peace OR journey").sentences.tolist() == (
+        ii.query("peace OR journey").sentences.tolist()
+    )
+    assert ii_attached.query('"face despair"').sentences.tolist() == (
+        ii.query('"face despair"').sentences.tolist()
+    )
+    for level in ["sentence", "document"]:
+        assert ii_attached.rank("peace hope", level=level) == ii.rank(
+            "peace hope", level=level
+        )
+    # ... another process should be able to attach to the segment, even after it is removed:
+    code = (
+        "import sys, os\n"
+        "from eigen_tech_project.inverted_index import InvertedIndex\n"
+        "ii = InvertedIndex.attach(sys.argv[1])\n"
+        "os.remove(sys.argv[1])\n"
+        "columns = [ii.term_dictionary[lemma] for lemma in ii.vocabulary]\n"
+        "assert columns == list(range(len(ii.vocabulary)))\n"
+        "print(ii.vocabulary[0], ii.postings(ii.vocabulary[0]).tolist())\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code, path], capture_output=True, text=True, check=True
+    ).stdout.split(maxsplit=1)
+    assert output == [ii.vocabulary[0], str(ii.inverted_index[0][2]) + "\n"]
+
+
+def test_InvertedIndex_incremental_updates(tmp_path):
+    """Test adding, updating and removing documents in the InvertedIndex class."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with one mocked .txt-file:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    p1 = d / "test_file1.txt"
+    p1.write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+    # ... an InvertedIndex object for this mocked path:
+    ii = InvertedIndex(path=d)
+
+    def assert_index_equal(ii_updated, ii_scratch):
+        assert set(ii_updated.file_names) == set(ii_scratch.file_names)
+        assert ii_updated.processed_sentences == ii_scratch.processed_sentences
+        assert ii_updated.vocabulary == ii_scratch.vocabulary
+        assert ii_updated.lemma_frequencies == ii_scratch.lemma_frequencies
+        assert ii_updated.inverted_index == ii_scratch.inverted_index
+
+    # when ... we add a mocked file to the folder and to the index:
+    (d / "test_file2.txt").write_text(
+        "In the face of war, you believe there can be peace. In the face of despair, "
+        "you believe there can be hope."
+    )
+    ii.add_documents(["test_file2.txt"])
+    # then ... the updated index should be identical to an index built from scratch:
+    assert_index_equal(ii, InvertedIndex(path=d))
+
+    # when ... we change the contents of the first file and update the index:
+    p1.write_text("It's humbling to brave the cold today.")
+    ii.update_document("test_file1.txt")
+    # then ... the updated index should be identical to an index built from scratch:
+    assert_index_equal(ii, InvertedIndex(path=d))
+    assert "journey" not in ii.vocabulary
+
+    # when ... we remove the first file from the folder and from the index:
+    p1.unlink()
+    ii.remove_document("test_file1.txt")
+    # then ... the updated index should be identical to an index built from scratch:
+    assert_index_equal(ii, InvertedIndex(path=d))
+
+    # then ...
+    # ... removing a file which is not part of the index should raise a DocumentNotInIndexError:
+    with pytest.raises(DocumentNotInIndexError):
+        ii.remove_document("test_file1.txt")
+    # ... adding a file with a number which is already in use should raise a FileNumbersNotUniqueError:
+    with pytest.raises(FileNumbersNotUniqueError):
+        ii.add_documents(["test_file2.txt"])
+
+    # when ... we add two files with the same number to the folder:
+    (d / "test_file3.txt").write_text("We all made this journey for a reason.")
+    (d / "test_file_3.txt").write_text("It's humbling to brave the cold today.")
+    # then ...
+    # ... adding both in one batch should raise a FileNumbersNotUniqueError, as building from scratch would:
+    with pytest.raises(FileNumbersNotUniqueError):
+        ii.add_documents(["test_file3.txt", "test_file_3.txt"])
+    with pytest.raises(FileNumbersNotUniqueError):
+        InvertedIndex(path=d)
+    # ... and should leave the index unchanged:
+    assert ii.file_names == ["test_file2.txt"]
+    # ... adding a file which is not a .txt-file should raise a NotATXTFileError:
+    (d / "test_file4.csv").write_text("We all made this journey for a reason.")
+    with pytest.raises(NotATXTFileError):
+        ii.add_documents(["test_file4.csv"])
+
+
+def test_InvertedIndex_async(tmp_path):
+    """Test building, querying and updating the InvertedIndex class from asyncio."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with one mocked .txt-file:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+
+    async def scenario():
+        # when ... we build InvertedIndex objects in the event loop, concurrently:
+        stdout = sys.stdout
+        ii, _ = await asyncio.gather(
+            InvertedIndex.abuild(d, io_workers=2),
+            InvertedIndex.abuild(d, lazy=True),
+        )
+        # then ...
+        # ... the builds should not redirect the output of the process:
+        assert sys.stdout is stdout
+        # ... the index should be identical to an index built synchronously:
+        assert ii.inverted_index == InvertedIndex(path=d).inverted_index
+        snapshot = ii.snapshot
+
+        # when ... we add a file while queries are running:
+        (d / "test_file2.txt").write_text(
+            "In the face of war, you believe there can be peace."
+        )
+        before, _, after = await asyncio.gather(
+            ii.aquery("journey OR peace"),
+            ii.aadd_documents(["test_file2.txt"]),
+            ii.aquery("journey OR peace"),
+        )
+        # then ...
+        # ... queries started before the update should only see the old index, later queries the new index:
+        assert before.documents.tolist() == [1]
+        assert (await ii.aquery("journey OR peace")).documents.tolist() == [1, 2]
+        assert after.documents.tolist() in ([1], [1, 2])
+        # ... the snapshot taken before the update should not change:
+        assert snapshot.query("peace").documents.tolist() == []
+        assert ii.query("peace").documents.tolist() == [2]
+        ranking = await ii.arank("peace", level="document")
+        assert [document for document, _ in ranking] == [2]
+        # ... the updated index should be identical to an index built from scratch:
+        assert ii.inverted_index == InvertedIndex(path=d).inverted_index
+
+        # when ... we remove the first file:
+        await ii.aremove_document("test_file1.txt")
+        # then ... it should no longer be found:
+        assert (await ii.aquery("journey")).documents.tolist() == []
+
+    asyncio.run(scenario())
+
+
+def test_InvertedIndex_streaming(tmp_path):
+    """Test the InvertedIndex class in streaming mode."""
+    # given ...
+    # ... a mocked path containing a folder called "test_data" with two mocked .txt-files:
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason."
+    )
+    (d / "test_file2.txt").write_text(
+        "In the face of war, you believe there can be peace. In the face of despair, "
+        "you believe there can be hope."
+    )
+
+    # when ... we create an InvertedIndex object in streaming mode, with a tiny memory limit:
+    ii = InvertedIndex(path=d)
+    ii_streaming = InvertedIndex(
+        path=d, streaming=True, memory_limit=16, spill_dir=tmp_path
+    )
+
+    # then ..
+    # ... both objects should contain the same sentences, vocabulary, document-term matrix and inverted index:
+    assert ii_streaming.sentences == ii.sentences
+    assert ii_streaming.processed_sentences == ii.processed_sentences
+    assert ii_streaming.vocabulary == ii.vocabulary
+    assert (ii_streaming.document_term_matrix != ii.document_term_matrix).nnz == 0
+    assert ii_streaming.inverted_index == ii.inverted_index
+    assert_frame_equal(ii_streaming.mapped_inverted_index(), ii.mapped_inverted_index())
+    # ... the sentence offsets should be recorded while streaming, saving should not read the documents again:
+    assert ii_streaming.sentence_offsets.tolist() == ii.sentence_offsets.tolist()
+    ii_streaming.save(str(tmp_path / "index"))
+    assert "raw_data" not in ii_streaming.__dict__
+    assert ii_streaming.profiler.report()["read"]["calls"] == 2
@@ -1,4 +1,18 @@
-from eigen_tech_project.nlp.processing import Lemmatizer, SentenceProcessor
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+from eigen_tech_project.nlp.models import ensure_resource
+from eigen_tech_project.nlp.processing import (
+    LemmaCache,
+    Lemmatizer,
+    SentenceProcessor,
+    build_noise,
+    load_common_words,
+)
+from eigen_tech_project.nlp.segmentation import SentenceSegmenter
+from eigen_tech_project.utils.errors import InvalidSegmenterError, MissingResourceError
 
 
 def test_Lemmatizer_lemmas():
@@ -183,3 +197,203 @@ def test_SentenceProcessor():
 
     # ... the processed_sentence property should contain a concatenation of the lemmatized_sentence_no_stop:
     assert sp.processed_sentence == "thanks brave today"
+
+
+def test_Lemmatizer_lemmas_many():
+    # given ...
+    # ... two tokenized sentences:
+    tokenized_sentences = [["hello", "I", "am", "an", "engineer"], ["hello"]]
+    # ... an instance of the Lemmatizer class:
+    lemmatizer = Lemmatizer()
+
+    # then ..
+    # ... the lemmas_many method should return the same lemmas as the lemmas method, for each sentence:
+    assert lemmatizer.lemmas_many(tokenized_sentences) == [
+        lemmatizer.lemmas(tokenized_sentence)
+        for tokenized_sentence in tokenized_sentences
+    ]
+
+
+def test_SentenceProcessor_process_many():
+    # given ...
+    # ... a number of test sentences:
+    test_sentences = [
+        "Let me begin by saying thanks to all you who have traveled, from far "
+        "and wide, to brave the cold today.",
+        "We all made this journey for a reason.",
+        "The of to and a in is it you.",
+        "",
+    ]
+
+    # then ..
+    # ... process_many should return the same processed sentences as processing the sentences one by one,
+    # ... regardless of the chunk size:
+    processed_exp = [
+        SentenceProcessor(sentence).processed_sentence for sentence in test_sentences
+    ]
+    assert SentenceProcessor.process_many(test_sentences) == processed_exp
+    assert SentenceProcessor.process_many(test_sentences, chunk_size=3) == processed_exp
+    assert processed_exp[:3] == ["thanks brave today", "journey", ""]
+
+
+def test_LemmaCache(tmp_path):
+    # given ...
+    # ... an instance of the LemmaCache class which can hold 2 lemmas:
+    cache = LemmaCache(maxsize=2)
+
+    # when ... we store 3 lemmas, after looking up the first one:
+    cache.put(("dogs", "n"), "dog")
+    cache.put(("am", "v"), "be")
+    assert cache.get(("dogs", "n")) == "dog"
+    cache.put(("cats", "n"), "cat")
+
+    # then ..
+    # ... the least recently used lemma should be evicted:
+    assert cache.get(("am", "v")) is None
+    assert cache.get(("cats", "n")) == "cat"
+    assert cache.info == {
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+        "size": 2,
+        "maxsize": 2,
+    }
+
+    # when ... we persist the cache and pre-warm a new cache with the persisted file:
+    path = tmp_path / "lemmas.json"
+    cache.dump(path)
+    warm_cache = LemmaCache()
+    warm_cache.load(path)
+
+    # then ..
+    # ... the new cache should contain the same lemmas:
+    assert warm_cache.lemmas == cache.lemmas
+
+
+def test_LemmaCache_threads():
+    # given ...
+    # ... an instance of the LemmaCache class which can hold fewer lemmas than are looked up below:
+    cache = LemmaCache(maxsize=8)
+
+    # when ... several threads look up and store lemmas concurrently, evicting each other's entries:
+    def work(thread):
+        for i in range(2000):
+            key = ("word{}".format((i * 7 + thread) % 32), "n")
+            if cache.get(key) is None:
+                cache.put(key, key[0])
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(work, range(8)))
+
+    # then ..
+    # ... no lookup should fail and the counters should add up:
+    info = cache.info
+    assert info["hits"] + info["misses"] == 8 * 2000
+    assert info["size"] == 8
+    assert info["evictions"] <= info["misses"] - 8
+
+
+def test_Lemmatizer_cache():
+    # given ...
+    # ... an instance of the Lemmatizer class with its own cache:
+    cache = LemmaCache()
+    lemmatizer = Lemmatizer(cache=cache)
+
+    # when ... we lemmatize the same token twice:
+    assert lemmatizer.get_lemma(("am", "VBP")) == "be"
+    assert lemmatizer.get_lemma(("am", "VBP")) == "be"
+
+    # then ..
+    # ... the second lemma should be served from the cache:
+    assert cache.info["misses"] == 1
+    assert cache.info["hits"] == 1
+
+    # ... and Lemmatizer instances without their own cache should share the default cache:
+    assert Lemmatizer().cache is Lemmatizer().cache
+
+
+def test_SentenceProcessor_noise(tmp_path):
+    # given ...
+    # ... the bundled list of common words:
+    common_words = load_common_words()
+    assert len(common_words) == 1000
+    assert "people" in common_words
+
+    # ... a file with a custom list of common words:
+    p = tmp_path / "common_words.txt"
+    p.write_text("brave\ntoday\n")
+    # ... a test_sentence:
+    test_sentence = "Let me begin by saying thanks to all you, to brave the cold today."
+
+    # then ..
+    # ... the default noise should be built once and shared by all SentenceProcessor instances:
+    assert SentenceProcessor(test_sentence).processed_sentence == "thanks brave today"
+    assert SentenceProcessor("").noise is SentenceProcessor("").noise
+
+    # ... the custom common words should be filtered out instead of the bundled list:
+    noise = build_noise(common_words=load_common_words(p))
+    sp = SentenceProcessor(test_sentence, noise=noise)
+    assert sp.processed_sentence == "let begin say thanks cold"
+    assert SentenceProcessor.process_many([test_sentence], noise=noise) == [
+        "let begin say thanks cold"
+    ]
+
+    # ... additional noise words should be filtered out and allowed words should be kept:
+    noise = build_noise(noise_words=["thanks"], allow_words=["cold", "begin"])
+    sp = SentenceProcessor(test_sentence, noise=noise)
+    assert sp.processed_sentence == "begin brave cold today"
+
+
+def test_SentenceSegmenter():
+    # given ...
+    # ... a text with abbreviations, quotes, decimals, an empty line and non-ASCII characters:
+    text = (
+        'He said "stop!" Then he left. Pi is 3.14 today.\n\n'
+        "A title without punctuation\n\nMr. Héllo wörld?  Yes"
+    )
+    # ... an instance of the SentenceSegmenter class for both modes:
+    punkt = SentenceSegmenter()
+    rules = SentenceSegmenter("rules")
+
+    # then ..
+    # ... the rule-based segmenter should split on terminal punctuation followed by whitespace and on empty lines:
+    assert rules.tokenize(text) == [
+        'He said "stop!"',
+        "Then he left.",
+        "Pi is 3.14 today.",
+        "A title without punctuation",
+        "Mr.",
+        "Héllo wörld?",
+        "Yes",
+    ]
+    # ... both segmenters should return the offsets of the sentences they split:
+    for segmenter in [punkt, rules]:
+        spans = segmenter.span_tokenize(text)
+        assert [text[start:end] for start, end in spans] == segmenter.tokenize(text)
+        # ... the sentences of a batch of texts should be gathered by their offsets:
+        counts, sentences = segmenter.split_many([text, "", text])
+        assert counts.tolist() == [len(spans), 0, len(spans)]
+        assert list(sentences) == segmenter.tokenize(text) * 2
+    # ... the Punkt segmenter should split like NLTK's Punkt model, which is loaded once:
+    assert punkt.punkt is SentenceSegmenter().punkt
+    assert punkt.tokenize(text) == punkt.punkt.tokenize(text)
+    # ... other modes are not supported:
+    with pytest.raises(InvalidSegmenterError):
+        SentenceSegmenter("spacy")
+
+
+def test_ensure_resource():
+    # given ...
+    # ... an NLTK resource which can not be found:
+    ensure_resource.cache_clear()
+    with mock.patch("nltk.data.find", side_effect=LookupError), mock.patch(
+        "nltk.download"
+    ) as download:
+        # then ..
+        # ... a MissingResourceError should be raised, without downloading the resource:
+        with pytest.raises(MissingResourceError):
+            ensure_resource("wordnet")
+        assert download.call_count == 0
+    # ... the resource should be found again once it is installed:
+    ensure_resource.cache_clear()
+    ensure_resource("wordnet")
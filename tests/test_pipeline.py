@@ -0,0 +1,209 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer
+
+from eigen_tech_project.pipeline.counting import count_lemmas
+from eigen_tech_project.pipeline.incremental import apply_changes, splice_count_matrices
+from eigen_tech_project.pipeline.ingest import iter_files, read_files, scan_directory
+from eigen_tech_project.pipeline.parallel import (
+    merge_count_matrices,
+    process_shard,
+    shard_documents,
+)
+from eigen_tech_project.pipeline.streaming import CountMatrixBuilder
+from eigen_tech_project.utils.profiling import Profiler
+
+
+def test_shard_documents():
+    # given ...
+    # ... a list of documents:
+    documents = [(1, "aaaa"), (2, "bb"), (3, "cc"), (4, "dddd")]
+
+    # then ..
+    # ... the shards should be contiguous, of roughly equal text size and cover all documents in order:
+    shards = shard_documents(documents, 2)
+    assert shards == [[(1, "aaaa"), (2, "bb")], [(3, "cc"), (4, "dddd")]]
+    assert shard_documents(documents, 1) == [documents]
+
+
+def test_merge_count_matrices():
+    # given ...
+    # ... two partial vocabularies and count matrices:
+    parts = [
+        (["brave", "today"], csr_matrix(np.array([[1, 2], [0, 1]]))),
+        (["peace", "today"], csr_matrix(np.array([[3, 0]]))),
+    ]
+
+    # when ... we merge them:
+    vocabulary, matrix = merge_count_matrices(parts)
+
+    # then ..
+    # ... the vocabulary should be ordered alphabetically and the rows should be stacked on that vocabulary:
+    assert vocabulary == ["brave", "peace", "today"]
+    assert matrix.toarray().tolist() == [[1, 0, 2], [0, 0, 1], [0, 3, 0]]
+
+
+def test_splice_count_matrices():
+    # given ...
+    # ... two partial vocabularies and count matrices:
+    parts = [
+        (
+            ["brave", "cold", "today"],
+            csr_matrix(np.array([[1, 0, 2], [0, 1, 0], [0, 0, 1]])),
+        ),
+        (["peace", "today"], csr_matrix(np.array([[3, 0], [1, 1]]))),
+    ]
+
+    # when ... we splice the last row of the second matrix between the first and the last row of the first matrix:
+    vocabulary, matrix = splice_count_matrices(parts, [(0, 0, 1), (1, 1, 2), (0, 2, 3)])
+
+    # then ..
+    # ... the vocabulary should only contain the lemmas of the spliced rows, ordered alphabetically:
+    assert vocabulary == ["brave", "peace", "today"]
+    # ... the rows should be stacked in the given order on that vocabulary:
+    assert matrix.toarray().tolist() == [[1, 0, 2], [0, 1, 1], [0, 0, 1]]
+    assert matrix.has_sorted_indices
+
+
+def test_apply_changes():
+    # given ...
+    # ... a few documents and the processed sentences, offsets, vocabulary and matrix of their sentences:
+    documents = {
+        2: "We all made this journey for a reason. It's humbling to brave the cold today.",
+        4: "In the face of war, you believe there can be peace.",
+        5: "In the face of despair, you believe there can be hope.",
+        7: "Let me begin by saying thanks to all you who've traveled, from far and wide.",
+    }
+    rows, offsets, vocabulary, matrix = process_shard(sorted(documents.items()))
+
+    # when ... we remove, replace and add documents in front of, between and after the current documents:
+    changes = {
+        1: "The journey was brave.",
+        5: "We all made this journey.",
+        6: "Peace today.",
+        9: "Hope for the cold.",
+    }
+    updated = apply_changes(
+        rows, offsets, vocabulary, matrix, {4, 5}, list(changes.items())
+    )
+
+    # then ... the result should be identical to processing the resulting documents from scratch:
+    del documents[4]
+    documents.update(changes)
+    expected = process_shard(sorted(documents.items()))
+    assert updated[0] == expected[0]
+    assert updated[1].tolist() == expected[1].tolist()
+    assert updated[2] == expected[2]
+    assert updated[3].toarray().tolist() == expected[3].toarray().tolist()
+
+
+def test_count_lemmas():
+    # given ...
+    # ... the lemmas of a number of sentences, including single letter lemmas and a sentence without lemmas:
+    sentences = [["today", "brave", "today"], [], ["peace", "x"], ["brave", "peace"]]
+
+    # when ... we count them:
+    vocabulary, matrix = count_lemmas(sentences)
+
+    # then ..
+    # ... the vocabulary and matrix should be those of a CountVectorizer fitted on the processed sentences:
+    count_vectorizer = CountVectorizer()
+    expected = count_vectorizer.fit_transform([" ".join(s) for s in sentences])
+    assert vocabulary == sorted(count_vectorizer.vocabulary_)
+    assert vocabulary == ["brave", "peace", "today"]
+    assert matrix.toarray().tolist() == expected.toarray().tolist()
+    assert matrix.has_sorted_indices
+    # ... sentences without any lemmas should give an empty vocabulary:
+    vocabulary, matrix = count_lemmas([[], ["x"]])
+    assert vocabulary == []
+    assert matrix.shape == (2, 0)
+
+
+def test_CountMatrixBuilder(tmp_path):
+    # given ...
+    # ... an instance of the CountMatrixBuilder class which spills postings after 16 bytes:
+    builder = CountMatrixBuilder(str(tmp_path), memory_limit=16)
+
+    # when ... we add a number of sentences:
+    sentences = [["today", "brave", "today"], [], ["peace"], ["brave", "peace"]]
+    for lemmas in sentences:
+        builder.add(lemmas)
+    vocabulary, matrix = builder.finish()
+
+    # then ..
+    # ... the postings should have been spilled to disk:
+    assert len(builder.spills) == 2
+    # ... the vocabulary should be ordered alphabetically and the matrix should contain the counts:
+    assert vocabulary == ["brave", "peace", "today"]
+    assert matrix.toarray().tolist() == [[1, 0, 2], [0, 0, 0], [0, 1, 0], [1, 1, 0]]
+    assert matrix.has_sorted_indices
+
+
+def test_CountMatrixBuilder_memory(tmp_path):
+    # given ...
+    # ... an instance of the CountMatrixBuilder class which spills postings after 64 kilobytes:
+    builder = CountMatrixBuilder(str(tmp_path), memory_limit=2**16)
+    # ... 2000 sentences of 100 distinct lemmas each, 3.2 megabytes of postings:
+    rng = np.random.default_rng(0)
+    sentences = [
+        ["lemma{}".format(i) for i in rng.choice(1000, 100, replace=False)]
+        for _ in range(2000)
+    ]
+    for lemmas in sentences:
+        builder.add(lemmas)
+    postings_size = 2000 * 100 * 16
+
+    # when ... we finish the matrix while tracing the memory allocated:
+    profiler = Profiler(trace_memory=True)
+    with profiler.stage("finish"):
+        vocabulary, matrix = builder.finish()
+
+    # then ..
+    # ... the spilled postings should be merged without holding them in memory:
+    assert len(builder.spills) > 10
+    assert profiler.report()["finish"]["peak_memory"] < postings_size / 4
+    # ... the matrix should contain the counts:
+    assert matrix.nnz == 2000 * 100
+    assert matrix.has_sorted_indices
+    assert matrix[5].indices.tolist() == sorted(
+        vocabulary.index(lemma) for lemma in sentences[5]
+    )
+
+
+def test_scan_directory(tmp_path):
+    # given ...
+    # ... a folder with a .txt-file, an empty .txt-file, another file and a subfolder:
+    (tmp_path / "file1.txt").write_text("brave")
+    (tmp_path / "file2.txt").write_text("")
+    (tmp_path / "notes.md").write_text("journey")
+    (tmp_path / "folder.txt").mkdir()
+
+    # then ..
+    # ... only the files should be listed, with the size of the .txt-files:
+    assert sorted(scan_directory(tmp_path)) == [
+        ("file1.txt", 5),
+        ("file2.txt", 0),
+        ("notes.md", -1),
+    ]
+    assert sorted(scan_directory(tmp_path, io_workers=1)) == sorted(
+        scan_directory(tmp_path)
+    )
+
+
+def test_read_files(tmp_path):
+    # given ...
+    # ... a folder with more files than files read concurrently:
+    file_names = ["file{}.txt".format(i) for i in range(20)]
+    for i, file_name in enumerate(file_names):
+        (tmp_path / file_name).write_text("sentence {}".format(i))
+    contents = ["sentence {}".format(i) for i in range(20)]
+
+    # then ..
+    # ... the contents should be returned in the order of the file names, with or without threads:
+    assert read_files(tmp_path, file_names, io_workers=3) == contents
+    assert read_files(tmp_path, file_names, io_workers=1) == contents
+    assert list(iter_files(tmp_path, reversed(file_names))) == contents[::-1]
+    # ... reading a missing file should raise:
+    with pytest.raises(FileNotFoundError):
+        read_files(tmp_path, ["missing.txt"], io_workers=2)
@@ -0,0 +1,171 @@
+import numpy as np
+import pytest
+
+from eigen_tech_project.inverted_index import InvertedIndex
+from eigen_tech_project.search.dictionary import TermDictionary
+from eigen_tech_project.search.query import intersect, within_window
+from eigen_tech_project.storage.strings import StringStore
+from eigen_tech_project.utils.errors import InvalidQueryError, InvalidRankingOptionError
+
+
+@pytest.fixture
+def inverted_index(tmp_path):
+    # a mocked path containing a folder called "test_data" with two mocked .txt-files, resulting in the processed
+    # sentences: "thanks brave today", "journey", "humble", "peace", "despair" and "":
+    d = tmp_path / "test_data"
+    d.mkdir()
+    (d / "test_file1.txt").write_text(
+        "Let me begin by saying thanks to all you who've traveled, from far and wide, "
+        "to brave the cold today. We all made this journey for a reason. It's humbling, "
+        "but in my heart I know you didn't come here just for me."
+    )
+    (d / "test_file2.txt").write_text(
+        "In the face of war, you believe there can be peace. In the face of despair, "
+        "you believe there can be hope. But let me tell you how I came to be here."
+    )
+    return InvertedIndex(path=d)
+
+
+def test_intersect():
+    # given ...
+    # ... two sorted arrays of unique ids, one much longer than the other:
+    a = np.array([3, 40, 77])
+    b = np.arange(0, 100, 2)
+
+    # then ..
+    # ... the intersection should contain the ids in both arrays, regardless of their order:
+    assert intersect(a, b).tolist() == [40]
+    assert intersect(b, a).tolist() == [40]
+    assert intersect(b[:10], b[5:12]).tolist() == [10, 12, 14, 16, 18]
+    assert intersect(a[:0], b).tolist() == []
+
+
+def test_within_window():
+    # given ...
+    # ... the positions of two terms in a sentence:
+    positions = [np.array([1, 6]), np.array([3, 9])]
+
+    # then ..
+    # ... the terms should be found within a window covering one position of each term:
+    assert within_window(positions, 3, ordered=True)
+    assert not within_window(positions, 2, ordered=True)
+    assert not within_window(positions[::-1], 3, ordered=True)
+    assert within_window(positions[::-1], 3, ordered=False)
+    # ... a term which is repeated should be picked at distinct positions:
+    assert not within_window([np.array([4])], 3, ordered=False, counts=[2])
+    assert within_window([np.array([4, 6])], 3, ordered=False, counts=[2])
+    assert not within_window([np.array([4, 7])], 3, ordered=False, counts=[2])
+
+
+def test_TermDictionary():
+    # given ...
+    # ... a sorted vocabulary, stored in a list and in a StringStore:
+    vocabulary = [
+        "engine",
+        "engineer",
+        "engineering",
+        "enginf",
+        "peace",
+        "piece",
+        "ünï",
+    ]
+    for terms in [vocabulary, StringStore.from_strings(vocabulary)]:
+        # when ...
+        # ... the term dictionary of the vocabulary is built:
+        dictionary = TermDictionary(terms)
+
+        # then ..
+        # ... each term should map to its column, other keys should not be in the dictionary:
+        assert len(dictionary) == len(vocabulary)
+        assert [dictionary[term] for term in vocabulary] == list(range(len(vocabulary)))
+        assert dict(dictionary) == {term: i for i, term in enumerate(vocabulary)}
+        assert "engin" not in dictionary and 0 not in dictionary
+        assert dictionary.get("war") is None
+        # ... prefixes should map to the range of columns of the terms starting with the prefix:
+        assert dictionary.prefix("engine") == range(0, 3)
+        assert dictionary.prefix("") == range(0, 7)
+        assert dictionary.prefix("x") == range(6, 6)
+        # ... patterns should expand to the matching terms:
+        assert dictionary.expand("engine*") == ["engine", "engineer", "engineering"]
+        assert dictionary.expand("engine?") == []
+        assert dictionary.expand("p[ei]*ce") == ["peace", "piece"]
+        assert dictionary.expand("*e") == ["engine", "peace", "piece"]
+        assert dictionary.expand("ün*") == ["ünï"]
+        assert dictionary.expand("peace") == ["peace"]
+        assert dictionary.expand("pea") == []
+
+    # ... an empty dictionary should contain nothing:
+    assert "peace" not in TermDictionary([])
+
+
+def test_InvertedIndex_query(inverted_index):
+    def sentences(query):
+        return inverted_index.query(query).sentences.tolist()
+
+    # then ..
+    # ... words should be normalized in the same way as the sentences:
+    assert sentences("peace") == [3]
+    assert sentences("Thanks") == [0]
+    assert inverted_index.query("peace OR despair").documents.tolist() == [2]
+    # ... boolean operators and parentheses should be supported, adjacent words are combined with AND:
+    assert sentences("brave today") == [0]
+    assert sentences("brave AND journey") == []
+    assert sentences("peace OR journey") == [1, 3]
+    assert sentences("NOT peace") == [0, 1, 2, 4, 5]
+    assert sentences("(peace OR journey OR despair) AND NOT despair") == [1, 3]
+    # ... phrases should match lemmas next to each other, in order:
+    assert sentences('"brave today"') == [0]
+    assert sentences('"today brave"') == []
+    assert sentences('"thanks today"') == []
+    # ... proximity queries should match lemmas within the window, in any order:
+    assert sentences('"today brave"~0') == [0]
+    assert sentences('"thanks today"~1') == [0]
+    # ... a lemma repeated in a proximity query should not match the same position twice:
+    assert sentences('"peace peace"~3') == []
+    # ... wildcards should match any lemma in the vocabulary matching the pattern:
+    assert sentences("jour*") == [1]
+    assert sentences("*e") == [0, 2, 3]
+    assert sentences("Pea?e OR desp*") == [3, 4]
+    assert sentences("unicorn*") == []
+    assert inverted_index.expand("hum") == ["humble"]
+    assert inverted_index.expand("t*s") == ["thanks"]
+    # ... words which are noise should be ignored:
+    assert sentences("the") == []
+    assert sentences("peace OR the") == [3]
+    assert sentences("") == []
+
+    # ... invalid queries should raise an InvalidQueryError:
+    for query in ["(peace", "peace AND", "OR peace", "()"]:
+        with pytest.raises(InvalidQueryError):
+            inverted_index.query(query)
+
+
+def test_InvertedIndex_rank(inverted_index):
+    # then ..
+    # ... only sentences containing a lemma of the query should be ranked, best first and ties on the lowest id:
+    ranking = inverted_index.rank("peace despair journey")
+    assert [sentence for sentence, _ in ranking] == [1, 3, 4]
+    assert len({score for _, score in ranking}) == 1
+    # ... lemmas in a short sentence should score higher than in a long sentence:
+    ranking = dict(inverted_index.rank("peace brave"))
+    assert ranking[3] > ranking[0] > 0
+    # ... repeating a lemma in the query should increase its weight:
+    ranking = dict(inverted_index.rank("peace peace brave", scoring="tfidf"))
+    assert ranking[3] == pytest.approx(2 * ranking[0])
+    # ... k should bound the number of results:
+    assert inverted_index.rank("peace despair journey", k=2) == (
+        inverted_index.rank("peace despair journey")[:2]
+    )
+    # ... ranking sentences should not build the document level matrix:
+    assert "document_matrix" not in inverted_index.ranker.__dict__
+    # ... documents should be scored on the lemmas of all their sentences:
+    ranking = inverted_index.rank("journey despair peace", level="document")
+    assert [document for document, _ in ranking] == [2, 1]
+    # ... unknown lemmas and noise should not match anything:
+    assert inverted_index.rank("unicorn the") == []
+
+    # ... invalid options should raise an InvalidRankingOptionError:
+    with pytest.raises(InvalidRankingOptionError):
+        inverted_index.rank("peace", scoring="pagerank")
+    with pytest.raises(InvalidRankingOptionError):
+        inverted_index.rank("peace", level="paragraph")
@@ -0,0 +1,273 @@
+import numpy as np
+import pytest
+from scipy.sparse import csc_matrix
+
+from eigen_tech_project.storage.cache import BuildCache
+from eigen_tech_project.storage.postings import (
+    BLOCK_SIZE,
+    CompressedPostings,
+    decode_varints,
+    encode_varints,
+)
+from eigen_tech_project.storage.sentences import (
+    SentenceStore,
+    concatenate_offsets,
+    document_offsets,
+)
+from eigen_tech_project.storage.strings import (
+    StringStore,
+    TupleView,
+    as_columns,
+    merge_ranges,
+    utf8_offsets,
+)
+from eigen_tech_project.utils.profiling import Profiler
+
+
+def test_StringStore():
+    # given ...
+    # ... a list of strings, including an empty string and non-ascii characters:
+    strings = ["brave", "", "café", "today"]
+    # ... a StringStore containing these strings:
+    store = StringStore.from_strings(strings)
+    assert isinstance(store, StringStore)
+
+    # then ..
+    # ... the store should behave like a read-only list of the strings:
+    assert len(store) == 4
+    assert store[2] == "café"
+    assert store[-1] == "today"
+    assert store[1:3] == ["", "café"]
+    assert list(store) == strings
+    assert store == strings
+    assert store != strings[:3]
+    with pytest.raises(IndexError):
+        store[4]
+
+    # ... the strings should be stored as one UTF-8 buffer and offsets into that buffer:
+    assert store.buffer.tobytes() == "bravecafétoday".encode("utf-8")
+    assert store.offsets.tolist() == [0, 5, 5, 10, 15]
+
+
+def test_TupleView():
+    # given ...
+    # ... a TupleView combining a numpy column and a StringStore column:
+    view = TupleView(np.array([1, 1, 2]), StringStore.from_strings(["a", "b", "c"]))
+
+    # then ..
+    # ... the view should behave like a read-only list of tuples, containing python objects:
+    assert view == [(1, "a"), (1, "b"), (2, "c")]
+    assert view[-1] == (2, "c")
+    assert type(view[0][0]) is int
+
+    # ... the columns of the view should be returned as they are:
+    assert as_columns(view) == view.columns
+    assert as_columns([(1, "a"), (2, "b")]) == ((1, 2), ("a", "b"))
+
+
+def test_varints():
+    # given ...
+    # ... integers of 1, 2 and many bytes:
+    values = np.array([0, 5, 127, 128, 300, 2**40])
+
+    # then ..
+    # ... integers should be stored in 7 bits per byte, least significant first:
+    assert encode_varints(values[:5]).tolist() == [0, 5, 127, 128, 1, 172, 2]
+    # ... decoding should return the original integers:
+    assert decode_varints(encode_varints(values)).tolist() == values.tolist()
+    assert decode_varints(encode_varints(values[:0])).tolist() == []
+
+
+def test_CompressedPostings():
+    # given ...
+    # ... a matrix with a long column spanning several blocks, a short column and an empty column:
+    long_ids = np.arange(0, 3 * BLOCK_SIZE * 7, 7)
+    short_ids = np.array([14, 15, 700, 2000])
+    matrix = csc_matrix(
+        (
+            np.ones(len(long_ids) + len(short_ids)),
+            np.concatenate([long_ids, short_ids]),
+            [0, len(long_ids), len(long_ids) + len(short_ids), len(long_ids) + 4],
+        ),
+        shape=(3000, 3),
+    )
+
+    # when ...
+    # ... the columns are compressed:
+    postings = CompressedPostings.from_csc(matrix)
+
+    # then ..
+    # ... the postings should decode to the ids in each column, as a whole or block by block:
+    assert len(postings) == 3
+    assert postings[0].tolist() == long_ids.tolist()
+    assert postings[1].tolist() == short_ids.tolist()
+    assert postings[-1].tolist() == []
+    assert list(postings.iter_ids(0)) == long_ids.tolist()
+    assert [len(block) for block in postings.iter_blocks(0)] == [BLOCK_SIZE] * 3
+    with pytest.raises(IndexError):
+        postings[3]
+    # ... small gaps should take one byte per posting:
+    assert len(postings.buffer) == len(long_ids) + 1 + 1 + 2 + 2
+    # ... lookups and intersections should only return ids in the postings:
+    assert postings.contains(0, np.array([7, 8, 700, 4000])).tolist() == [7, 700]
+    assert postings.intersect(0, 1).tolist() == [14, 700]
+    assert postings.intersect(1, 2).tolist() == []
+
+
+def test_StringStore_from_spans():
+    # given ...
+    # ... texts, with non-ASCII characters, and the character offsets of their sentences:
+    texts = ["Hello world. Bye.", "", "Héllo 😀 wörld. Ünï."]
+    spans = [[(0, 12), (13, 17)], np.zeros((0, 2)), [(0, 14), (15, 19)]]
+
+    # when ... we gather the sentences into a StringStore:
+    store = StringStore.from_spans(texts, spans)
+
+    # then ..
+    # ... it should contain the substrings at the given offsets:
+    assert list(store) == ["Hello world.", "Bye.", "Héllo 😀 wörld.", "Ünï."]
+    assert list(StringStore.from_spans([], [])) == []
+    # ... the character offsets should map onto the offsets in the UTF-8 encoding of the text:
+    assert utf8_offsets(texts[2], spans[2]).tolist() == [[0, 19], [20, 26]]
+    assert texts[2].encode("utf-8")[20:26].decode("utf-8") == "Ünï."
+
+
+def test_StringStore_take_concatenate():
+    # given ...
+    # ... two StringStores:
+    first = StringStore.from_strings(["brave", "", "café"])
+    second = StringStore.from_strings(["today"])
+
+    # then ..
+    # ... taking strings should gather them in the given order:
+    assert first.take(np.array([2, 0, 2])) == ["café", "brave", "café"]
+    assert first.take(np.array([], dtype=np.int64)) == []
+    # ... concatenating stores should append their strings:
+    assert StringStore.concatenate([first, second]) == ["brave", "", "café", "today"]
+    concatenated = StringStore.concatenate([first.take([2]), second])
+    assert concatenated.offsets.tolist() == [0, 5, 10]
+
+
+def test_StringStore_take_memory():
+    # given ...
+    # ... a StringStore with long strings:
+    store = StringStore.from_strings(
+        ["sentence {:04d} ".format(i) * 80 for i in range(2000)]
+    )
+    text_size = store.offsets[-1]
+
+    # when ... we take all the strings in reverse order, and a contiguous range of them, while tracing the memory:
+    profiler = Profiler(trace_memory=True)
+    with profiler.stage("reversed"):
+        reversed_store = store.take(np.arange(len(store))[::-1])
+    with profiler.stage("contiguous"):
+        contiguous_store = store.take(np.arange(500, 1500))
+
+    # then ..
+    # ... the strings should be copied without an index with one entry per byte:
+    assert profiler.report()["reversed"]["peak_memory"] < 1.5 * text_size
+    assert profiler.report()["contiguous"]["peak_memory"] < 0.75 * text_size
+    # ... the stores should contain the strings in the given order:
+    assert list(reversed_store) == list(store)[::-1]
+    assert list(contiguous_store) == list(store)[500:1500]
+    # ... ranges which follow each other should be merged into runs:
+    starts, ends = merge_ranges(np.array([0, 5, 20, 24]), np.array([5, 9, 24, 30]))
+    assert starts.tolist() == [0, 20] and ends.tolist() == [9, 30]
+
+
+def test_SentenceStore():
+    # given ...
+    # ... rows of document ids, sentences and processed sentences:
+    rows = [
+        (2, "In the face of war.", "face war"),
+        (1, "We made this journey.", "journey"),
+        (1, "Héllo.", ""),
+    ]
+
+    # when ...
+    # ... the rows are stored in a SentenceStore:
+    store = SentenceStore.from_rows(rows)
+
+    # then ..
+    # ... the store should behave like the list of rows:
+    assert store == rows
+    assert store[1] == (1, "We made this journey.", "journey")
+    assert isinstance(store[0][0], int)
+    assert list(store) == rows
+    # ... the rows should be stored in columns, with 32 bit document ids:
+    assert store.documents.dtype == np.int32
+    assert store.sentences == [row[1] for row in rows]
+    assert store.processed == [row[2] for row in rows]
+    assert as_columns(store)[0] is store.documents
+    # ... the columns should be shared when the processed sentences are dropped or replaced:
+    sentences = store.without_processed()
+    assert sentences == [row[:2] for row in rows]
+    assert sentences.processed is None and sentences.sentences is store.sentences
+    assert sentences.with_processed(["a", "b", "c"])[2] == (1, "Héllo.", "c")
+    # ... rows should be taken and concatenated without going through tuples:
+    assert store.take(np.array([2, 0])) == [rows[2], rows[0]]
+    assert SentenceStore.concatenate([store.take([1]), store.take([])]) == rows[1:2]
+    assert SentenceStore.concatenate([store, store]) == rows + rows
+    # ... document ids which do not fit in 32 bits should be kept as 64 bit integers:
+    assert SentenceStore.from_rows([(2**40, "A.")]).documents.dtype == np.int64
+
+
+def test_document_offsets():
+    # given ...
+    # ... a text with non-ascii characters and the character offsets of its sentences:
+    text = "Hello wörld. Bye."
+    spans = np.array([[0, 12], [13, 17]])
+
+    # when ...
+    # ... the offsets of the sentences of the document are computed:
+    offsets = document_offsets(1, text, spans)
+
+    # then ..
+    # ... each sentence should be located by its document id and its offsets in the UTF-8 encoding of the text:
+    assert offsets.tolist() == [[1, 0, 13], [1, 14, 18]]
+    # ... the offsets of several documents should be concatenated, also when there are none:
+    assert concatenate_offsets(
+        [offsets, document_offsets(2, "Hi.", [[0, 3]])]
+    ).tolist() == [
+        [1, 0, 13],
+        [1, 14, 18],
+        [2, 0, 3],
+    ]
+    assert concatenate_offsets([]).shape == (0, 3)
+
+
+def test_BuildCache(tmp_path):
+    # given ...
+    # ... an instance of the BuildCache class which can hold 2 of the entries below:
+    entry = ([[0, 21]], [["journey"]])
+    cache = BuildCache(str(tmp_path / "cache"), "fingerprint", max_bytes=100)
+
+    # when ... we store 3 entries, after looking up the first one:
+    keys = [cache.key(text) for text in ["first", "second", "third"]]
+    cache.put(keys[0], *entry)
+    cache.put(keys[1], *entry)
+    assert cache.get(keys[0]) == entry
+    cache.put(keys[2], *entry)
+
+    # then ..
+    # ... the least recently used entry should be evicted:
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) == entry
+    assert cache.info == {
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+        "hit_rate": 2 / 3,
+        "size": 2,
+        "bytes": cache.nbytes,
+        "max_bytes": 100,
+    }
+    # ... the entries should be persisted, in order of use:
+    cache = BuildCache(str(tmp_path / "cache"), "fingerprint", max_bytes=100)
+    assert list(cache.entries) == [keys[0], keys[2]]
+    assert cache.get(keys[0]) == entry
+    # ... the keys should depend on the fingerprint of the configuration:
+    assert BuildCache(str(tmp_path / "cache"), "other").key("first") != keys[0]
+    # ... clearing the cache should remove all entries:
+    cache.clear()
+    assert len(cache) == 0 and not list((tmp_path / "cache").iterdir())
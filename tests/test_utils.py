@@ -0,0 +1,103 @@
+import io
+import sys
+
+import pytest
+
+from eigen_tech_project.utils.profiling import Profiler, profiled
+from eigen_tech_project.utils.utils import chunks, no_stdout
+
+
+def test_no_stdout():
+    # given ...
+    # ... the current standard output:
+    stdout = sys.stdout
+
+    # then ..
+    # ... printing within the context should not fail, and the standard output should be restored afterwards, also
+    # when an error is raised:
+    with no_stdout():
+        print("hidden")
+        assert isinstance(sys.stdout, io.StringIO)
+    assert sys.stdout is stdout
+    with pytest.raises(ValueError):
+        with no_stdout():
+            raise ValueError
+    assert sys.stdout is stdout
+
+
+def test_chunks():
+    # then ..
+    # ... the items should be split in consecutive lists of at most the given size:
+    assert list(chunks([1, 2, 3, 4, 5], 2)) == [[1, 2], [3, 4], [5]]
+    assert list(chunks([], 2)) == []
+
+
+def test_Profiler():
+    # given ...
+    # ... a Profiler recording the spans passed to its callback and the peak memory of each stage:
+    spans = []
+    profiler = Profiler(callbacks=[spans.append], trace_memory=True)
+
+    # when ...
+    # ... a stage is run twice, once with a nested stage allocating memory:
+    for i in range(2):
+        with profiler.stage("outer", items=10) as span:
+            span.items += 1
+            if i:
+                with profiler.stage("inner", items=3):
+                    assert len([0] * 100000) == 100000
+
+    # then ..
+    # ... the statistics of the runs of each stage should be summed, in order of the first completed run:
+    report = profiler.report()
+    assert list(report) == ["outer", "inner"]
+    assert report["outer"]["calls"] == 2
+    assert report["outer"]["items"] == 22
+    assert report["inner"] == {
+        "calls": 1,
+        "wall": report["inner"]["wall"],
+        "cpu": report["inner"]["cpu"],
+        "items": 3,
+        "peak_memory": report["inner"]["peak_memory"],
+    }
+    assert report["outer"]["wall"] >= report["inner"]["wall"] > 0
+    # ... the peak memory of the nested stage should also count for the outer stage:
+    assert report["outer"]["peak_memory"] >= report["inner"]["peak_memory"] >= 800000
+    # ... each run should have been passed to the callback, with the name of the stage it is nested in:
+    assert [(span.name, span.parent) for span in spans] == [
+        ("outer", None),
+        ("inner", "outer"),
+        ("outer", None),
+    ]
+
+    # when ... the statistics are reset:
+    profiler.reset()
+    # then ... nothing should be reported:
+    assert profiler.report() == {}
+
+
+def test_profiled():
+    # given ...
+    # ... a class with a profiler and profiled methods:
+    class Counter:
+        def __init__(self):
+            self.profiler = Profiler()
+
+        @profiled("numbers")
+        def numbers(self, n):
+            return list(range(n))
+
+        @profiled("total", items=None)
+        def total(self, n):
+            return sum(self.numbers(n))
+
+    counter = Counter()
+
+    # when ... the methods are called:
+    assert counter.total(5) == 10
+
+    # then ... each call should be recorded, with the number of items in the result if they are counted:
+    report = counter.profiler.report()
+    assert report["numbers"]["items"] == 5
+    assert report["total"]["items"] == 0
+    assert report["total"]["calls"] == 1